@@ -1,16 +1,18 @@
-import json
 import re
+from string import Template
 from copy import deepcopy
 from typing import Any, Dict, Literal, Optional
 
+import orjson
+
 from langchain_core.messages import HumanMessage
-from langchain_openai import ChatOpenAI
 from langgraph.types import Command
 from pydantic import BaseModel, Field
 
 # --- Custom Module Imports ---
 from state import State
-from config import MAX_CUSTOM_FACET_ATTEMPTS, CUSTOM_FACET_AGENT_PROMPT
+from config import MAX_CUSTOM_FACET_ATTEMPTS, CUSTOM_FACET_AGENT_PROMPT, deterministic_llm, invoke_llm
+from utils import dumps_json
 
 
 class CustomFacetResponse(BaseModel):
@@ -18,16 +20,74 @@ class CustomFacetResponse(BaseModel):
 
     customFacets: Dict[str, Any] = Field(default_factory=dict)
     customState: Dict[str, Any] = Field(default_factory=dict)
-    ttlDefinitions: Optional[str] = None
 
 
 _CODE_FENCE_PATTERN = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL)
 _LINE_COMMENT_PATTERN = re.compile(r"(?<!https:)(?<!http:)//.*")
 
 
+_RESERVED_FIELDS = frozenset({"artifact_type", "description", "source"})
+
+# Canned result for the common case where Agent 1 mapped every element.
+_NO_CUSTOM_FACETS_STATE = {
+    "totalCustomFacets": 0,
+    "extensionNamespace": "dfc-ext",
+    "reasoningApplied": False,
+    "customFacetsNeeded": False,
+    "dataCoverageComplete": True,
+    "reasoning": "All data elements successfully mapped by ontology_research_agent."
+}
+
+
+_TTL_CLASS_TEMPLATE = Template(
+    "dfc-ext:${facet}\n  a owl:Class ;\n  rdfs:subClassOf uco-core:Facet ;\n  rdfs:label \"${facet}\" ;\n"
+    "  rdfs:comment \"Extension facet for ${artifact} capturing unmapped evidence fields.\" ."
+)
+_TTL_PROPERTY_TEMPLATE = Template(
+    "\ndfc-ext:${local}\n  a owl:DatatypeProperty ;\n  rdfs:domain dfc-ext:${facet} ;\n"
+    "  rdfs:range ${datatype} ;\n  rdfs:label \"${local}\" ."
+)
 _TTL_HEADER = """@prefix dfc-ext: <https://www.w3.org/dfc-ext/> .\n@prefix uco-core: <https://ontology.unifiedcyberontology.org/uco/core/> .\n@prefix owl: <http://www.w3.org/2002/07/owl#> .\n@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .\n@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .\n"""
 
 
+def render_ttl(facet_definitions: Dict[str, Any], artifact_type: Optional[str] = None) -> str:
+    """Render Turtle stubs (owl:Class plus one owl:DatatypeProperty per property) for facetDefinitions."""
+
+    artifact_label = artifact_type or 'unknown artifact type'
+    ttl_lines = [_TTL_HEADER]
+    for facet_name, definition in (facet_definitions or {}).items():
+        ttl_lines.extend([
+            "",
+            f"# Auto-generated extension facet for {artifact_label}",
+            _TTL_CLASS_TEMPLATE.substitute(facet=facet_name, artifact=artifact_label),
+        ])
+        properties = definition.get("properties") if isinstance(definition, dict) else None
+        for prop_name, meta in (properties or {}).items():
+            datatype = meta.get("dataType") if isinstance(meta, dict) else None
+            ttl_lines.append(_TTL_PROPERTY_TEMPLATE.substitute(
+                local=prop_name.split(":", 1)[-1], facet=facet_name, datatype=datatype or "xsd:string"
+            ))
+    return "\n".join(ttl_lines)
+
+
+def unmapped_element_names(ontology_map: Dict[str, Any]) -> list[str]:
+    """Names of the elements Agent 1 could not map, minus reserved input fields."""
+
+    additional_details = ontology_map.get("additional_details") or {}
+    unmapped_elements: list[str] = []
+    for element in additional_details.get("unmappedElements", []):
+        if isinstance(element, str):
+            if element not in _RESERVED_FIELDS:
+                unmapped_elements.append(element)
+        elif isinstance(element, dict):
+            name = element.get("field") or element.get("name")
+            if name and name not in _RESERVED_FIELDS:
+                unmapped_elements.append(name)
+        else:
+            unmapped_elements.append(str(element))
+    return unmapped_elements
+
+
 def _model_dump(model: CustomFacetResponse) -> Dict[str, Any]:
     """Compatible dump for both Pydantic v1 and v2."""
 
@@ -56,7 +116,7 @@ def _extract_json_payload(text: str) -> Dict[str, Any]:
         cleaned_lines.append(_LINE_COMMENT_PATTERN.sub("", line))
     cleaned = "\n".join(cleaned_lines)
 
-    return json.loads(cleaned)
+    return orjson.loads(cleaned)
 
 
 def _to_camel_case(name: str) -> str:
@@ -203,16 +263,7 @@ def _auto_generate_custom_facets(
         "reasoning": f"Deterministically generated {facet_name} to preserve unmapped fields for {artifact_type or 'unknown artifact type'}."
     }
 
-    ttl_lines = [_TTL_HEADER, "", f"# Auto-generated extension facet for {artifact_type or 'unknown artifact type'}"]
-    ttl_lines.append(
-        f"dfc-ext:{facet_name}\n  a owl:Class ;\n  rdfs:subClassOf uco-core:Facet ;\n  rdfs:label \"{facet_name}\" ;\n  rdfs:comment \"Extension facet for {artifact_type or 'unknown artifact type'} capturing unmapped evidence fields.\" ."
-    )
-    for prop_name, meta in properties.items():
-        local = prop_name.split(":", 1)[1]
-        ttl_lines.append(
-            f"\ndfc-ext:{local}\n  a owl:DatatypeProperty ;\n  rdfs:domain dfc-ext:{facet_name} ;\n  rdfs:range {meta['dataType']} ;\n  rdfs:label \"{local}\" ."
-        )
-    ttl_definitions = "\n".join(ttl_lines)
+    ttl_definitions = render_ttl(custom_facets["facetDefinitions"], artifact_type)
 
     ontology_updates = {
         "facet_name": facet_name,
@@ -225,7 +276,7 @@ def _auto_generate_custom_facets(
 # Agent Setup
 # =============================================================================
 
-custom_facet_llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+custom_facet_llm = deterministic_llm
 custom_facet_structured_llm = custom_facet_llm.with_structured_output(
     CustomFacetResponse, method="function_calling"
 )
@@ -270,39 +321,37 @@ def custom_facet_node(state: State) -> dict:
             "customFacetErrors": custom_errors + ["Received an error from ontology_research_agent."],
         }
 
+    # --- FAST PATH OPTIMIZATION ---
+    # Decide before serializing the input or building per-element details.
+    additional_details = ontology_map.get("additional_details") or {}
+    unmapped_elements = unmapped_element_names(ontology_map)
+
+    if not unmapped_elements:
+        print("[INFO] [Custom Facet] Pre-check PASSED: Agent 1 mapped all elements. Skipping LLM analysis.")
+        return {
+            "customFacets": {},
+            "customState": dict(_NO_CUSTOM_FACETS_STATE),
+            "customFacetAttempts": current_attempts + 1,
+        }
+    # --- END OF FAST PATH ---
+
     # Get both the original input and the first agent's map for full context
     raw_input_payload = state.get("rawInputJSON")
     if isinstance(raw_input_payload, (dict, list)):
-        original_input = json.dumps(raw_input_payload, indent=2)
+        original_input = dumps_json(raw_input_payload)
     elif raw_input_payload is not None:
         original_input = str(raw_input_payload)
     else:
         messages = state.get("messages", [])
         original_input = next((str(m.content) for m in messages if hasattr(m, 'type') and m.type == "human"), "")
 
-    # --- FAST PATH OPTIMIZATION ---
-    additional_details = ontology_map.get("additional_details") or {}
-    reserved_fields = {"artifact_type", "description", "source"}
-    raw_unmapped = additional_details.get("unmappedElements", [])
-    unmapped_elements: list[str] = []
-    for element in raw_unmapped:
-        if isinstance(element, str):
-            if element not in reserved_fields:
-                unmapped_elements.append(element)
-        elif isinstance(element, dict):
-            name = element.get("field") or element.get("name")
-            if name and name not in reserved_fields:
-                unmapped_elements.append(name)
-        else:
-            unmapped_elements.append(str(element))
-
     raw_unmapped_details = additional_details.get("unmappedElementDetails") or []
     cleaned_unmapped_details = []
     for detail in raw_unmapped_details:
         if not isinstance(detail, dict):
             continue
         field_name = detail.get("field") or detail.get("name")
-        if not field_name or field_name in reserved_fields:
+        if not field_name or field_name in _RESERVED_FIELDS:
             continue
 
         cleaned_detail = {"field": field_name}
@@ -337,22 +386,6 @@ def custom_facet_node(state: State) -> dict:
                         }
                     )
 
-    if not unmapped_elements:
-        print("[INFO] [Custom Facet] Pre-check PASSED: Agent 1 mapped all elements. Skipping LLM analysis.")
-        return {
-            "customFacets": {},
-            "customState": {
-                "totalCustomFacets": 0,
-                "extensionNamespace": "dfc-ext",
-                "reasoningApplied": False, 
-                "customFacetsNeeded": False,
-                "dataCoverageComplete": True,
-                "reasoning": "All data elements successfully mapped by ontology_research_agent."
-            },
-            "customFacetAttempts": current_attempts + 1,
-        }
-    # --- END OF FAST PATH ---
-
     print(f"[INFO] [Custom Facet] Unmapped fields forwarded: {len(unmapped_elements)}")
 
     print("[INFO] [Custom Facet] Starting independent reasoning analysis...")
@@ -362,8 +395,8 @@ def custom_facet_node(state: State) -> dict:
         error_feedback = f"\n\nPREVIOUS ERRORS TO CONSIDER:\n" + "\n".join(custom_errors[-2:])
 
     # New, clearer prompt with distinct roles for each piece of information
-    unmapped_names_json = json.dumps(unmapped_elements, indent=2)
-    unmapped_details_json = json.dumps(cleaned_unmapped_details, indent=2) if cleaned_unmapped_details else "[]"
+    unmapped_names_json = dumps_json(unmapped_elements)
+    unmapped_details_json = dumps_json(cleaned_unmapped_details) if cleaned_unmapped_details else "[]"
 
     prompt = f"""
 **CONTEXT: ORIGINAL USER INPUT**
@@ -375,7 +408,7 @@ This is the complete, original data provided by the user. Use this for context i
 **TASK: ANALYZE AGENT 1'S OUTPUT**
 This is the analysis from the first agent. Your job is to find any gaps it left.
 ```json
-{json.dumps(ontology_map, indent=2)}
+{dumps_json(ontology_map)}
 ```
 {error_feedback}
 
@@ -400,7 +433,7 @@ This is the analysis from the first agent. Your job is to find any gaps it left.
 
         data: Dict[str, Any]
         try:
-            response_model = custom_facet_structured_llm.invoke([
+            response_model = invoke_llm(custom_facet_structured_llm, [
                 {"role": "system", "content": CUSTOM_FACET_AGENT_PROMPT},
                 {"role": "user", "content": prompt},
             ])
@@ -410,7 +443,8 @@ This is the analysis from the first agent. Your job is to find any gaps it left.
             print(
                 f"[WARNING] [Custom Facet] Structured output failed: {structured_err}. Falling back to raw parsing."
             )
-            raw_response = custom_facet_llm.invoke(
+            raw_response = invoke_llm(
+                custom_facet_llm,
                 [
                     {"role": "system", "content": CUSTOM_FACET_AGENT_PROMPT},
                     {"role": "user", "content": prompt},
@@ -437,11 +471,10 @@ This is the analysis from the first agent. Your job is to find any gaps it left.
 
         custom_facets = data.get("customFacets") or {}
         custom_state = data.get("customState") or {}
-        ttl_definitions = data.get("ttlDefinitions")
 
         auto_facets = False
         if (not custom_facets.get("facetDefinitions") and cleaned_unmapped_details):
-            generated_facets, generated_state, generated_ttl, ontology_updates = _auto_generate_custom_facets(
+            generated_facets, generated_state, _, ontology_updates = _auto_generate_custom_facets(
                 cleaned_unmapped_details,
                 raw_input_payload if isinstance(raw_input_payload, dict) else {},
                 ontology_map,
@@ -450,7 +483,6 @@ This is the analysis from the first agent. Your job is to find any gaps it left.
                 print("[INFO] [Custom Facet] Auto-generating deterministic custom facets for unmapped fields.")
                 custom_facets = generated_facets
                 custom_state = generated_state
-                ttl_definitions = generated_ttl
                 auto_facets = True
 
                 facet_name = ontology_updates.get("facet_name")
@@ -496,7 +528,11 @@ This is the analysis from the first agent. Your job is to find any gaps it left.
         if auto_facets:
             update_payload["ontologyMap"] = ontology_map
 
-        # Add ttlDefinitions to the state if it was generated
+        # TTL is rendered here from facetDefinitions rather than requested from the LLM
+        ttl_definitions = ""
+        if custom_facets.get("facetDefinitions"):
+            artifact_type = raw_input_payload.get("artifact_type") if isinstance(raw_input_payload, dict) else None
+            ttl_definitions = render_ttl(custom_facets["facetDefinitions"], artifact_type)
         if ttl_definitions:
             update_payload["ttlDefinitions"] = ttl_definitions
             print(f"[INFO] [Custom Facet] TTL definitions generated ({len(ttl_definitions)} chars).")
@@ -1,5 +1,6 @@
+import asyncio
 import json
-import re
+from string import Template
 from typing import Any, Dict, List
 
 from langchain_core.messages import HumanMessage
@@ -8,31 +9,67 @@ from langchain_core.messages import HumanMessage
 from state import State
 from config import (
     llm,
+    strong_llm,
+    ainvoke_llm,
+    run_llm_coroutine,
+    run_chat_batch,
+    LLM_BATCH_MODE,
+    SHARD_CONCURRENCY,
     MAX_GRAPH_GENERATOR_ATTEMPTS,
-    GRAPH_GENERATOR_AGENT_PROMPT
+    GRAPH_GENERATOR_AGENT_PROMPT,
+    GRAPH_GENERATOR_EXAMPLES,
+    GRAPH_GENERATOR_EXAMPLES_HEADER,
+    CASE_UCO_CONTEXT
 )
 # Removed generate_uuid import - using deterministic UUID plan instead
-from utils import _get_input_artifacts
+from utils import _get_input_artifacts, extract_first_json, dumps_json, build_facet_placement, facet_for_property
 from agents.hallucination_checker import FeedbackProcessingAgent, DynamicCorrectionAgent
+from agents.validator import _hard_fail_violations
 
 
-DEFAULT_CONTEXT = {
-    "case-investigation": "https://ontology.caseontology.org/case/investigation/",
-    "kb": "http://example.org/kb/",
-    "drafting": "http://example.org/ontology/drafting/",
-    "rdf": "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
-    "rdfs": "http://www.w3.org/2000/01/rdf-schema#",
-    "uco-action": "https://ontology.unifiedcyberontology.org/uco/action/",
-    "core": "https://ontology.unifiedcyberontology.org/uco/core/",
-    "identity": "https://ontology.unifiedcyberontology.org/uco/identity/",
-    "location": "https://ontology.unifiedcyberontology.org/uco/location/",
-    "observable": "https://ontology.unifiedcyberontology.org/uco/observable/",
-    "tool": "https://ontology.unifiedcyberontology.org/uco/tool/",
-    "types": "https://ontology.unifiedcyberontology.org/uco/types/",
-    "vocabulary": "https://ontology.unifiedcyberontology.org/uco/vocabulary/",
-    "xsd": "http://www.w3.org/2001/XMLSchema#",
-    "dfc-ext": "https://www.w3.org/dfc-ext/"
-}
+# Static parts of the fallback LLM prompt, compiled once at import; only the
+# per-run payloads are substituted on each call. Payloads shared by every shard
+# of a run come first, so shards after the first hit the provider's prefix cache.
+_GENERATOR_PROMPT_TEMPLATE = Template("""
+## STANDARD ONTOLOGY KEYS (from Agent 1):
+${ontology_map}
+
+## CUSTOM FACETS (from Agent 2):
+${custom_facets}
+
+## NODES TO FILL (skeleton built by the runtime):
+Your task is to fill in the properties for each of these pre-built nodes based on the other information provided.
+Do NOT add new entities. Do NOT change the @id or @type of existing entities. Where `allowed_props` is listed, use only those properties.
+```json
+${skeleton}
+```
+
+## SOURCE PROPERTY MAP (directly from evidence fields):
+${source_properties}
+
+## VALIDATION FEEDBACK FOR CORRECTION:
+${validation_feedback}
+
+${error_feedback}
+
+${dynamic_instructions}
+
+## INSTRUCTIONS:
+1. Review the source data and apply every property exactly where indicated.
+2. For each node to fill, copy the values from SOURCE PROPERTY MAP without renaming keys.
+3. If a facet assignment is provided, add those properties verbatim to that facet node.
+4. Return a single JSON object mapping each skeleton `@id` to an object holding only that node's properties.
+   Do not repeat `@id`, `@type` or `uco-core:hasFacet`, and omit nodes you have nothing to add to; the skeleton and `@context` are attached automatically.
+""")
+
+_HALLUCINATION_RULES = """## MANDATORY RULES FOR THIS GENERATION:
+1. ONLY use data that exists in the original input artifacts.
+2. DO NOT add timestamps unless explicitly provided in input.
+3. DO NOT fabricate IP addresses, ports, or hostnames.
+4. Omit properties if the data is not in the input; do not invent values.
+5. Double-check every value against the original input.\n\nFAILURE TO FOLLOW THESE RULES WILL RESULT IN ANOTHER HALLUCINATION FAILURE.
+"""
+
 
 def _enforce_property_placement(graph: dict, ontology_map: dict) -> dict:
     """
@@ -47,13 +84,10 @@ def _enforce_property_placement(graph: dict, ontology_map: dict) -> dict:
 
     nodes_by_id = {node["@id"]: node for node in graph_nodes}
     
-    # Create a map of {property_name: facet_type}
-    prop_to_facet_map = {}
-    if isinstance(ontology_map.get("properties"), dict):
-        for owner, props in ontology_map["properties"].items():
-            if owner.endswith("Facet"):
-                for prop in props:
-                    prop_to_facet_map[prop] = owner
+    # (class, property) -> owning facet, computed once for the whole graph
+    placement = build_facet_placement(ontology_map)
+    if not placement:
+        return graph
 
     for node in graph_nodes:
         node_type = node.get("@type", "")
@@ -61,13 +95,12 @@ def _enforce_property_placement(graph: dict, ontology_map: dict) -> dict:
             continue
 
         properties_to_move = {}
-        for prop, value in node.items():
-            if prop in ["@id", "@type", "uco-core:hasFacet"]:
+        for prop in node:
+            if prop in ("@id", "@type", "uco-core:hasFacet"):
                 continue
-            
-            prop_name = prop.split(":")[-1]
-            if prop_name in prop_to_facet_map:
-                properties_to_move[prop] = value
+            target_facet_type = facet_for_property(placement, node_type, prop)
+            if target_facet_type:
+                properties_to_move[prop] = target_facet_type
         
         if properties_to_move:
             print(f"[INFO] [Graph Cleanup] Found {len(properties_to_move)} misplaced properties on node {node.get('@id')}")
@@ -76,22 +109,18 @@ def _enforce_property_placement(graph: dict, ontology_map: dict) -> dict:
             if not facet_refs:
                 continue
 
-            for prop, value in properties_to_move.items():
-                prop_name = prop.split(":")[-1]
-                target_facet_type = prop_to_facet_map.get(prop_name)
-                
-                target_facet_node = None
-                for facet_ref in facet_refs:
-                    facet_id = facet_ref.get("@id")
-                    if facet_id in nodes_by_id:
-                        facet_node = nodes_by_id[facet_id]
-                        if facet_node.get("@type") == target_facet_type:
-                            target_facet_node = facet_node
-                            break
-                
+            # Index this node's facets by type once instead of rescanning per property
+            facets_by_type = {}
+            for facet_ref in facet_refs:
+                facet_node = nodes_by_id.get(facet_ref.get("@id"))
+                facet_type = facet_node.get("@type") if facet_node is not None else None
+                if isinstance(facet_type, str):
+                    facets_by_type.setdefault(facet_type.split(":")[-1], facet_node)
+
+            for prop, target_facet_type in properties_to_move.items():
+                target_facet_node = facets_by_type.get(target_facet_type.split(":")[-1])
                 if target_facet_node is not None:
-                    target_facet_node[prop] = value
-                    del node[prop]
+                    target_facet_node[prop] = node.pop(prop)
                     print(f"[INFO] [Graph Cleanup] Moved '{prop}' to facet {target_facet_node.get('@id')}")
                 else:
                     print(f"[WARNING] [Graph Cleanup] Could not find a suitable facet for property '{prop}'")
@@ -112,14 +141,243 @@ def _normalise_value(value: Any) -> Any:
 
 # Removed strict validation functions - LLM now has full control over graph generation
 
+# LLM fallback prompts cover at most this many records; larger plans are split
+# into shards that are generated concurrently and merged back by @id.
+_RECORDS_PER_SHARD = 4
+_MAX_PARALLEL_SHARDS = max(1, SHARD_CONCURRENCY)
+
+
+def build_skeleton(uuid_plan: List[Dict[str, str]], slot_type_map: Dict[str, str], source_properties: Any = None) -> Dict[str, Any]:
+    """
+    Build the typed node skeleton for a UUID plan: one {@id, @type} node per planned
+    slot, with each record's primary object linked to its facets via uco-core:hasFacet.
+    Relationship slots without source data are left out.
+    """
+    skeleton_graph = {"@context": dict(CASE_UCO_CONTEXT), "@graph": []}
+    if not (uuid_plan and slot_type_map):
+        return skeleton_graph
+
+    sources = source_properties if isinstance(source_properties, dict) else {}
+    # Collect ids, types and facet links as parallel columns, then build the node dicts in one pass
+    slot_ids: List[str] = []
+    slot_types: List[str] = []
+    facet_links: Dict[str, List[Dict[str, str]]] = {}
+    emitted = set()
+    for record_plan in uuid_plan:
+        primary_slug = None
+        for slot_slug in record_plan.keys():
+            lower_slug = slot_slug.lower()
+            if "facet" in lower_slug or "relationship" in lower_slug:
+                continue
+            primary_slug = slot_slug
+            break
+        if primary_slug is None and record_plan:
+            primary_slug = next(iter(record_plan))
+        primary_uuid = None
+        facet_refs = []
+        for slot_slug, slot_uuid in record_plan.items():
+            slot_type = slot_type_map.get(slot_uuid, "uco-core:UcoObject")
+            lower_slug = slot_slug.lower()
+            if slot_slug == primary_slug:
+                primary_uuid = slot_uuid
+            else:
+                payload = sources.get(slot_uuid, {})
+                slot_type_lower = slot_type.lower() if isinstance(slot_type, str) else ""
+                if "relationship" in lower_slug or slot_type_lower.endswith("relationship"):
+                    if not (payload.get("properties") or payload.get("raw")):
+                        continue
+                if "facet" in lower_slug:
+                    facet_refs.append({"@id": slot_uuid})
+            # Facets shared between records are emitted once and linked from each record
+            if slot_uuid in emitted:
+                continue
+            emitted.add(slot_uuid)
+            slot_ids.append(slot_uuid)
+            slot_types.append(slot_type)
+        if primary_uuid and facet_refs:
+            facet_links[primary_uuid] = facet_refs
+
+    skeleton_graph["@graph"] = [
+        {"@id": slot_uuid, "@type": slot_type, "uco-core:hasFacet": facet_links[slot_uuid]}
+        if slot_uuid in facet_links else {"@id": slot_uuid, "@type": slot_type}
+        for slot_uuid, slot_type in zip(slot_ids, slot_types)
+    ]
+    return skeleton_graph
+
+
+def _fill_targets(skeleton_nodes: List[Dict[str, Any]], ontology_map: Dict[str, Any], custom_facets: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Describe the nodes the LLM should fill: @id, @type and, where the ontology map or
+    custom facet definitions declare them, the properties allowed on that type.
+    """
+    allowed_by_type: Dict[str, List[str]] = {
+        owner: list(props or []) for owner, props in (ontology_map.get("properties") or {}).items()
+    }
+    for facet_name, definition in ((custom_facets or {}).get("facetDefinitions") or {}).items():
+        if isinstance(definition, dict):
+            allowed_by_type.setdefault(facet_name, list(definition.get("properties") or {}))
+
+    targets = []
+    for node in skeleton_nodes:
+        node_type = node.get("@type")
+        target = {"@id": node["@id"], "@type": node_type}
+        allowed = allowed_by_type.get(node_type.split(":")[-1]) if isinstance(node_type, str) else None
+        if allowed:
+            target["allowed_props"] = allowed
+        targets.append(target)
+    return targets
+
+
+# Any JSON value except null; empty strings and collections are rejected by minLength/minItems/minProperties
+_NON_EMPTY_VALUE_SCHEMA = {
+    "anyOf": [
+        {"type": "string", "minLength": 1},
+        {"type": ["number", "boolean"]},
+        {"type": "array", "minItems": 1},
+        {"type": "object", "minProperties": 1},
+    ]
+}
+
+
+def _qualified_props(target: Dict[str, Any]) -> List[str]:
+    """Allowed property names for a fill target, prefixed the way the source property map writes them."""
+    return [prop if ":" in prop else f"uco-observable:{prop}" for prop in target.get("allowed_props", [])]
+
+
+def _fill_schema(targets: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    JSON schema for the LLM's reply: an object keyed by planned @id whose values hold
+    only non-empty properties, restricted to the allowed ones where they are known.
+    """
+    node_schemas = {}
+    for target in targets:
+        allowed = _qualified_props(target)
+        node_schemas[target["@id"]] = {
+            "type": "object",
+            "properties": {prop: _NON_EMPTY_VALUE_SCHEMA for prop in allowed},
+            "additionalProperties": False if allowed else _NON_EMPTY_VALUE_SCHEMA,
+        }
+    return {"type": "object", "properties": node_schemas, "additionalProperties": False}
+
+
+# Strict structured outputs need every key listed and typed; unknown values come back as
+# null and are dropped by _constrain_fill_output. Typed literals cover xsd:dateTime etc.
+_STRICT_LITERAL_SCHEMAS = [
+    {"type": "string"},
+    {"type": "number"},
+    {"type": "boolean"},
+    {
+        "type": "object",
+        "properties": {"@type": {"type": "string"}, "@value": {"type": "string"}},
+        "required": ["@type", "@value"],
+        "additionalProperties": False,
+    },
+]
+_STRICT_VALUE_SCHEMA = {
+    "anyOf": _STRICT_LITERAL_SCHEMAS + [{"type": "array", "items": {"anyOf": _STRICT_LITERAL_SCHEMAS}}, {"type": "null"}]
+}
+# Every allowed property is emitted (mostly as null) in strict mode, so wide shards stay non-strict
+_STRICT_SCHEMA_MAX_SLOTS = 64
+
+
+def _strict_fill_schema(targets: List[Dict[str, Any]]):
+    """
+    Strict variant of _fill_schema() that the API guarantees, or None when a target has
+    no known allowed properties or the shard has too many property slots to spell out.
+    """
+    allowed_by_id = {target["@id"]: _qualified_props(target) for target in targets}
+    if not all(allowed_by_id.values()) or sum(map(len, allowed_by_id.values())) > _STRICT_SCHEMA_MAX_SLOTS:
+        return None
+    node_schemas = {
+        node_id: {"anyOf": [
+            {
+                "type": "object",
+                "properties": {prop: _STRICT_VALUE_SCHEMA for prop in allowed},
+                "required": list(allowed),
+                "additionalProperties": False,
+            },
+            {"type": "null"},
+        ]}
+        for node_id, allowed in allowed_by_id.items()
+    }
+    return {"type": "object", "properties": node_schemas, "required": list(node_schemas), "additionalProperties": False}
+
+
+def _constrain_fill_output(bodies: Dict[str, Any], targets: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Apply the fill schema to a reply: drop unplanned nodes, disallowed keys and empty values."""
+    allowed_by_id = {target["@id"]: set(_qualified_props(target)) for target in targets}
+    constrained = {}
+    for node_id, body in bodies.items():
+        if node_id not in allowed_by_id or not isinstance(body, dict):
+            continue
+        allowed = allowed_by_id[node_id]
+        kept = {
+            key: value for key, value in body.items()
+            if (not allowed or key in allowed) and value not in (None, "", [], {})
+        }
+        if kept:
+            constrained[node_id] = kept
+    return constrained
+
+
+def _parse_fill_reply(content: str, targets: List[Dict[str, Any]]) -> dict:
+    """Parse one shard's fill reply, keeping a full {"@graph"} document as is."""
+    if not content or not content.strip():
+        raise ValueError("Empty JSON content received from LLM")
+    llm_json_obj = extract_first_json(content, "{")
+    if "@graph" in llm_json_obj:
+        return llm_json_obj
+    return _constrain_fill_output(llm_json_obj, targets)
+
+
+def _retry_examples(slot_types) -> str:
+    """Few-shot examples matching the shard's @types, appended to the system prompt on retries."""
+    types = set(slot_types)
+    selected = [
+        text for text, prefixes in GRAPH_GENERATOR_EXAMPLES
+        if not prefixes or any(slot_type.startswith(prefixes) for slot_type in types)
+    ]
+    return GRAPH_GENERATOR_EXAMPLES_HEADER + "\n".join(selected)
+
+
+def _shard_skeleton(skeleton_graph: dict, uuid_plan: List[Dict[str, str]], source_properties: Any) -> List[tuple]:
+    """
+    Split the skeleton and source property map into per-record-group shards.
+    Returns (skeleton_shard, source_shard) pairs; a single pair when the plan is small.
+    """
+    if len(uuid_plan) <= _RECORDS_PER_SHARD:
+        return [(skeleton_graph, source_properties)]
+
+    nodes_by_id = {node["@id"]: node for node in skeleton_graph.get("@graph", [])}
+    sources = source_properties if isinstance(source_properties, dict) else {}
+    shards = []
+    for start in range(0, len(uuid_plan), _RECORDS_PER_SHARD):
+        shard_ids = list(dict.fromkeys(
+            slot_uuid for row in uuid_plan[start:start + _RECORDS_PER_SHARD] for slot_uuid in row.values()
+        ))
+        shards.append((
+            {"@graph": [nodes_by_id[slot_uuid] for slot_uuid in shard_ids if slot_uuid in nodes_by_id]},
+            {slot_uuid: sources[slot_uuid] for slot_uuid in shard_ids if slot_uuid in sources},
+        ))
+    return shards
+
+
 def _merge_llm_output_into_skeleton(skeleton_graph, llm_graph):
     """
-    Merges properties from the LLM's graph into the skeleton graph.
+    Merges properties from the LLM's output into the skeleton graph.
+    Accepts either an {@id: properties} body map or a full {"@graph": [...]} document.
     This ensures that no nodes are lost and that @id and @type are preserved.
     """
     skeleton_nodes_by_id = {node["@id"]: node for node in skeleton_graph.get("@graph", [])}
-    
-    for llm_node in llm_graph.get("@graph", []):
+
+    if "@graph" in llm_graph:
+        llm_nodes = llm_graph.get("@graph", [])
+    else:
+        llm_nodes = [
+            {**body, "@id": node_id} for node_id, body in llm_graph.items() if isinstance(body, dict)
+        ]
+
+    for llm_node in llm_nodes:
         node_id = llm_node.get("@id")
         if node_id in skeleton_nodes_by_id:
             # Copy all properties from llm_node except @id and @type
@@ -131,29 +389,27 @@ def _merge_llm_output_into_skeleton(skeleton_graph, llm_graph):
     return skeleton_graph
 
 
+def _shard_violations(shard_skeleton: dict, llm_json_obj: dict) -> List[str]:
+    """Hard-fail conditions in one shard's reply, checked on a merged copy so the skeleton is untouched."""
+    preview = {"@graph": [dict(node) for node in shard_skeleton.get("@graph", [])]}
+    # The canonical context is attached to the final graph, so prefixes are checked against it
+    return _hard_fail_violations(_merge_llm_output_into_skeleton(preview, llm_json_obj)["@graph"], CASE_UCO_CONTEXT)
+
+
 def format_hallucination_instructions(recent_feedbacks: List[str]) -> str:
     """Formats recent hallucination feedback into a detailed prompt section."""
     if not recent_feedbacks:
         return ""
-    instructions = "## CRITICAL HALLUCINATION CORRECTIONS REQUIRED\n\n"
-    for i, feedback in enumerate(recent_feedbacks, 1):
-        instructions += f"### Correction {i}:\n{feedback}\n\n"
-    instructions += """## MANDATORY RULES FOR THIS GENERATION:
-1. ONLY use data that exists in the original input artifacts.
-2. DO NOT add timestamps unless explicitly provided in input.
-3. DO NOT fabricate IP addresses, ports, or hostnames.
-4. Omit properties if the data is not in the input; do not invent values.
-5. Double-check every value against the original input.\n\nFAILURE TO FOLLOW THESE RULES WILL RESULT IN ANOTHER HALLUCINATION FAILURE.
-"""
-    return instructions
+    parts = ["## CRITICAL HALLUCINATION CORRECTIONS REQUIRED\n\n"]
+    parts.extend(f"### Correction {i}:\n{feedback}\n\n" for i, feedback in enumerate(recent_feedbacks, 1))
+    parts.append(_HALLUCINATION_RULES)
+    return "".join(parts)
 
 
 def _assign_properties(node: Dict[str, Any], properties: Dict[str, Any]) -> None:
-    for prop, value in (properties or {}).items():
-        # Skip None values and empty strings
-        if value is None or value == "":
-            continue
-        node[prop] = value
+    # Skip None values and empty strings; one dict.update per node instead of per-key stores
+    if properties:
+        node.update({prop: value for prop, value in properties.items() if value is not None and value != ""})
 
 
 def _slugify(name: str) -> str:
@@ -191,10 +447,7 @@ def _build_deterministic_graph(
         node = nodes_by_id.get(facet_uuid)
         if not node:
             continue
-        values = assignment.get("values", {})
-        filtered_values = {k: v for k, v in values.items() if v is not None}
-        if filtered_values:
-            _assign_properties(node, filtered_values)
+        _assign_properties(node, assignment.get("values", {}))
 
     # Prune empty facet nodes
     filtered_nodes: List[Dict[str, Any]] = []
@@ -212,9 +465,13 @@ def _build_deterministic_graph(
         for node in filtered_nodes:
             facets = node.get("uco-core:hasFacet")
             if facets:
-                node["uco-core:hasFacet"] = [ref for ref in facets if ref.get("@id") not in empty_facets]
+                kept_refs = [ref for ref in facets if ref.get("@id") not in empty_facets]
+                if kept_refs:
+                    node["uco-core:hasFacet"] = kept_refs
+                else:
+                    del node["uco-core:hasFacet"]
 
-    return {"@context": DEFAULT_CONTEXT, "@graph": filtered_nodes}
+    return {"@context": dict(CASE_UCO_CONTEXT), "@graph": filtered_nodes}
 
 
 def graph_generator_node(state: State) -> dict:
@@ -267,56 +524,7 @@ def graph_generator_node(state: State) -> dict:
 
     # --- Build Skeleton Graph ---
     print("[INFO] [Graph Generator] Building skeleton graph from plan...")
-    skeleton_graph = {"@graph": []}
-    nodes_by_id = {}
-    if uuid_plan and slot_type_map:
-        included_records = []
-        for record_plan in uuid_plan:
-            primary_slug = None
-            for slot_slug in record_plan.keys():
-                lower_slug = slot_slug.lower()
-                if "facet" in lower_slug or "relationship" in lower_slug:
-                    continue
-                primary_slug = slot_slug
-                break
-            if primary_slug is None and record_plan:
-                primary_slug = next(iter(record_plan))
-            included_slots = []
-            for slot_slug, slot_uuid in record_plan.items():
-                slot_type = slot_type_map.get(slot_uuid, "uco-core:UcoObject")
-                include_slot = True
-                if slot_slug != primary_slug:
-                    lower_slug = slot_slug.lower()
-                    payload = source_properties.get(slot_uuid, {}) if isinstance(source_properties, dict) else {}
-                    slot_type_lower = slot_type.lower() if isinstance(slot_type, str) else ""
-                    if "relationship" in lower_slug or slot_type_lower.endswith("relationship"):
-                        include_slot = bool(payload.get("properties") or payload.get("raw"))
-                    elif "facet" in lower_slug:
-                        include_slot = True
-                if not include_slot:
-                    continue
-                node = {
-                    "@id": slot_uuid,
-                    "@type": slot_type
-                }
-                skeleton_graph["@graph"].append(node)
-                nodes_by_id[slot_uuid] = node
-                included_slots.append((slot_slug, slot_uuid))
-            included_records.append((primary_slug, included_slots))
-
-        for primary_slug, slots in included_records:
-            primary_uuid = None
-            facet_refs = []
-            for slot_slug, slot_uuid in slots:
-                lower_slug = slot_slug.lower()
-                if slot_slug == primary_slug:
-                    primary_uuid = slot_uuid
-                elif "facet" in lower_slug:
-                    facet_refs.append({"@id": slot_uuid})
-            if primary_uuid and facet_refs:
-                parent_node = nodes_by_id.get(primary_uuid)
-                if parent_node:
-                    parent_node["uco-core:hasFacet"] = facet_refs
+    skeleton_graph = build_skeleton(uuid_plan, slot_type_map, source_properties)
 
     json_obj = None
     used_llm = False
@@ -335,65 +543,90 @@ def graph_generator_node(state: State) -> dict:
             error_feedback = f"\n\nPREVIOUS ERRORS TO CONSIDER:\n{chr(10).join(graph_errors[-2:])}\n\nPlease fix these issues in your JSON-LD generation."
 
         dynamic_instructions = format_hallucination_instructions(layer2_feedback_history)
-
-        prompt = f"""
-## GRAPH SKELETON (Your starting point):
-Your task is to fill in the properties for each entity in this pre-built graph skeleton based on the other information provided.
-Do NOT add new entities. Do NOT change the @id or @type of existing entities.
-```json
-{json.dumps(skeleton_graph, indent=2)}
-```
-
-## STANDARD ONTOLOGY KEYS (from Agent 1):
-{json.dumps(ontology_map, indent=2)}
-
-## CUSTOM FACETS (from Agent 2):
-{json.dumps(custom_facets, indent=2)}
-
-## SOURCE PROPERTY MAP (directly from evidence fields):
-{json.dumps(source_properties, indent=2)}
-
-## VALIDATION FEEDBACK FOR CORRECTION:
-{validation_feedback}
-
-{error_feedback}
-
-{dynamic_instructions}
-
-## INSTRUCTIONS:
-1. Review the source data and apply every property exactly where indicated.
-2. For each slot in the skeleton, copy the values from SOURCE PROPERTY MAP without renaming keys.
-3. If a facet assignment is provided, add those properties verbatim to that facet node.
-4. Return a single JSON object containing `@context` and `@graph`.
-"""
-
-        try:
-            system_content = GRAPH_GENERATOR_AGENT_PROMPT
-            response = llm.invoke([
-                {"role": "system", "content": system_content},
+        retrying = bool(validation_feedback or graph_errors or layer2_feedback_history)
+        # Shared by every shard and retry: serialise once, substitute per shard
+        ontology_map_json = dumps_json(ontology_map)
+        custom_facets_json = dumps_json(custom_facets)
+
+        def shard_request(shard, shard_feedback: str = "") -> tuple:
+            shard_skeleton, shard_sources = shard
+            targets = _fill_targets(shard_skeleton["@graph"], ontology_map, custom_facets)
+            prompt = _GENERATOR_PROMPT_TEMPLATE.substitute(
+                skeleton=dumps_json(targets),
+                ontology_map=ontology_map_json,
+                custom_facets=custom_facets_json,
+                source_properties=dumps_json(shard_sources),
+                validation_feedback="\n".join(filter(None, (validation_feedback, shard_feedback))),
+                error_feedback=error_feedback,
+                dynamic_instructions=dynamic_instructions,
+            )
+            system_prompt = GRAPH_GENERATOR_AGENT_PROMPT
+            if retrying or shard_feedback:
+                # Examples only after a rejection, chosen by the shard's node types
+                shard_types = [node.get("@type", "") for node in shard_skeleton["@graph"]]
+                system_prompt = f"{system_prompt}\n\n{_retry_examples(shard_types)}"
+            messages = [
+                {"role": "system", "content": system_prompt},
                 {"role": "user", "content": prompt},
-            ])
-
-            graph_out = response.content
+            ]
+            # Constrain decoding to the fill schema so the reply cannot carry unplanned nodes or nulls;
+            # strict mode where the schema can be spelled out, so the reply always parses
+            strict_schema = _strict_fill_schema(targets)
+            response_format = {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": "graph_property_fill",
+                    "schema": strict_schema or _fill_schema(targets),
+                    "strict": strict_schema is not None,
+                },
+            }
+            return targets, messages, response_format
+
+        async def generate_shard(shard, shard_feedback: str = "") -> dict:
+            targets, messages, response_format = shard_request(shard, shard_feedback)
+            # Escalate to the stronger model only once an attempt has been rejected
+            shard_llm = strong_llm if retrying or shard_feedback else llm
+            response = await ainvoke_llm(shard_llm.bind(response_format=response_format), messages)
+            return _parse_fill_reply(response.content, targets)
+
+        async def generate_checked_shard(shard, shard_slots: asyncio.Semaphore) -> dict:
+            # Check each shard as soon as it lands and regenerate it once with the
+            # offending nodes, while the remaining shards are still generating.
+            async with shard_slots:
+                llm_json_obj = await generate_shard(shard)
+            violations = _shard_violations(shard[0], llm_json_obj)
+            if not violations:
+                return llm_json_obj
+            print(f"[WARNING] [Graph Generator] Shard failed {len(violations)} hard-fail check(s); regenerating it.")
+            async with shard_slots:
+                return await generate_shard(shard, "Fix these problems from the previous attempt:\n" + "\n".join(violations[:10]))
+
+        async def generate_all_shards(shards) -> list:
+            shard_slots = asyncio.Semaphore(_MAX_PARALLEL_SHARDS)
+            return await asyncio.gather(*(generate_checked_shard(shard, shard_slots) for shard in shards))
 
-            json_obj = None
-            m = re.search(r"```(?:json)?\s*(\{.*?\})\s*```", graph_out, re.DOTALL)
-            if m:
-                json_content = m.group(1).strip()
+        try:
+            shards = _shard_skeleton(skeleton_graph, uuid_plan, source_properties)
+            if len(shards) > 1:
+                print(f"[INFO] [Graph Generator] Generating {len(uuid_plan)} records in {len(shards)} concurrent shards...")
+            if LLM_BATCH_MODE:
+                # Shard checks are left to the validator here; a retry would mean another batch job
+                requests = [shard_request(shard) for shard in shards]
+                replies = run_chat_batch([
+                    {"model": (strong_llm if retrying else llm).model_name, "temperature": llm.temperature, "seed": llm.seed,
+                     "messages": messages, "response_format": response_format}
+                    for _, messages, response_format in requests
+                ])
+                shard_outputs = [_parse_fill_reply(reply, targets) for reply, (targets, _, _) in zip(replies, requests)]
             else:
-                json_content = graph_out.strip()
-
-            if not json_content:
-                raise ValueError("Empty JSON content received from LLM")
-
-            llm_json_obj = json.loads(json_content)
-            json_obj = _merge_llm_output_into_skeleton(skeleton_graph, llm_json_obj)
+                shard_outputs = run_llm_coroutine(generate_all_shards(shards))
 
-            if "@context" not in json_obj:
-                json_obj["@context"] = DEFAULT_CONTEXT
+            json_obj = skeleton_graph
+            for llm_json_obj in shard_outputs:
+                json_obj = _merge_llm_output_into_skeleton(json_obj, llm_json_obj)
 
-            if "@context" not in json_obj or "@graph" not in json_obj:
-                raise ValueError("Invalid JSON-LD structure: missing @context or @graph")
+            if "@graph" not in json_obj:
+                raise ValueError("Invalid JSON-LD structure: missing @graph")
 
             print(
                 f"[SUCCESS] [Graph Generator] Successfully generated JSON-LD with {len(json_obj.get('@graph', []))} entities")
@@ -414,8 +647,8 @@ Do NOT add new entities. Do NOT change the @id or @type of existing entities.
         for feedback in layer2_feedback_history:
             json_obj = correction_agent.apply_corrections(json_obj, feedback, original_input)
 
-    if "@context" not in json_obj:
-        json_obj["@context"] = DEFAULT_CONTEXT
+    # The context is fixed; splice it here rather than trusting whatever the LLM echoed
+    json_obj["@context"] = dict(CASE_UCO_CONTEXT)
 
     # Final cleanup step to enforce property placement
     try:
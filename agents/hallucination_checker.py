@@ -1,14 +1,14 @@
-import json
-import re
 from typing import Literal
 
 from langchain_core.messages import HumanMessage
-from langchain_openai import ChatOpenAI
 
 # --- Custom Module Imports ---
 from state import State
 from schemas import ForensicHallucinationDetectionResult
-from utils import _get_input_artifacts, _msg_text
+from config import deterministic_llm, invoke_llm
+from agents.uuid_planner import _extract_records
+from tools import _generate_record_fingerprint
+from utils import _get_input_artifacts, _msg_text, extract_first_json, dumps_json
 
 class FeedbackProcessingAgent:
     """A class to dynamically process hallucination feedback into actionable instructions."""
@@ -31,7 +31,7 @@ Create clear, specific instructions to prevent these issues from recurring. Focu
 4. How to validate against original input
 
 Return only the direct and specific instructions."""
-        response = self.llm.invoke(analysis_prompt)
+        response = invoke_llm(self.llm, analysis_prompt)
         return response.content
 
 class DynamicCorrectionAgent:
@@ -47,7 +47,7 @@ Original Input (The only source of truth):
 {original_input}
 
 Current JSON-LD:
-{json.dumps(json_obj, indent=2)}
+{dumps_json(json_obj)}
 
 Hallucination Feedback:
 {feedback}
@@ -59,14 +59,10 @@ Instructions:
 4. Do not add any new fabricated data.
 
 Return only the corrected JSON-LD in a valid JSON format."""
-        response = self.llm.invoke(correction_prompt)
+        response = invoke_llm(self.llm, correction_prompt)
         try:
-            match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', response.content, re.DOTALL)
-            if match:
-                return json.loads(match.group(1))
-            else:
-                return json.loads(response.content)
-        except json.JSONDecodeError:
+            return extract_first_json(response.content, "{")
+        except ValueError:
             print("[WARNING] [Dynamic Correction] Could not parse corrected JSON, returning original object.")
             return json_obj
 
@@ -74,7 +70,7 @@ class ForensicHallucinationDetectionAgent:
     """LLM Agent that detects hallucinations in forensic JSON-LD output."""
 
     def __init__(self):
-        self.llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+        self.llm = deterministic_llm
         self.structured_llm = self.llm.with_structured_output(
             ForensicHallucinationDetectionResult,
             method="function_calling"
@@ -100,7 +96,7 @@ USER QUERY:
 GENERATED JSON-LD OUTPUT:
 {generated_output}"""
         try:
-            result = self.structured_llm.invoke(prompt)
+            result = invoke_llm(self.structured_llm, prompt)
             print(f"[SUCCESS] [Hallucination Agent] Analysis complete: {result.validation_decision}")
             return result
         except Exception as e:
@@ -117,6 +113,81 @@ GENERATED JSON-LD OUTPUT:
 
 hallucination_agent = ForensicHallucinationDetectionAgent()
 
+
+def _leaf_text(value) -> str:
+    """Comparable text for a scalar: JSON spelling for booleans, the exact string otherwise."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _input_leaf_texts(value, found: set) -> set:
+    """Every scalar value in the raw input, as comparable text."""
+    if isinstance(value, dict):
+        for item in value.values():
+            _input_leaf_texts(item, found)
+    elif isinstance(value, list):
+        for item in value:
+            _input_leaf_texts(item, found)
+    elif value is not None:
+        found.add(_leaf_text(value))
+    return found
+
+
+def _untraceable_values(graph_nodes: list, raw_input, uuid_plan: list, record_fingerprints: list, source_map: dict = None):
+    """
+    Output values that do not appear verbatim in the record their node was planned for, as
+    'node/property' paths. A property the planner mapped from a source field must carry that
+    field's value. Keywords (@id, @type, ...) and facet links are structure, not data, and are
+    skipped. Returns None when a node carrying data cannot be attributed to a planned record.
+    """
+    if not uuid_plan or len(uuid_plan) != len(record_fingerprints or ()):
+        return None
+    records_by_fingerprint = {_generate_record_fingerprint(rec): rec for rec in _extract_records(raw_input)}
+    record_texts = []
+    for fingerprint in record_fingerprints:
+        if fingerprint not in records_by_fingerprint:
+            return None
+        record_texts.append(_input_leaf_texts(records_by_fingerprint[fingerprint], set()))
+
+    # slot uuid -> indexes of the records whose plan row holds it (shared facets hold several)
+    slot_records = {}
+    for index, plan_row in enumerate(uuid_plan):
+        for slot_uuid in plan_row.values():
+            slot_records.setdefault(slot_uuid, []).append(index)
+    sources = source_map if isinstance(source_map, dict) else {}
+    untraceable = []
+
+    def walk(value, path, allowed):
+        if isinstance(value, dict):
+            if "@value" in value:
+                walk(value["@value"], path, allowed)
+                return
+            for key, item in value.items():
+                if not key.startswith("@"):
+                    walk(item, f"{path}/{key}", allowed)
+        elif isinstance(value, list):
+            for item in value:
+                walk(item, path, allowed)
+        elif value is not None and _leaf_text(value) not in allowed:
+            untraceable.append(path)
+
+    for node in graph_nodes:
+        data_keys = [key for key in node if not key.startswith("@") and key != "uco-core:hasFacet"]
+        if not data_keys:
+            continue
+        node_id = str(node.get("@id", ""))
+        slot_uuid = node_id if node_id in slot_records else node_id[-36:]
+        if slot_uuid not in slot_records:
+            return None
+        # A shared slot's values must be present in every record that shares it
+        allowed = set.intersection(*(record_texts[index] for index in slot_records[slot_uuid]))
+        mapped = (sources.get(slot_uuid) or {}).get("properties") or {}
+        for key in data_keys:
+            key_allowed = _input_leaf_texts(mapped[key], set()) if key in mapped else allowed
+            walk(node[key], f"{node_id}/{key}", key_allowed)
+    return untraceable
+
 def hallucination_check_node(state: State) -> dict:
     """
     Performs Layer 2 validation for data hallucinations with a learning system.
@@ -135,18 +206,45 @@ def hallucination_check_node(state: State) -> dict:
         return {"use_fallback_result": True, "layer2_final_status": "FAILED_WITH_LEARNING"}
 
     input_artifacts = _get_input_artifacts(state)
-    generated_output = json.dumps(state.get("jsonldGraph", {}))
+    generated_output = dumps_json(state.get("jsonldGraph", {}), indent=False)
     user_query = _msg_text(state.get("messages", [])) or _get_input_artifacts(state) or "Analyze the provided forensic artifacts."
 
     if not generated_output or generated_output == '{}':
         print("[ERROR] [Hallucination Check] No generated output found to check.")
         return {}
 
-    result = hallucination_agent.detect_hallucinations(
-        input_artifacts=input_artifacts,
-        generated_output=generated_output,
-        user_query=user_query
-    )
+    # Values copied verbatim from a node's own input record cannot be fabricated; only call
+    # the LLM when some output value has no exact counterpart there, or a node has no record.
+    raw_input = state.get("rawInputJSON")
+    graph_nodes = (state.get("jsonldGraph") or {}).get("@graph")
+    untraceable = None
+    if isinstance(raw_input, (dict, list)) and isinstance(graph_nodes, list):
+        untraceable = _untraceable_values(
+            graph_nodes,
+            raw_input,
+            state.get("uuidPlan"),
+            state.get("recordFingerprints"),
+            state.get("sourcePropertyMap"),
+        )
+    if untraceable == []:
+        print("[SUCCESS] [Hallucination Check] Every output value appears in its source record; skipping the LLM check.")
+        result = ForensicHallucinationDetectionResult(
+            hallucinations_detected="no",
+            forensic_fidelity="yes",
+            data_integrity="yes",
+            confidence_score=1.0,
+            validation_decision="PASS",
+            hallucination_details="All output values match their source record's values exactly.",
+            corrections_needed="",
+        )
+    else:
+        if untraceable:
+            print(f"[INFO] [Hallucination Check] {len(untraceable)} values not found verbatim in their source record; asking the LLM.")
+        result = hallucination_agent.detect_hallucinations(
+            input_artifacts=input_artifacts,
+            generated_output=generated_output,
+            user_query=user_query
+        )
 
     is_clean = result.hallucinations_detected == "no"
 
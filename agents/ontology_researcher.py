@@ -1,17 +1,35 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
 from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_openai import ChatOpenAI
 
 # --- Custom Module Imports ---
 # These are assumed to be in your project structure.
 from state import State
 from tools import (
     analyze_case_uco_class,
+    analyze_case_uco_classes_batch,
     list_case_uco_classes,
+    list_case_uco_classes_batch,
     analyze_case_uco_facets,
     analyze_case_uco_relationships,
     generate_uuid,
+    _get_case_uco_analyzer,
+)
+from config import (
+    llm,
+    deterministic_llm,
+    invoke_llm,
+    ONTOLOGY_RESEARCH_AGENT_PROMPT,
+    RESEARCH_CACHE_PATH,
+    RESEARCH_CACHE_TTL_SECONDS,
 )
-from config import llm, ONTOLOGY_RESEARCH_AGENT_PROMPT
+from utils import input_shape_key
 
 # =============================================================================
 # Agent Setup
@@ -19,6 +37,8 @@ from config import llm, ONTOLOGY_RESEARCH_AGENT_PROMPT
 
 # Define the set of tools available to this agent for ontology research.
 ontology_tools = [
+    list_case_uco_classes_batch,
+    analyze_case_uco_classes_batch,
     list_case_uco_classes,
     analyze_case_uco_class,
     analyze_case_uco_facets,
@@ -31,9 +51,125 @@ ontology_research_llm = llm.bind_tools(ontology_tools)
 
 # Define other LLM configurations if they are specific to this agent module.
 # These seem to be used for tasks outside the primary ReAct agent loop.
-custom_facet_llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+custom_facet_llm = deterministic_llm
 graph_generator_llm = llm.bind_tools([generate_uuid])
 
+# Dedicated pool for tool dispatch so one turn's ontology lookups run side by side
+_TOOL_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="uco-tool")
+_TOOLS_BY_NAME = {tool.name: tool for tool in ontology_tools}
+
+
+def _run_tool(tool_name: str, tool_args: dict) -> str:
+    """Invoke one requested tool, returning an error string instead of raising."""
+    print(f"[INFO] [Tool Call] {tool_name}({tool_args})")
+    tool = _TOOLS_BY_NAME.get(tool_name)
+    if tool is None:
+        tool_result = f"Tool {tool_name} not found"
+        print(f"[ERROR] [Tool Missing] {tool_result}")
+        return tool_result
+    try:
+        tool_result = tool.invoke(tool_args)
+        print(f"[SUCCESS] [Tool Result] {tool_name} returned {len(str(tool_result))} characters")
+    except Exception as exc:
+        tool_result = f"Error executing {tool_name}: {exc}"
+        print(f"[ERROR] [Tool Error] {tool_result}")
+    return tool_result
+
+
+# Research reports keyed by the shape of the structured input (keys and value
+# types only) plus its artifact type, description and source, which the research
+# LLM also reads. Inputs with the same schema and metadata map to the same classes
+# and facets, so the tool-calling loop runs once per kind of input; the synthesizer
+# still derives unmapped fields and values from the current input.
+_RESEARCH_CACHE_SIZE = 256
+_research_cache: "OrderedDict[str, str]" = OrderedDict()
+_research_lock = threading.Lock()
+_RESEARCH_TABLE_SQL = (
+    "CREATE TABLE IF NOT EXISTS research_cache (shape_key TEXT PRIMARY KEY, report TEXT, created_at REAL)"
+)
+
+
+# Labels services.py prepends to the user message for non-CSV input, by metadata key
+_METADATA_LABELS = {"Artifact Type": "artifact_type", "Description": "description", "Source": "source"}
+
+
+def _input_metadata(raw_input, input_text: str) -> dict:
+    """
+    The artifact type, description and source the researcher reads alongside the data:
+    from the payload when it carries them (wrapped CSV), else from the message header.
+    """
+    metadata = {}
+    if isinstance(raw_input, dict):
+        metadata = {key: raw_input[key] for key in _METADATA_LABELS.values() if isinstance(raw_input.get(key), str)}
+    if not metadata:
+        for line in input_text.split("\n\n", 1)[0].splitlines():
+            label, separator, value = line.partition(": ")
+            if separator and label in _METADATA_LABELS:
+                metadata[_METADATA_LABELS[label]] = value.strip()
+    return metadata
+
+
+def research_cache_key(raw_input, input_text: str = "") -> str:
+    """Input schema hash plus the metadata values, which the schema hash strips but the report depends on."""
+    metadata = json.dumps(_input_metadata(raw_input, input_text), sort_keys=True)
+    metadata_key = hashlib.blake2b(metadata.encode("utf-8"), digest_size=8).hexdigest()
+    return f"{input_shape_key(raw_input)}-{metadata_key}"
+
+
+def _disk_research(shape_key: str):
+    """Return a report from the persistent cache if present and younger than the TTL."""
+    if not RESEARCH_CACHE_PATH:
+        return None
+    try:
+        with sqlite3.connect(RESEARCH_CACHE_PATH) as conn:
+            conn.execute(_RESEARCH_TABLE_SQL)
+            row = conn.execute(
+                "SELECT report FROM research_cache WHERE shape_key = ? AND created_at > ?",
+                (shape_key, time.time() - RESEARCH_CACHE_TTL_SECONDS),
+            ).fetchone()
+    except sqlite3.Error as exc:
+        print(f"[WARNING] [Ontology Researcher] Research cache read failed: {exc}")
+        return None
+    return row[0] if row else None
+
+
+def _cached_research(shape_key: str):
+    """Return the cached report for an input shape, marking it most recently used."""
+    with _research_lock:
+        report = _research_cache.get(shape_key)
+        if report is not None:
+            _research_cache.move_to_end(shape_key)
+            return report
+    report = _disk_research(shape_key)
+    if report is not None:
+        _remember_research(shape_key, report)
+    return report
+
+
+def _remember_research(shape_key: str, report: str) -> None:
+    """Keep a report in the in-process LRU, evicting beyond the size cap."""
+    with _research_lock:
+        _research_cache[shape_key] = report
+        _research_cache.move_to_end(shape_key)
+        while len(_research_cache) > _RESEARCH_CACHE_SIZE:
+            _research_cache.popitem(last=False)
+
+
+def _store_research(shape_key: str, report: str) -> None:
+    """Cache a report in memory and, when enabled, on disk for later runs."""
+    _remember_research(shape_key, report)
+    if not RESEARCH_CACHE_PATH:
+        return
+    try:
+        with sqlite3.connect(RESEARCH_CACHE_PATH) as conn:
+            conn.execute(_RESEARCH_TABLE_SQL)
+            conn.execute(
+                "INSERT OR REPLACE INTO research_cache (shape_key, report, created_at) VALUES (?, ?, ?)",
+                (shape_key, report, time.time()),
+            )
+    except sqlite3.Error as exc:
+        print(f"[WARNING] [Ontology Researcher] Research cache write failed: {exc}")
+
 # =============================================================================
 # Agent Node Function
 # =============================================================================
@@ -67,8 +203,22 @@ def ontology_research_step_node(state: State) -> dict:
         return {"messages": [HumanMessage(
                 content=error_message, name="ontology_research_agent")]}
 
+    raw_input = state.get("rawInputJSON")
+    shape_key = research_cache_key(raw_input, input_text) if isinstance(raw_input, (dict, list)) else None
+    cached_report = _cached_research(shape_key) if shape_key else None
+    if cached_report is not None:
+        print("[INFO] [Ontology Researcher] Input schema seen before; reusing cached research report.")
+        return {
+            "ontologyMarkdown": cached_report,
+            "messages": [HumanMessage(content="Ontology research reused from a matching input schema.", name="ontology_research_agent")],
+        }
+
     print(f"[INFO] [Ontology Researcher] Mapping standard ontology for: {input_text[:60]}...")
 
+    # Load the CASE/UCO ontologies while the first LLM turn decides which tools to call;
+    # the tools wait on the same lock, and a failed load is retried and reported by them.
+    _TOOL_POOL.submit(_get_case_uco_analyzer)
+
     # --- Direct LLM with Tool Calling ---
     # Create messages with system prompt and user input
     all_messages = [
@@ -81,7 +231,7 @@ def ontology_research_step_node(state: State) -> dict:
     final_response = None
 
     for _ in range(max_iterations):
-        response = ontology_research_llm.invoke(all_messages)
+        response = invoke_llm(ontology_research_llm, all_messages)
         all_messages.append(response)
 
         tool_calls = getattr(response, "tool_calls", None) or []
@@ -92,30 +242,17 @@ def ontology_research_step_node(state: State) -> dict:
 
             from langchain_core.messages import ToolMessage
 
-            for tool_call in tool_calls:
-                tool_name = getattr(tool_call, "name", None) or tool_call.get("name")
-                tool_args = getattr(tool_call, "args", None) or tool_call.get("args") or {}
-                tool_id = getattr(tool_call, "id", None) or tool_call.get("id")
-
-                print(f"[INFO] [Tool Call] {tool_name}({tool_args})")
-
-                tool_result = None
-                for tool in ontology_tools:
-                    if tool.name == tool_name:
-                        try:
-                            tool_result = tool.invoke(tool_args)
-                            print(
-                                f"[SUCCESS] [Tool Result] {tool_name} returned {len(str(tool_result))} characters"
-                            )
-                        except Exception as exc:
-                            tool_result = f"Error executing {tool_name}: {exc}"
-                            print(f"[ERROR] [Tool Error] {tool_result}")
-                        break
-
-                if tool_result is None:
-                    tool_result = f"Tool {tool_name} not found"
-                    print(f"[ERROR] [Tool Missing] {tool_result}")
-
+            # Run this turn's tool calls concurrently; results are appended in call order.
+            calls = [
+                (
+                    getattr(tool_call, "name", None) or tool_call.get("name"),
+                    getattr(tool_call, "args", None) or tool_call.get("args") or {},
+                    getattr(tool_call, "id", None) or tool_call.get("id"),
+                )
+                for tool_call in tool_calls
+            ]
+            results = list(_TOOL_POOL.map(lambda call: _run_tool(call[0], call[1]), calls))
+            for (_, _, tool_id), tool_result in zip(calls, results):
                 all_messages.append(
                     ToolMessage(content=str(tool_result), tool_call_id=tool_id)
                 )
@@ -128,8 +265,9 @@ def ontology_research_step_node(state: State) -> dict:
             all_messages.append(
                 HumanMessage(
                     content=(
-                        "You have not called any tools yet. Respond ONLY with 4-6 "
-                        "list_case_uco_classes tool calls before providing any report."
+                        "You have not called any tools yet. Respond ONLY with one "
+                        "list_case_uco_classes_batch tool call covering your full keyword bank "
+                        "before providing any report."
                     )
                 )
             )
@@ -158,11 +296,13 @@ def ontology_research_step_node(state: State) -> dict:
                 )
             )
         )
-        final_response = ontology_research_llm.invoke(all_messages)
+        final_response = invoke_llm(ontology_research_llm, all_messages)
 
     agent_output = final_response.content if hasattr(final_response, "content") else str(final_response)
 
     print("[SUCCESS] [Ontology Researcher] Research complete, returning markdown report.")
+    if shape_key and agent_output.strip():
+        _store_research(shape_key, agent_output)
 
     # Update the state with the final markdown report.
     return {
@@ -2,7 +2,7 @@ import json
 import re
 from typing import Dict
 from langchain_core.messages import HumanMessage
-from config import llm
+from config import llm, invoke_llm
 from state import State
 from schemas import OntologyAnalysis
 from utils import _get_input_artifacts
@@ -227,7 +227,7 @@ def ontology_synthesis_node(state: State) -> dict:
 
     try:
         # Invoke the structured LLM to get the Pydantic object directly
-        synthesis_result = structured_llm.invoke([
+        synthesis_result = invoke_llm(structured_llm, [
             HumanMessage(content=SYNTHESIS_PROMPT),
             HumanMessage(content=prompt)
         ])
@@ -6,6 +6,7 @@ from langgraph.types import Command
 from state import State
 from schemas import Router
 from memory import update_memory_context
+from result_cache import cached_result
 from config import (
     llm,
     SUPERVISOR_AGENT_PROMPT,
@@ -18,10 +19,16 @@ from config import (
 def supervisor_node(state: State) -> dict:
     """
     This node is a pass-through. The main routing logic is in the
-    `route_supervisor` function in `graph.py`. This node exists to fit
-    the graph structure but performs no action.
+    `route_supervisor` function in `graph.py`. The only action it takes is on
+    the first step of a run: if this exact input was already processed and
+    validated, the cached results are restored so the router ends the workflow.
     """
     print("--- [PASS-THROUGH] Supervisor Node --- ")
+    if not state.get("ontologyMarkdown") and not state.get("jsonldGraph"):
+        cached = cached_result(state)
+        if cached:
+            print("[INFO] [Supervisor] Validated result cached for this input; skipping the agent chain.")
+            return {**cached, "resultFromCache": True}
     # This node no longer makes decisions. It simply allows the graph to proceed
     # to the real router function, `route_supervisor`.
     return {}
@@ -1,5 +1,7 @@
 from collections import OrderedDict
+from functools import lru_cache
 import re
+import sys
 from typing import Dict, Iterable, List, Tuple
 
 from state import State
@@ -76,7 +78,23 @@ def _choose_primary_class(classes: Iterable[str], facets: Iterable[str]) -> str:
 
 def _iri_for(name: str) -> str:
     # Default to CASE/UCO observable namespace when no explicit mapping is available.
-    return f"uco-observable:{name}"
+    # Interned so every record's slot type shares one string object.
+    return sys.intern(f"uco-observable:{name}")
+
+
+@lru_cache(maxsize=256)
+def _slot_layout(primary_class: str, facets: Tuple[str, ...], relationship_types: Tuple[str, ...]):
+    """
+    Interned slot slugs and type IRIs for one ontology shape, shared by every record
+    and by later runs that map to the same class, facets and relationships.
+    """
+    primary_slug = sys.intern(_slugify(primary_class))
+    facet_slots = tuple((sys.intern(_slugify(facet)), _iri_for(facet)) for facet in facets)
+    relationship_slugs = tuple(
+        sys.intern(_slugify(f"relationship_{rel_type}_{rel_idx}"))
+        for rel_idx, rel_type in enumerate(relationship_types)
+    )
+    return primary_slug, _iri_for(primary_class), facet_slots, relationship_slugs, _iri_for("ObservableRelationship")
 
 
 def _normalize_key(name: str) -> str:
@@ -101,15 +119,31 @@ def _prepare_property_index(ontology_properties: Dict[str, List[str]]) -> Dict[s
     return index
 
 
-def _match_property(raw_key: str, owner_property_index: Dict[str, List[Tuple[str, set]]]) -> Tuple[str | None, str | None]:
+def _prepare_property_lookup(owner_property_index: Dict[str, List[Tuple[str, set]]]) -> Dict[str, Tuple[int, str, str]]:
+    """Map each lower-cased property name to its first (position, owner_slug, prop) in the index."""
+    lookup: Dict[str, Tuple[int, str, str]] = {}
+    position = 0
+    for owner_slug, entries in owner_property_index.items():
+        for prop, _ in entries:
+            lookup.setdefault(prop.lower(), (position, owner_slug, prop))
+            position += 1
+    return lookup
+
+
+def _match_property(
+    raw_key: str,
+    owner_property_index: Dict[str, List[Tuple[str, set]]],
+    property_lookup: Dict[str, Tuple[int, str, str]] | None = None,
+) -> Tuple[str | None, str | None]:
     alias_candidates = PROPERTY_ALIAS_MAP.get(raw_key)
     if alias_candidates:
-        for owner_slug, entries in owner_property_index.items():
-            for prop, _ in entries:
-                if prop in alias_candidates:
-                    return owner_slug, prop
-                if prop.lower() in [alias.lower() for alias in alias_candidates]:
-                    return owner_slug, prop
+        if property_lookup is None:
+            property_lookup = _prepare_property_lookup(owner_property_index)
+        # The earliest indexed property matching any alias wins, as with a linear scan.
+        hits = [property_lookup[alias.lower()] for alias in alias_candidates if alias.lower() in property_lookup]
+        if hits:
+            _, owner_slug, prop = min(hits)
+            return owner_slug, prop
 
     raw_tokens = set(_tokenize(raw_key))
     best_score = 0
@@ -136,6 +170,7 @@ def _qualify_property(prop_name: str) -> str:
 def _build_source_property_map(records: List[Dict], plan_rows: List[OrderedDict[str, str]], slot_type_map: Dict[str, str], ontology_map: Dict[str, Dict]) -> Dict[str, Dict[str, Dict]]:
     source_map: Dict[str, Dict[str, Dict]] = {}
     property_index = _prepare_property_index(ontology_map.get("properties", {}))
+    property_lookup = _prepare_property_lookup(property_index)
     property_field_map = (ontology_map.get("additional_details", {}) or {}).get("propertyFieldMap", {})
 
     for record, plan_row in zip(records, plan_rows):
@@ -177,7 +212,7 @@ def _build_source_property_map(records: List[Dict], plan_rows: List[OrderedDict[
         # Fallback heuristic mapping for properties without explicit rows
         for raw_key, value in record.items():
             normalized_key = _normalize_key(raw_key)
-            owner_slug, prop_name = _match_property(normalized_key, property_index)
+            owner_slug, prop_name = _match_property(normalized_key, property_index, property_lookup)
 
             target_slug = owner_slug if owner_slug in slug_to_uuid else primary_slug
             slot_uuid = slug_to_uuid[target_slug]
@@ -191,6 +226,37 @@ def _build_source_property_map(records: List[Dict], plan_rows: List[OrderedDict[
     return source_map
 
 
+def _share_identical_slots(plan_rows: List[OrderedDict[str, str]], slot_type_map: Dict[str, str], source_map: Dict[str, Dict[str, Dict]]) -> int:
+    """
+    Point facet and relationship slots with identical content at one canonical UUID.
+    Rows are rewritten in place and the duplicate slots dropped from both maps.
+    Returns the number of slots that were folded into an earlier one.
+    """
+    canonical: Dict[str, str] = {}
+    shared = 0
+    for plan_row in plan_rows:
+        # The first slot is the record's own object; only the slots hanging off it are shared.
+        for slot_slug in list(plan_row)[1:]:
+            slot_uuid = plan_row[slot_slug]
+            payload = source_map.get(slot_uuid) or {}
+            if not payload.get("properties"):
+                continue
+            content_key = _generate_record_fingerprint({
+                "slug": slot_slug,
+                "type": slot_type_map.get(slot_uuid, ""),
+                "properties": payload["properties"],
+                "raw": payload.get("raw") or {},
+            })
+            canonical_uuid = canonical.setdefault(content_key, slot_uuid)
+            if canonical_uuid == slot_uuid:
+                continue
+            plan_row[slot_slug] = canonical_uuid
+            slot_type_map.pop(slot_uuid, None)
+            source_map.pop(slot_uuid, None)
+            shared += 1
+    return shared
+
+
 def uuid_planner_node(state: State) -> dict:
     """Build a deterministic UUID plan per record using ontology hints."""
     print("[INFO] [UUID Planner] Running incremental planner...")
@@ -224,9 +290,22 @@ def uuid_planner_node(state: State) -> dict:
                 if not owner.lower().endswith("facet"):
                     primary_class = owner
                     break
-    facet_slugs = [_slugify(facet) for facet in ontology_facets]
-
-    current_fingerprints = [_generate_record_fingerprint(rec) for rec in records]
+    # Slugs and type IRIs are identical across records; build them once and share them.
+    primary_slug, primary_type, facet_slots, relationship_slugs, relationship_type = _slot_layout(
+        primary_class,
+        tuple(ontology_facets),
+        tuple(rel.get("type") or "relatedTo" for rel in relationships),
+    )
+
+    # Records are content-addressed: identical records would get identical UUIDs and
+    # duplicate @ids in the graph, so each distinct record is planned only once.
+    unique_records: OrderedDict[str, Dict] = OrderedDict()
+    for rec in records:
+        unique_records.setdefault(_generate_record_fingerprint(rec), rec)
+    if len(unique_records) < len(records):
+        print(f"[INFO] [UUID Planner] Collapsed {len(records) - len(unique_records)} duplicate records.")
+    records = list(unique_records.values())
+    current_fingerprints = list(unique_records.keys())
     old_plan_map = {fp: plan for fp, plan in zip(previous_fingerprints, previous_plan)}
 
     new_plan: List[OrderedDict[str, str]] = []
@@ -245,24 +324,21 @@ def uuid_planner_node(state: State) -> dict:
         plan_row: "OrderedDict[str, str]" = OrderedDict()
 
         # Always create a primary object node so downstream generators have a root.
-        primary_slug = _slugify(primary_class)
         primary_uuid = _uuid5(NS_SLOT, f"{record_uuid}:{primary_slug}")
         plan_row[primary_slug] = primary_uuid
-        new_map[primary_uuid] = _iri_for(primary_class)
+        new_map[primary_uuid] = primary_type
 
         # Add one slot per facet advertised by the ontology map.
-        for facet_name, facet_slug in zip(ontology_facets, facet_slugs):
+        for facet_slug, facet_type in facet_slots:
             facet_uuid = _uuid5(NS_SLOT, f"{record_uuid}:{facet_slug}")
             plan_row[facet_slug] = facet_uuid
-            new_map[facet_uuid] = _iri_for(facet_name)
+            new_map[facet_uuid] = facet_type
 
         # Relationships (if any) get their own deterministic IDs per record.
-        for rel_idx, rel in enumerate(relationships):
-            kind = rel.get("type") or "relatedTo"
-            rel_slug = _slugify(f"relationship_{kind}_{rel_idx}")
+        for rel_slug in relationship_slugs:
             rel_uuid = _uuid5(NS_SLOT, f"{record_uuid}:{rel_slug}")
             plan_row[rel_slug] = rel_uuid
-            new_map[rel_uuid] = _iri_for("ObservableRelationship")
+            new_map[rel_uuid] = relationship_type
 
         new_plan.append(plan_row)
 
@@ -273,6 +349,9 @@ def uuid_planner_node(state: State) -> dict:
                 new_map[slot_uuid] = previous_map[slot_uuid]
 
     source_property_map = _build_source_property_map(records, new_plan, new_map, ontology_map)
+    shared_slots = _share_identical_slots(new_plan, new_map, source_property_map)
+    if shared_slots:
+        print(f"[INFO] [UUID Planner] Shared {shared_slots} facet/relationship slots with identical content.")
 
     print(f"[SUCCESS] [UUID Planner] Generated plan for {len(new_plan)} records.")
 
@@ -291,13 +370,30 @@ def invalidate_uuid_plan_node(state: State) -> dict:
     uuids_to_invalidate = state.get("uuids_to_invalidate")
     if uuids_to_invalidate:
         print(f"[INFO] [UUID Invalidator] Invalidating parts of UUID plan for: {uuids_to_invalidate}")
-        current_plan = state.get("uuidPlan", [])
-        new_plan = [plan for plan in current_plan if not any(uuid in plan.values() for uuid in uuids_to_invalidate)]
-        
+        current_plan = state.get("uuidPlan") or []
+        current_fingerprints = state.get("recordFingerprints") or []
+        if len(current_fingerprints) != len(current_plan):
+            print("[WARNING] [UUID Invalidator] Plan and fingerprints are out of step; invalidating entire UUID plan.")
+            return {"uuidPlan": None, "slotTypeMap": None, "recordFingerprints": None, "uuids_to_invalidate": None}
+
+        # Fingerprints are filtered in lockstep so the planner re-pairs each kept row with its own record
+        kept = [
+            (fingerprint, plan)
+            for fingerprint, plan in zip(current_fingerprints, current_plan)
+            if not any(uuid in plan.values() for uuid in uuids_to_invalidate)
+        ]
+        new_fingerprints = [fingerprint for fingerprint, _ in kept]
+        new_plan = [plan for _, plan in kept]
+
         current_map = state.get("slotTypeMap", {})
         new_map = {k: v for k, v in current_map.items() if k not in uuids_to_invalidate}
 
-        return {"uuidPlan": new_plan, "slotTypeMap": new_map, "uuids_to_invalidate": None}
+        return {
+            "uuidPlan": new_plan,
+            "slotTypeMap": new_map,
+            "recordFingerprints": new_fingerprints,
+            "uuids_to_invalidate": None,
+        }
     else:
         print("[INFO] [UUID Invalidator] Invalidating entire UUID plan due to general ID-related feedback.")
         return {"uuidPlan": None, "slotTypeMap": None, "recordFingerprints": None}
@@ -1,19 +1,295 @@
-import json
+import hashlib
 import re
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
 from datetime import datetime
 from typing import Literal
 
+from jsonschema import Draft7Validator
 from langchain_core.messages import HumanMessage
 
 # --- Custom Module Imports ---
 from state import State
 from config import llm, MAX_VALIDATION_ATTEMPTS
-from utils import RE_FENCED_JSON
+from utils import RE_FENCED_JSON, dumps_json, stream_jsonld, build_facet_placement, facet_for_property
 from tools import validate_case_jsonld
+# =============================================================================
+# Programmatic Checks
+# =============================================================================
+
+# Structural shape every generated graph must have. Compiled once at import
+# and reused across validation retries.
+_JSONLD_GRAPH_SCHEMA = {
+    "type": "object",
+    "required": ["@context", "@graph"],
+    "properties": {
+        "@context": {"type": "object"},
+        "@graph": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["@id", "@type"],
+                "properties": {
+                    "@id": {"type": "string", "minLength": 1},
+                    "@type": {"type": ["string", "array"]},
+                    "uco-core:hasFacet": {
+                        "type": "array",
+                        "items": {"type": "object", "required": ["@id"]}
+                    }
+                }
+            }
+        }
+    }
+}
+_JSONLD_GRAPH_VALIDATOR = Draft7Validator(_JSONLD_GRAPH_SCHEMA)
+
+# Layer 1 verdicts keyed by a digest of (graph, ontology map); retries often regenerate the same graph
+_VERDICT_CACHE_SIZE = 256
+_verdict_cache: "OrderedDict[bytes, tuple]" = OrderedDict()
+_verdict_lock = threading.Lock()
+_CASE_ERROR_PREFIX = "CASE/UCO validation failed due to error: "
+
+
+def _schema_violations(jsonld_graph: dict) -> list:
+    """Return one message per structural schema violation in the graph."""
+    violations = []
+    for error in _JSONLD_GRAPH_VALIDATOR.iter_errors(jsonld_graph):
+        location = "/".join(str(part) for part in error.absolute_path) or "<root>"
+        violations.append(f"Schema violation at '{location}': {error.message}")
+    return violations
+
+
+# Node ids cited in feedback: planner UUIDs, optionally with a 'kb:<slug>-' prefix
+_NODE_ID_PATTERN = re.compile(
+    r"(?:kb:[a-zA-Z0-9_-]+-)?[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
+)
+
+
+def _extract_node_ids(feedback: str) -> list:
+    """Return the distinct node ids mentioned in the feedback, in first-seen order."""
+    return list(dict.fromkeys(_NODE_ID_PATTERN.findall(feedback)))
+
+
+def _find_duplicate_ids(graph_nodes: list) -> list:
+    """Return each @id that appears on more than one node, in first-seen order."""
+    seen = set()
+    duplicates = {}
+    for node in graph_nodes:
+        node_id = node.get("@id") if isinstance(node, dict) else None
+        if node_id is None:
+            continue
+        if node_id in seen:
+            duplicates[node_id] = None
+        else:
+            seen.add(node_id)
+    return list(duplicates)
+
+_EMPTY_VALUES = (None, "", [], {})
+
+# File attributes the generator prompt reserves for facets; a File node must never carry them,
+# whether or not the ontology map lists a FileFacet property set
+_FILE_FACET_ONLY_KEYS = frozenset(
+    f"uco-observable:{name}"
+    for name in (
+        "fileName", "filePath", "createdTime", "modifiedTime", "accessedTime",
+        "metadataChangeTime", "isDirectory", "sizeInBytes", "extension",
+    )
+)
+_FILE_TYPES = ("uco-observable:File", "observable:File")
+
+
+def _find_empty_values(value, path: str) -> list:
+    """Return the paths of every null, empty-string or empty-collection value."""
+    if isinstance(value, dict):
+        items = value.items()
+    elif isinstance(value, list):
+        items = ((str(index), item) for index, item in enumerate(value))
+    else:
+        return []
+    empty = []
+    for key, item in items:
+        item_path = f"{path}/{key}"
+        if item in _EMPTY_VALUES:
+            empty.append(item_path)
+        else:
+            empty.extend(_find_empty_values(item, item_path))
+    return empty
+
+
+def _curie_prefixes(node: dict):
+    """Yield (prefix, term) for every compact IRI used as a property key or @type in a node, nested values included."""
+    def prefix_of(term):
+        prefix, separator, local = term.partition(":")
+        if separator and prefix and not prefix.startswith("@") and not local.startswith("//"):
+            return prefix
+        return None
+
+    stack = [node]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, list):
+            stack.extend(value)
+            continue
+        if not isinstance(value, dict):
+            continue
+        types = value.get("@type")
+        for term in ([types] if isinstance(types, str) else types if isinstance(types, list) else ()):
+            if isinstance(term, str) and prefix_of(term):
+                yield prefix_of(term), term
+        for key, item in value.items():
+            if not key.startswith("@") and prefix_of(key):
+                yield prefix_of(key), key
+            stack.append(item)
+
+
+def _hard_fail_violations(graph_nodes: list, context=None) -> list:
+    """
+    Return messages for the prompt's mechanical hard-fail conditions: empty values, empty or
+    missing facets, facet-only attributes on a File node and, given the graph's @context,
+    prefixes it does not declare.
+    """
+    violations = []
+    nodes_by_id = {}
+    undeclared = {}
+    for node in graph_nodes:
+        if not isinstance(node, dict):
+            continue
+        nodes_by_id.setdefault(node.get("@id"), node)
+        node_label = node.get("@id") or "<no @id>"
+        for empty_path in _find_empty_values(node, node_label):
+            violations.append(f"Empty or null value at '{empty_path}'; omit unknown properties instead.")
+
+        node_types = node.get("@type")
+        node_types = [node_types] if isinstance(node_types, str) else node_types if isinstance(node_types, list) else []
+        if any(node_type in _FILE_TYPES for node_type in node_types):
+            for key in sorted(_FILE_FACET_ONLY_KEYS.intersection(node)):
+                violations.append(
+                    f"File node '{node_label}' carries '{key}'; move it to the File's FileFacet."
+                )
+
+        if isinstance(context, Mapping):
+            for prefix, term in _curie_prefixes(node):
+                if prefix not in context:
+                    undeclared.setdefault(prefix, (term, node_label))
+
+    for prefix, (term, node_label) in undeclared.items():
+        violations.append(
+            f"Undeclared prefix '{prefix}' in '{term}' on node '{node_label}'; use only the declared prefixes."
+        )
+
+    for node in nodes_by_id.values():
+        for facet_ref in node.get("uco-core:hasFacet") or ():
+            if not isinstance(facet_ref, dict):
+                continue
+            facet = nodes_by_id.get(facet_ref.get("@id"))
+            if facet is None:
+                # Inline facets carry their own properties; only bare links must resolve
+                if set(facet_ref) == {"@id"}:
+                    violations.append(
+                        f"Facet '{facet_ref['@id']}' linked from '{node.get('@id')}' is missing from @graph; "
+                        "emit the facet node or drop its hasFacet link."
+                    )
+            elif not any(key not in ("@id", "@type") for key in facet):
+                violations.append(
+                    f"Facet '{facet['@id']}' linked from '{node.get('@id')}' has no properties; drop the facet node and its hasFacet link."
+                )
+    return violations
+
 # =============================================================================
 # Agent Node Function
 # =============================================================================
 
+def _layer1_checks(jsonld_graph: dict, ontology_map: dict) -> tuple:
+    """
+    Run the programmatic checks and, if they pass, case-utils validation.
+    Returns (feedback_items, case_validation_result, case_conforms).
+    """
+    feedback_items = []
+
+    # --- 1. Dynamic, Programmatic check for misplaced properties ---
+    try:
+        # (class, property) -> owning facet, built once from the ontology map
+        placement = build_facet_placement(ontology_map)
+
+        if placement:
+            for node in jsonld_graph["@graph"]:
+                # Check any node that is NOT a facet itself
+                node_type = node.get("@type", "")
+                if not isinstance(node_type, str) or not node_type.endswith("Facet"):
+                    for node_prop_full in node:
+                        if node_prop_full in ("@id", "@type", "uco-core:hasFacet"):
+                            continue
+                        if facet_for_property(placement, node_type, node_prop_full):
+                            feedback_items.append(
+                                f"Invalid property placement on node '{node.get('@id')}' of type '{node_type}'. "
+                                f"The property '{node_prop_full}' likely belongs on a Facet, not the parent object."
+                            )
+    except Exception as e:
+        feedback_items.append(f"Error during programmatic property placement check: {str(e)}")
+
+
+    # --- 2. Structural JSON-LD shape ---
+    feedback_items.extend(_schema_violations(jsonld_graph))
+
+    # --- 3. Every node must have a unique @id ---
+    for duplicate_id in _find_duplicate_ids(jsonld_graph["@graph"]):
+        feedback_items.append(
+            f"Duplicate @id '{duplicate_id}' appears on more than one node in @graph."
+        )
+
+    # --- 4. Mechanical hard-fail conditions ---
+    feedback_items.extend(_hard_fail_violations(jsonld_graph["@graph"], jsonld_graph.get("@context")))
+
+    # --- 5. External tool validation for basic syntax ---
+    # The graph is going back to the generator anyway; skip the costly SHACL run.
+    if feedback_items:
+        case_validation_result = "Skipped: programmatic checks failed."
+        case_conforms = False
+    else:
+        try:
+            case_validation_result = validate_case_jsonld.invoke({
+                "input_data": stream_jsonld(jsonld_graph.get("@context", {}), jsonld_graph["@graph"]).decode("utf-8"),
+                "case_version": "case-1.4.0"
+            })
+            case_conforms = "Conforms: True" in case_validation_result or "PASSED" in case_validation_result.upper()
+            if not case_conforms:
+                feedback_items.append(f"External case-utils validation failed: {case_validation_result}")
+        except Exception as e:
+            case_validation_result = f"{_CASE_ERROR_PREFIX}{str(e)}"
+            feedback_items.append(case_validation_result)
+            case_conforms = False
+
+    return feedback_items, case_validation_result, case_conforms
+
+
+def _cached_layer1_checks(jsonld_graph: dict, ontology_map: dict) -> tuple:
+    """
+    _layer1_checks() memoised on the graph and ontology map content, so a retry that
+    regenerates an identical graph reuses the verdict instead of re-running SHACL.
+    """
+    verdict_key = hashlib.blake2b(
+        dumps_json([jsonld_graph, ontology_map], indent=False).encode("utf-8"), digest_size=16
+    ).digest()
+    with _verdict_lock:
+        verdict = _verdict_cache.get(verdict_key)
+        if verdict is not None:
+            _verdict_cache.move_to_end(verdict_key)
+    if verdict is not None:
+        print("[INFO] [Validator] Graph unchanged since a previous validation; reusing its verdict.")
+        feedback_items, case_validation_result, case_conforms = verdict
+        return list(feedback_items), case_validation_result, case_conforms
+
+    feedback_items, case_validation_result, case_conforms = _layer1_checks(jsonld_graph, ontology_map)
+    # A case-utils crash may be transient; only deterministic verdicts are kept
+    if not case_validation_result.startswith(_CASE_ERROR_PREFIX):
+        with _verdict_lock:
+            _verdict_cache[verdict_key] = (tuple(feedback_items), case_validation_result, case_conforms)
+            while len(_verdict_cache) > _VERDICT_CACHE_SIZE:
+                _verdict_cache.popitem(last=False)
+    return feedback_items, case_validation_result, case_conforms
+
+
 def validator_node(state: State) -> dict:
     """
     Performs Layer 1 validation on the generated JSON-LD graph.
@@ -37,54 +313,9 @@ def validator_node(state: State) -> dict:
         print("[ERROR] [Validator] No valid JSON-LD graph to validate.")
         return {"validation_feedback": "No valid JSON-LD graph found in state."}
 
-    feedback_items = []
-
-    # --- 1. Dynamic, Programmatic check for misplaced properties ---
-    try:
-        # Get all properties that are defined as belonging to a facet
-        all_facet_properties = set()
-        if isinstance(ontology_map.get("properties"), dict):
-            for owner, props in ontology_map["properties"].items():
-                # Assume an owner is a facet if its name ends with 'Facet'
-                if owner.endswith("Facet"):
-                    all_facet_properties.update(props)
-
-        if all_facet_properties:
-            for node in jsonld_graph["@graph"]:
-                # Check any node that is NOT a facet itself
-                node_type = node.get("@type", "")
-                if not isinstance(node_type, str) or not node_type.endswith("Facet"):
-                    # Find any properties in this node that should belong to a facet
-                    node_props = set(node.keys())
-                    # We need to map from the prompt's property names (e.g., 'filePath') to the graph's (e.g., 'uco-observable:filePath')
-                    # For now, we do a simple substring check as a heuristic.
-                    for facet_prop_base in all_facet_properties:
-                        for node_prop_full in node_props:
-                            if facet_prop_base in node_prop_full:
-                                feedback_items.append(
-                                    f"Invalid property placement on node '{node.get('@id')}' of type '{node_type}'. "
-                                    f"The property '{node_prop_full}' likely belongs on a Facet, not the parent object."
-                                )
-    except Exception as e:
-        feedback_items.append(f"Error during programmatic property placement check: {str(e)}")
-
-
-    # --- 2. External tool validation for basic syntax ---
-    try:
-        case_validation_result = validate_case_jsonld.invoke({
-            "input_data": json.dumps(jsonld_graph, indent=2),
-            "case_version": "case-1.4.0"
-        })
-        case_conforms = "Conforms: True" in case_validation_result or "PASSED" in case_validation_result.upper()
-        if not case_conforms:
-            feedback_items.append(f"External case-utils validation failed: {case_validation_result}")
-    except Exception as e:
-        case_validation_result = f"CASE/UCO validation failed due to error: {str(e)}"
-        feedback_items.append(case_validation_result)
-        case_conforms = False
-
+    feedback_items, case_validation_result, case_conforms = _cached_layer1_checks(jsonld_graph, ontology_map)
 
-    # --- 3. Combine feedback and make a decision ---
+    # --- 6. Combine feedback and make a decision ---
     is_clean = not feedback_items
     final_feedback = "\n".join(feedback_items) if not is_clean else "Layer 1 validation passed."
 
@@ -122,7 +353,7 @@ def validator_node(state: State) -> dict:
         print(f"[FAILURE] [Validator] Layer 1 validation failed: {final_feedback}")
         
         # Extract UUIDs from the feedback string to request partial invalidation
-        uuids_to_invalidate = re.findall(r'kb:[a-zA-Z0-9_-]+-[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}', final_feedback)
+        uuids_to_invalidate = _extract_node_ids(final_feedback)
         
         return_dict = {
             "validation_result": validation_result,
@@ -23,6 +23,50 @@ except ImportError:
     import rdflib
 
 from rdflib import Graph, RDF, RDFS, OWL, Namespace
+from jinja2 import Environment
+
+
+# Compiled once at import; export_to_markdown() only renders.
+_MARKDOWN_REPORT_TEMPLATE = Environment(
+    autoescape=False, trim_blocks=True, lstrip_blocks=True
+).from_string("""\
+# {{ info.name }}
+
+**URI:** `{{ info.uri }}`
+
+**Description:** {{ info.description }}
+
+{% if superclasses.count > 0 %}
+## Superclasses ({{ superclasses.count }})
+
+{% for superclass in superclasses.list %}
+{{ loop.index }}. {{ superclass }}
+{% endfor %}
+
+{% endif %}
+{% if property_groups %}
+## Property Shapes
+
+By the associated SHACL property shapes, instances of {{ class_name }} can have the following properties:
+
+| PROPERTY | PROPERTY TYPE | DESCRIPTION | MIN COUNT | MAX COUNT | LOCAL RANGE | GLOBAL RANGE |
+|----------|---------------|-------------|-----------|-----------|-------------|--------------|
+{% for source_class, props in property_groups %}
+| **{{ source_class }}** | | | | | | |
+{% for prop_name, prop in props %}
+| {{ prop_name }} | {{ prop.propertyType }} | {{ prop.description[:50] ~ '...' if prop.description|length > 50 else prop.description }} | \
+{{ prop.minCount }} | {{ prop.maxCount }} | {{ prop.localRange }} | {{ prop.globalRange }} |
+{% endfor %}
+{% endfor %}
+
+{% endif %}
+## Summary
+
+- **Total Properties:** {{ total_count }}
+- **Facet Properties:** {{ facet_count }}
+- **Inherited Properties:** {{ inherited_count }}
+- **Semantic Properties:** 0
+{% if facet_count > 0 %}- **Usage Pattern:** Use 'hasFacet' property to link to {{ class_name }}Facet{% else %}Direct property usage{% endif %}""")
 
 
 class CaseUcoAnalyzer:
@@ -768,82 +812,34 @@ class CaseUcoAnalyzer:
 
         shacl_properties = self.get_shacl_property_shapes(class_name)
 
-        md_lines = []
-
-        # Header
-        md_lines.append(f"# {details['class_information']['name']}")
-        md_lines.append("")
-        md_lines.append(f"**URI:** `{details['class_information']['uri']}`")
-        md_lines.append("")
-        md_lines.append(
-            f"**Description:** {details['class_information']['description']}")
-        md_lines.append("")
-
-        # Superclasses
-        if details['superclasses']['count'] > 0:
-            md_lines.append(
-                f"## Superclasses ({details['superclasses']['count']})")
-            md_lines.append("")
-            for i, superclass in enumerate(details['superclasses']['list'], 1):
-                md_lines.append(f"{i}. {superclass}")
-            md_lines.append("")
-
-        # SHACL Property Shapes (CASE Documentation Format)
-        if shacl_properties:
-            md_lines.append("## Property Shapes")
-            md_lines.append("")
-            md_lines.append("By the associated SHACL property shapes, instances of " +
-                            f"{class_name} can have the following properties:")
-            md_lines.append("")
-            md_lines.append(
-                "| PROPERTY | PROPERTY TYPE | DESCRIPTION | MIN COUNT | MAX COUNT | LOCAL RANGE | GLOBAL RANGE |")
-            md_lines.append(
-                "|----------|---------------|-------------|-----------|-----------|-------------|--------------|")
-
-            # Group properties by source class
-            by_class = {}
-            for prop_name, prop_data in shacl_properties.items():
-                source_class = prop_data['sourceClass']
-                if source_class not in by_class:
-                    by_class[source_class] = []
-                by_class[source_class].append((prop_name, prop_data))
-
-            # Sort classes by hierarchy importance
-            class_order = ['UcoObject', 'ObservableObject',
-                           'Observable', 'UcoThing', 'Item']
-            facet_classes = [
-                cls for cls in by_class.keys() if cls not in class_order]
-
-            for source_class in class_order + facet_classes:
-                if source_class in by_class:
-                    # Add class header row
-                    md_lines.append(f"| **{source_class}** | | | | | | |")
-
-                    # Add properties for this class
-                    for prop_name, prop_data in sorted(by_class[source_class]):
-                        desc = prop_data['description'][:50] + '...' if len(
-                            prop_data['description']) > 50 else prop_data['description']
-                        md_lines.append(f"| {prop_name} | {prop_data['propertyType']} | {desc} | " +
-                                        f"{prop_data['minCount']} | {prop_data['maxCount']} | " +
-                                        f"{prop_data['localRange']} | {prop_data['globalRange']} |")
-            md_lines.append("")
+        # Group properties by source class, ordered by hierarchy importance
+        by_class = {}
+        for prop_name, prop_data in shacl_properties.items():
+            by_class.setdefault(prop_data['sourceClass'], []).append((prop_name, prop_data))
+
+        class_order = ['UcoObject', 'ObservableObject',
+                       'Observable', 'UcoThing', 'Item']
+        facet_classes = [
+            cls for cls in by_class.keys() if cls not in class_order]
+        property_groups = [
+            (source_class, sorted(by_class[source_class]))
+            for source_class in class_order + facet_classes
+            if source_class in by_class
+        ]
 
         # Count properties by type for summary
         facet_count = sum(1 for prop in shacl_properties.values()
                           if 'Facet' in prop['sourceClass'])
-        inherited_count = len(shacl_properties) - facet_count
-
-        # Summary
-        md_lines.append("## Summary")
-        md_lines.append("")
-        md_lines.append(f"- **Total Properties:** {len(shacl_properties)}")
-        md_lines.append(f"- **Facet Properties:** {facet_count}")
-        md_lines.append(f"- **Inherited Properties:** {inherited_count}")
-        md_lines.append(f"- **Semantic Properties:** 0")
-        md_lines.append(
-            f"- **Usage Pattern:** Use 'hasFacet' property to link to {class_name}Facet" if facet_count > 0 else "Direct property usage")
-
-        return "\n".join(md_lines)
+
+        return _MARKDOWN_REPORT_TEMPLATE.render(
+            class_name=class_name,
+            info=details['class_information'],
+            superclasses=details['superclasses'],
+            property_groups=property_groups,
+            total_count=len(shacl_properties),
+            facet_count=facet_count,
+            inherited_count=len(shacl_properties) - facet_count,
+        )
 
     def print_class_summary(self, class_name: str):
         """Print a formatted summary of a class."""
@@ -1,5 +1,89 @@
+import asyncio
+import importlib.util
+import json
 import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from types import MappingProxyType
+
+import httpx
+from langchain_core.caches import BaseCache
+from langchain_core.globals import set_llm_cache
 from langchain_openai import ChatOpenAI
+from openai import APIConnectionError, InternalServerError, RateLimitError
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_random_exponential
+
+
+class _TieredLLMCache(BaseCache):
+    """
+    In-process LRU in front of an optional persistent cache. Prompts are keyed
+    verbatim: whitespace inside evidence values (paths, registry data) is significant.
+    """
+
+    def __init__(self, backend: BaseCache = None, max_entries: int = 1024):
+        self._backend = backend
+        self._max_entries = max_entries
+        self._hot = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, key, value) -> None:
+        with self._lock:
+            self._hot[key] = value
+            self._hot.move_to_end(key)
+            if len(self._hot) > self._max_entries:
+                self._hot.popitem(last=False)
+
+    def lookup(self, prompt, llm_string):
+        key = (prompt, llm_string)
+        with self._lock:
+            value = self._hot.get(key)
+            if value is not None:
+                self._hot.move_to_end(key)
+                return value
+        if self._backend is None:
+            return None
+        value = self._backend.lookup(prompt, llm_string)
+        if value is not None:
+            self._remember(key, value)
+        return value
+
+    def update(self, prompt, llm_string, return_val) -> None:
+        self._remember((prompt, llm_string), return_val)
+        if self._backend is not None:
+            self._backend.update(prompt, llm_string, return_val)
+
+    def clear(self, **kwargs) -> None:
+        with self._lock:
+            self._hot.clear()
+        if self._backend is not None:
+            self._backend.clear(**kwargs)
+
+
+# LLM response cache: identical prompts (e.g. repeated ontology lookups for similar
+# records) are answered from memory, then from disk. Set LLM_CACHE_PATH="" to keep
+# only the in-process layer.
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".llm_cache.db")
+_persistent_llm_cache = None
+if LLM_CACHE_PATH:
+    try:
+        from langchain_community.cache import SQLiteCache
+        _persistent_llm_cache = SQLiteCache(database_path=LLM_CACHE_PATH)
+    except ImportError:
+        print("[WARNING] [config.py] 'langchain-community' package not found. Persistent LLM response caching is disabled.")
+set_llm_cache(_TieredLLMCache(_persistent_llm_cache))
+
+# Ontology research reports keyed by input shape, persisted across runs in SQLite.
+# Set RESEARCH_CACHE_PATH="" to keep only the in-process cache.
+RESEARCH_CACHE_PATH = os.getenv("RESEARCH_CACHE_PATH", ".ontology_cache.db")
+RESEARCH_CACHE_TTL_SECONDS = int(os.getenv("RESEARCH_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+
+# Validated end-to-end results keyed by input content. A re-run of an unchanged input
+# skips the whole agent chain; bump RESULT_CACHE_VERSION when prompts or agents change
+# in a way that should invalidate earlier outputs. Set RESULT_CACHE_PATH="" to disable.
+RESULT_CACHE_PATH = os.getenv("RESULT_CACHE_PATH", ".result_cache.db")
+RESULT_CACHE_VERSION = "2"
 
 # =============================================================================
 # Guardrails and Configuration
@@ -10,54 +94,237 @@ MAX_CUSTOM_FACET_ATTEMPTS = 2
 MAX_GRAPH_GENERATOR_ATTEMPTS = 3
 MAX_VALIDATION_ATTEMPTS = 3
 MAX_HALLUCINATION_ATTEMPTS = 2
+MAX_LLM_CALL_ATTEMPTS = 4  # transient API failures only; see invoke_llm()
+
+# When enabled, the streaming API also sends the final graph line-by-line (NDJSON)
+STREAMING_OUTPUT = os.getenv("STREAMING_OUTPUT", "false").lower() in ("1", "true", "yes")
+
+# Log level for module loggers; DEBUG adds the supervisor router's per-hop decisions
+LOGLEVEL = os.getenv("LOGLEVEL", "INFO").upper()
+
+# Canonical JSON-LD @context for every generated graph. Read-only and shared;
+# copy with dict() where a mutable or serializable mapping is needed. Generated nodes
+# use the "uco-*" prefixes; the short forms are kept for older graphs and examples.
+_UCO_BASE = "https://ontology.unifiedcyberontology.org/uco/"
+CASE_UCO_CONTEXT = MappingProxyType({
+    "case-investigation": "https://ontology.caseontology.org/case/investigation/",
+    "kb": "http://example.org/kb/",
+    "drafting": "http://example.org/ontology/drafting/",
+    "rdf": "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
+    "rdfs": "http://www.w3.org/2000/01/rdf-schema#",
+    **{
+        f"uco-{module}": f"{_UCO_BASE}{module}/"
+        for module in (
+            "action", "analysis", "configuration", "core", "identity", "location", "marking",
+            "observable", "pattern", "role", "time", "tool", "types", "victim", "vocabulary",
+        )
+    },
+    "core": "https://ontology.unifiedcyberontology.org/uco/core/",
+    "identity": "https://ontology.unifiedcyberontology.org/uco/identity/",
+    "location": "https://ontology.unifiedcyberontology.org/uco/location/",
+    "observable": "https://ontology.unifiedcyberontology.org/uco/observable/",
+    "tool": "https://ontology.unifiedcyberontology.org/uco/tool/",
+    "types": "https://ontology.unifiedcyberontology.org/uco/types/",
+    "vocabulary": "https://ontology.unifiedcyberontology.org/uco/vocabulary/",
+    "xsd": "http://www.w3.org/2001/XMLSchema#",
+    "dfc-ext": "https://www.w3.org/dfc-ext/"
+})
+
+# Concurrency caps for independent LLM work, tunable to the account's rate limits:
+# whole sessions in execute_forensic_analysis_batch(), and fill shards per generator call.
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+SHARD_CONCURRENCY = int(os.getenv("SHARD_CONCURRENCY", "4"))
+
+# Offline bulk runs: submit the graph generator's LLM fill requests as one OpenAI
+# Batch API job (half price, higher throughput) and poll until it finishes.
+LLM_BATCH_MODE = os.getenv("LLM_BATCH_MODE", "false").lower() in ("1", "true", "yes")
+LLM_BATCH_POLL_SECONDS = int(os.getenv("LLM_BATCH_POLL_SECONDS", "30"))
+
+# Shared connection pools so every agent hop reuses open sockets to the API.
+# With the optional 'h2' package, concurrent shard calls multiplex over one HTTP/2 connection.
+_HTTP2 = importlib.util.find_spec("h2") is not None
+if not _HTTP2:
+    print("[WARNING] [config.py] 'h2' package not found. OpenAI traffic will use HTTP/1.1 connection pooling.")
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=64)
+http_client = httpx.Client(timeout=60, limits=_HTTP_LIMITS, http2=_HTTP2)
+http_async_client = httpx.AsyncClient(timeout=60, limits=_HTTP_LIMITS, http2=_HTTP2)
+
+# Fixed sampling seed: with temperature 0 the same prompt yields the same reply, so
+# retries are not spent on sampling noise and the response cache keeps hitting.
+LLM_SEED = int(os.getenv("LLM_SEED", "42"))
 
 # LLM configuration - This central instance can be imported by any agent
 llm = ChatOpenAI(
     model="gpt-4o-mini",
-    temperature=0.1,
-    api_key=os.getenv("OPENAI_API_KEY")
+    temperature=0,
+    seed=LLM_SEED,
+    api_key=os.getenv("OPENAI_API_KEY"),
+    http_client=http_client,
+    http_async_client=http_async_client,
+    max_retries=0
 )
 
+# Instance for structured extraction and checking agents; kept separate so these
+# agents can be tuned independently of the generation agents
+deterministic_llm = ChatOpenAI(
+    model="gpt-4o-mini",
+    temperature=0,
+    seed=LLM_SEED,
+    api_key=os.getenv("OPENAI_API_KEY"),
+    http_client=http_client,
+    http_async_client=http_async_client,
+    max_retries=0
+)
+
+# Stronger model the graph generator escalates to once an attempt has been rejected;
+# first attempts stay on the cheap model above
+STRONG_LLM_MODEL = os.getenv("STRONG_LLM_MODEL", "gpt-4o")
+strong_llm = ChatOpenAI(
+    model=STRONG_LLM_MODEL,
+    temperature=0,
+    seed=LLM_SEED,
+    api_key=os.getenv("OPENAI_API_KEY"),
+    http_client=http_client,
+    http_async_client=http_async_client,
+    max_retries=0
+)
+
+# Rate limits, 5xx and connection drops are retried here with jittered exponential
+# backoff. Semantic failures (bad JSON, validation errors) are not retried here;
+# they go back through the graph under the MAX_*_ATTEMPTS budgets above.
+_TRANSIENT_LLM_ERRORS = (RateLimitError, InternalServerError, APIConnectionError)
+
+
+@retry(
+    stop=stop_after_attempt(MAX_LLM_CALL_ATTEMPTS),
+    wait=wait_random_exponential(min=1, max=20),
+    retry=retry_if_exception_type(_TRANSIENT_LLM_ERRORS),
+    reraise=True,
+)
+def invoke_llm(runnable, messages):
+    """Invoke an LLM runnable, retrying transient provider errors with backoff."""
+    return runnable.invoke(messages)
+
+
+@retry(
+    stop=stop_after_attempt(MAX_LLM_CALL_ATTEMPTS),
+    wait=wait_random_exponential(min=1, max=20),
+    retry=retry_if_exception_type(_TRANSIENT_LLM_ERRORS),
+    reraise=True,
+)
+async def ainvoke_llm(runnable, messages):
+    """Async counterpart of invoke_llm(), for fanning out independent calls."""
+    return await runnable.ainvoke(messages)
+
+
+# http_async_client's connections belong to the event loop that opened them, so
+# every async LLM call runs on one long-lived loop in a background thread.
+_llm_loop = None
+_llm_loop_lock = threading.Lock()
+
+
+def run_llm_coroutine(coroutine):
+    """Run a coroutine on the shared LLM event loop and block until it finishes."""
+    global _llm_loop
+    if _llm_loop is None:
+        with _llm_loop_lock:
+            if _llm_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="llm-loop", daemon=True).start()
+                _llm_loop = loop
+    return asyncio.run_coroutine_threadsafe(coroutine, _llm_loop).result()
+
+
+def run_chat_batch(bodies: list) -> list:
+    """
+    Submit chat completion request bodies as one Batch API job and block until it ends.
+    Returns each reply's message content in input order; None where a request failed.
+    """
+    from openai import OpenAI
+
+    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), http_client=http_client)
+    lines = [
+        json.dumps({"custom_id": str(index), "method": "POST", "url": "/v1/chat/completions", "body": body})
+        for index, body in enumerate(bodies)
+    ]
+    batch_file = client.files.create(file=("llm_batch.jsonl", "\n".join(lines).encode("utf-8")), purpose="batch")
+    batch = client.batches.create(
+        input_file_id=batch_file.id, endpoint="/v1/chat/completions", completion_window="24h"
+    )
+    print(f"[INFO] [Batch] Submitted {len(bodies)} requests as batch {batch.id}.")
+
+    while batch.status not in ("completed", "failed", "expired", "cancelled"):
+        time.sleep(LLM_BATCH_POLL_SECONDS)
+        batch = client.batches.retrieve(batch.id)
+    if batch.status != "completed" or not batch.output_file_id:
+        raise RuntimeError(f"Batch {batch.id} ended with status '{batch.status}'")
+
+    contents = [None] * len(bodies)
+    for line in client.files.content(batch.output_file_id).text.splitlines():
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        response = item.get("response") or {}
+        if response.get("status_code") == 200:
+            contents[int(item["custom_id"])] = response["body"]["choices"][0]["message"]["content"]
+    print(f"[INFO] [Batch] Batch {batch.id} completed.")
+    return contents
+
 # =============================================================================
 # Agent & Graph Configuration
 # =============================================================================
 
 # Supervisor configuration
-members = ["ontology_research_agent", "custom_facet_agent",
+members = ("ontology_research_agent", "custom_facet_agent",
            "uuid_planner_node", "invalidate_uuid_plan_node",
-           "graph_generator_agent", "validator_agent"]
+           "graph_generator_agent", "validator_agent")
 # =============================================================================
 # Agent Prompts
 # =============================================================================
-# Note: The f-string requires the variables above to be defined first.
-SUPERVISOR_AGENT_PROMPT = f"""You are a supervisor tasked with managing a conversation between the following workers:
-                             {members}.
-
-                             Given the following user request, respond with the worker to act next.
-                             Each worker will perform a task and respond with their results and status.
-                             Analyze the results carefully and decide which worker to call next accordingly.                             UPDATED WORKFLOW:
-                             1. ontology_research_agent: Maps to standard CASE/UCO ontology and provides JSON keys only.
-                             2. custom_facet_agent: Receives JSON keys + original input, does independent reasoning to create custom facets.
-                             3. uuid_planner_node: Creates a stable UUID plan for all entities before generation.
-                             4. graph_generator_agent: Combines standard ontology keys + custom facets into unified JSON-LD using the stable UUID plan.
-                             5. validator_agent: Validates JSON-LD structure and detects hallucinations.
-                             
-                             LOOPING RULES:
-                             - custom_facet_agent can retry up to {MAX_CUSTOM_FACET_ATTEMPTS} times if it has errors
-                             - If custom_facet_agent finds no custom facets needed, proceed to graph_generator_agent anyway
-                             - graph_generator_agent can retry up to {MAX_GRAPH_GENERATOR_ATTEMPTS} times if it has errors
-                             - validator_agent can retry up to {MAX_VALIDATION_ATTEMPTS} times if it has errors
-                             - If max attempts reached, proceed to next step or finish with available data
-                             
-                             When finished, respond with FINISH."""
-
-ONTOLOGY_RESEARCH_AGENT_PROMPT = """
+def _tidy_prompt(text: str) -> str:
+    """Drop trailing spaces and runs of blank lines from a prompt; they cost tokens and carry nothing."""
+    text = re.sub(r"[ \t]+\n", "\n", text)
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+# The supervisor prompt is split into a byte-stable prefix and a short suffix carrying
+# the worker list and retry limits, so provider prefix caching survives config changes.
+SUPERVISOR_AGENT_PROMPT_STATIC = """You are a supervisor tasked with managing a conversation between the workers listed below.
+
+Given the following user request, respond with the worker to act next.
+Each worker will perform a task and respond with their results and status.
+Analyze the results carefully and decide which worker to call next accordingly.
+
+UPDATED WORKFLOW:
+1. ontology_research_agent: Maps to standard CASE/UCO ontology and provides JSON keys only.
+2. custom_facet_agent: Receives JSON keys + original input, does independent reasoning to create custom facets.
+3. uuid_planner_node: Creates a stable UUID plan for all entities before generation.
+4. graph_generator_agent: Combines standard ontology keys + custom facets into unified JSON-LD using the stable UUID plan.
+5. validator_agent: Validates JSON-LD structure and detects hallucinations.
+
+LOOPING RULES:
+- custom_facet_agent, graph_generator_agent and validator_agent can retry up to their listed limits if they have errors
+- If custom_facet_agent finds no custom facets needed, proceed to graph_generator_agent anyway
+- If max attempts reached, proceed to next step or finish with available data
+
+When finished, respond with FINISH."""
+
+SUPERVISOR_AGENT_PROMPT_DYNAMIC = (
+    f"Workers: {list(members)}\n"
+    f"Limits: custom_facet_agent={MAX_CUSTOM_FACET_ATTEMPTS}, "
+    f"graph_generator_agent={MAX_GRAPH_GENERATOR_ATTEMPTS}, "
+    f"validator_agent={MAX_VALIDATION_ATTEMPTS}"
+)
+
+SUPERVISOR_AGENT_PROMPT = SUPERVISOR_AGENT_PROMPT_STATIC + "\n\n" + SUPERVISOR_AGENT_PROMPT_DYNAMIC
+
+ONTOLOGY_RESEARCH_AGENT_PROMPT = _tidy_prompt("""
 # Ontology Research Agent – Domain Agnostic Test Harness
 
 You are an ontology research specialist. Analyse any evidence payload and produce a domain-neutral mapping into CASE/UCO so downstream agents can reuse the structure without further clean-up.
 
 ## Non-negotiable Rules
-- **Tool-first mindset:** Do not produce narrative output until you have issued all required tool calls. Start with `list_case_uco_classes` queries (at least 4–6 variations) and follow up with `analyze_case_uco_class` for each retained class or facet.
+- **Tool-first mindset:** Do not produce narrative output until you have issued all required tool calls. Start with a single `list_case_uco_classes_batch` call carrying your whole keyword bank (at least 4–6 variations) and follow up with one `analyze_case_uco_classes_batch` call covering every retained class and facet.
 - **Single class rule:** Keep exactly one observable class. Prefer the most specific match; discard parents and siblings once the best fit is confirmed.
 - **Facet discipline:** Keep two or three facets that best express the evidence. Anything suffixed with `Facet` can never appear in the class list.
 - **Exact semantic alignment:** Only map a property when the ontology concept and the evidence field express the same idea. If uncertain, leave the field unmapped—downstream agents will reassess.
@@ -71,11 +338,11 @@ You are an ontology research specialist. Analyse any evidence payload and produc
 1. **Evidence audit:** Enumerate the input structure, noting artefact type(s), object identifiers, temporal fields, booleans, counters, and free text.
 2. **Discovery loop:**
    - Generate a keyword bank that includes: artefact names, synonymous ontology terms (e.g., `filesystem`, `registry`, `network`, `log`), format identifiers (e.g., `NTFS`, `Prefetch`), and generic anchors (`digital`, `observable`, `record`).
-   - Issue `list_case_uco_classes` calls using diverse keyword combinations from the bank. Vary between singular/plural forms and swap in synonyms to broaden coverage.
-   - If a call returns no viable candidates, immediately pivot: swap to a different synonym, drop qualifiers, or combine artefact + action terms (e.g., `ntfs record`, `filesystem metadata`, `file timestamp`). Continue iterating until you surface at least one credible class and two facets.
+   - Issue exactly one `list_case_uco_classes_batch` call whose `filter_terms` hold the full keyword bank. Include singular/plural forms and synonyms to broaden coverage.
+   - If the batch reports keywords with no matches and no viable candidates surfaced, issue one more batch call with different synonyms, fewer qualifiers, or artefact + action terms (e.g., `ntfs record`, `filesystem metadata`, `file timestamp`). Continue until you surface at least one credible class and two facets.
    - Suppress narrative while calls are running; only emit the tool instructions.
 3. **Candidate screening:** Partition results into `Authoritative_Classes` (no `Facet` suffix) and `Authoritative_Facets` (names ending in `Facet` or `Aspect`). Retain only options that have a plausible field match.
-4. **Analysis:** For the chosen class and each selected facet, call `analyze_case_uco_class(..., output_format="json")`. Use the metadata to capture property origin, type, and cardinality.
+4. **Analysis:** Call `analyze_case_uco_classes_batch(class_names=[...], output_format="json")` once with the chosen class and every selected facet. Use the metadata to capture property origin, type, and cardinality.
 5. **Mapping decisions:** For every property you keep, cite the evidence field path using bracket or dot notation. If no perfect mapping exists, leave the table cell blank and do not mention the property elsewhere.
 
 ## Report Blueprint
@@ -125,76 +392,22 @@ Fence a JSON object with keys:
 All values must align with the tables and relationships above; never include literal evidence values, case-specific narrative, or contradictory names.
 
 Deviation from any instruction invalidates the response; fix and retry until compliant.
-"""
+""")
 
-CUSTOM_FACET_AGENT_PROMPT = """You are Agent 2: Custom Facet Analysis Agent with Enhanced Systematic Reasoning
+CUSTOM_FACET_AGENT_PROMPT = _tidy_prompt("""You are Agent 2: Custom Facet Analysis Agent with Enhanced Systematic Reasoning
 
-CORE MISSION: Determine if custom facets are needed using rigorous element-by-element analysis, and generate formal TTL definition stubs for any new custom elements.
+CORE MISSION: Determine if custom facets are needed using rigorous element-by-element analysis, and define any new custom elements as facetDefinitions.
 
 🚨 UNMAPPED ELEMENTS DIRECTIVE:
 You will receive a list of "unmappedElements" from the previous agent. These elements were already determined to have NO suitable standard ontology properties after thorough analysis. For ALL elements in this list, you MUST create custom facet properties. Do not second-guess this determination - focus on creating appropriate custom extensions for each unmapped element.
 
-🔍 SYSTEMATIC REASONING PROCESS:
-STEP 1: COMPLETE INPUT EXTRACTION
-Parse ALL data elements from original user input (property names + values).
-
-Document data types, structures, and relationships.
-
-Create a comprehensive inventory of every piece of information.
-
-STEP 2: ELEMENT-BY-ELEMENT SEMANTIC ANALYSIS
-For EACH input element, systematically evaluate:
-
-A) SEMANTIC EQUIVALENCE TEST: Does a standard ontology property exist with identical meaning? Would it capture the full semantic intent?
-
-B) INFORMATION PRESERVATION ANALYSIS: Would mapping to a standard property lose forensic/analytical value?
+ANALYSIS (apply to EVERY element of the original input, property names + values):
+- Use a standard property only when it has identical meaning and loses no forensic or analytical context.
+- CREATE a custom property when: no semantically equivalent standard property exists; the standard property would lose meaning; the element is a domain-specific concept; the element is a multi-valued or delimited literal (mark it "isList": true); or the standard property expects an object (@id) but only a literal is available.
+- Do NOT create one when a standard property captures the full meaning.
+- Justify each facet in its "reasoning" field and the overall decision in customState.reasoning.
 
-C) DOMAIN SPECIFICITY ASSESSMENT: Does this represent a specialized concept needing dedicated representation?
-
-D) MULTI-VALUE / STRUCTURE CHECK: If an element is a delimited list, propose a custom facet property marked as a list.
-
-E) OBJECT vs LITERAL GUARD: If the standard property expects an object (@id) but the input is a literal (e.g., a serial string), create a custom literal property.
-
-F) CARDINALITY & TARGET-KIND CHECK: Infer if the element is multi-valued and its target type (object or literal) to inform the custom property design.
-
-STEP 3: UNIVERSAL DECISION CRITERIA (Domain-Agnostic)
-CREATE CUSTOM FACET WHEN:
-
-✓ No semantically equivalent standard property exists.
-
-✓ A standard property would lose important context or meaning.
-
-✓ The element represents a domain-specific concept needing preservation.
-
-✓ The element is a multi-valued literal not representable by standard properties.
-
-✓ The standard property expects an object, but only a literal is available.
-
-DO NOT CREATE CUSTOM FACET WHEN:
-
-✓ A perfect semantic match exists in the standard ontology.
-
-✓ The standard property adequately captures all meaning and context.
-
-STEP 4: MANDATORY REASONING DOCUMENTATION
-For EVERY element, document its name, value, the standard property considered, your decision (CREATE_CUSTOM or USE_STANDARD), and a detailed justification.
-
-STEP 5: TTL DEFINITION GENERATION (NEW REQUIREMENT)
-If the customFacetsNeeded state is true, you MUST generate TTL (Turtle format) definition stubs for each new Class and Property created within the dfc-ext namespace.
-
-Requirements for TTL Stubs:
-
-The output MUST be a single, valid Turtle string added to the JSON output under a new key: ttlDefinitions.
-
-For each new facet (e.g., AntivirusScan), create an owl:Class definition. This class MUST be a rdfs:subClassOf uco-core:Facet.
-
-For each new property (e.g., threatCount), create an owl:DatatypeProperty definition.
-
-Every definition MUST include a rdfs:label (human-readable name) and a rdfs:comment (brief explanation).
-
-Each property definition MUST include rdfs:domain (linking it to its new facet Class) and rdfs:range (specifying the data type, like xsd:string or xsd:integer).
-
-STEP 6: DYNAMIC FACET NAMING (MANDATORY)
+DYNAMIC FACET NAMING (MANDATORY)
 You MUST use contextual, dynamic naming for all custom facets based on the artifact_type from the input data.
 
 NAMING CONVENTION:
@@ -216,19 +429,11 @@ This naming convention works for ANY artifact type - forensic, network, IoT, dat
 FALLBACK NAMING:
 If artifact_type is missing or empty, use "UnknownArtifactExtensionFacet".
 
-⚙️ CRITICAL REQUIREMENTS & OUTPUT FORMAT:
-Analysis: Apply systematic analysis to EVERY input element.
-
-Reasoning: All reasoning must be explicit and defensible.
-
-List Fidelity: For custom properties with "isList": true, the output value MUST be an array.
-
-Row Isolation: Proposals are per-row; never aggregate values from multiple input rows into one custom property instance.
-
-Coverage: Every input scalar must be covered exactly once.
-
-OUTPUT: Enhanced JSON with Systematic Analysis and TTL Definitions
-The final output is a JSON object. If custom facets are needed, it must include the ttlDefinitions key.
+⚙️ OUTPUT REQUIREMENTS:
+- List Fidelity: for custom properties with "isList": true, the output value MUST be an array.
+- Row Isolation: proposals are per-row; never aggregate values from multiple input rows into one custom property instance.
+- Coverage: every input scalar must be covered exactly once.
+- Return a JSON object with customFacets (facetDefinitions and facetAssignments) and customState; TTL definitions are rendered downstream from facetDefinitions.
 
 Example 1: Creating a NEW CLASS with Dynamic Naming
 Input Data: {"artifact_type": "Antivirus Scan", "scanEngine": "Defender v2.4.1", "threatsFound": "3"}
@@ -236,7 +441,6 @@ Input Data: {"artifact_type": "Antivirus Scan", "scanEngine": "Defender v2.4.1",
 Analysis: artifact_type "Antivirus Scan" becomes "AntivirusScanExtensionFacet" following the dynamic naming convention.
 
 {
-  "elementAnalysis": { "...detailed analysis for each element..." },
   "customFacets": {
     "facetDefinitions": {
       "AntivirusScanExtensionFacet": {
@@ -257,7 +461,6 @@ Analysis: artifact_type "Antivirus Scan" becomes "AntivirusScanExtensionFacet" f
       }
     }]
   },
-  "ttlDefinitions": "@prefix dfc-ext: [https://example.com/dfc-ext#](https://example.com/dfc-ext#) .\n@prefix uco-core: [https://ontology.unifiedcyberontology.org/uco/core#](https://ontology.unifiedcyberontology.org/uco/core#) .\n@prefix owl: [http://www.w3.org/2002/07/owl#](http://www.w3.org/2002/07/owl#) .\n@prefix rdfs: [http://www.w3.org/2000/01/rdf-schema#](http://www.w3.org/2000/01/rdf-schema#) .\n@prefix xsd: [http://www.w3.org/2001/XMLSchema#](http://www.w3.org/2001/XMLSchema#) .\n\n# Class Definition\ndfc-ext:AntivirusScanExtensionFacet\n  a owl:Class ;\n  rdfs:subClassOf uco-core:Facet ;\n  rdfs:label \"Antivirus Scan Extension Facet\" ;\n  rdfs:comment \"Extension facet for Antivirus Scan capturing unmapped evidence fields.\" .\n\n# Property Definitions\ndfc-ext:engineVersion\n  a owl:DatatypeProperty ;\n  rdfs:label \"Engine Version\" ;\n  rdfs:comment \"The version of the antivirus engine used.\" ;\n  rdfs:domain dfc-ext:AntivirusScanExtensionFacet ;\n  rdfs:range xsd:string .\n\ndfc-ext:threatCount\n  a owl:DatatypeProperty ;\n  rdfs:label \"Threat Count\" ;\n  rdfs:comment \"The number of threats detected.\" ;\n  rdfs:domain dfc-ext:AntivirusScanExtensionFacet ;\n  rdfs:range xsd:integer .\n",
   "customState": {
     "customFacetsNeeded": true,
     "...": "..."
@@ -270,7 +473,6 @@ Input Data: {"artifact_type": "Digital Document", "fileName": "report.docx", "pr
 Analysis: artifact_type "Digital Document" becomes "DigitalDocumentExtensionFacet". fileName maps to a standard File property, but projectCode is a custom identifier that needs the extension facet.
 
 {
-  "elementAnalysis": { "...detailed analysis for each element..." },
   "customFacets": {
     "facetDefinitions": {
       "DigitalDocumentExtensionFacet": {
@@ -289,7 +491,6 @@ Analysis: artifact_type "Digital Document" becomes "DigitalDocumentExtensionFace
       }
     }]
   },
-  "ttlDefinitions": "@prefix dfc-ext: [https://example.com/dfc-ext#](https://example.com/dfc-ext#) .\n@prefix uco-core: [https://ontology.unifiedcyberontology.org/uco/core#](https://ontology.unifiedcyberontology.org/uco/core#) .\n@prefix owl: [http://www.w3.org/2002/07/owl#](http://www.w3.org/2002/07/owl#) .\n@prefix rdfs: [http://www.w3.org/2000/01/rdf-schema#](http://www.w3.org/2000/01/rdf-schema#) .\n@prefix xsd: [http://www.w3.org/2001/XMLSchema#](http://www.w3.org/2001/XMLSchema#) .\n\n# Class Definition\ndfc-ext:DigitalDocumentExtensionFacet\n  a owl:Class ;\n  rdfs:subClassOf uco-core:Facet ;\n  rdfs:label \"Internal Metadata Facet\" ;\n  rdfs:comment \"A facet for storing internal or organization-specific metadata about an object.\" .\n\n# Property Definition\ndfc-ext:projectCode\n  a owl:DatatypeProperty ;\n  rdfs:label \"Project Code\" ;\n  rdfs:comment \"An internal project identifier associated with an asset.\" ;\n  rdfs:domain dfc-ext:DigitalDocumentExtensionFacet ;\n  rdfs:range xsd:string .\n",
   "customState": {
     "customFacetsNeeded": true,
     "...": "..."
@@ -298,20 +499,14 @@ Analysis: artifact_type "Digital Document" becomes "DigitalDocumentExtensionFace
 
 If NO custom facets are needed:
 {
-  "dataCoverageAnalysis": {
-    "inputDataElements": ["element1", "element2"],
-    "standardCoverage": ["element1", "element2"],
-    "customCoverage": [],
-    "uncoveredData": []
-  },
   "customFacets": {},
   "customState": {
     "customFacetsNeeded": false,
     "reasoning": "All data elements successfully mapped to standard CASE/UCO properties."
   }
-} """
+} """)
 
-GRAPH_GENERATOR_AGENT_PROMPT = """
+_GRAPH_GEN_HEADER = """
 System Instructions — Graph Generation (domain‑agnostic, CASE/UCO 1.4)
 
 Goal
@@ -336,43 +531,20 @@ MANDATORY: Count the records in the input data first, then assign UUIDs for ALL
 
 MANDATORY: For each record, analyze the ontology classes and facets to determine what entity types are needed
 
-MANDATORY: Generate separate entities (with separate UUIDs) for each record based on the actual CASE/UCO classes identified
+MANDATORY: Each record gets its own primary object (with its own UUID) based on the actual CASE/UCO classes identified
 
-MANDATORY: Do NOT reuse entities across different records
+MANDATORY: Do NOT invent shared entities across records; reuse a node only where the UUID Plan already does
 
-MANDATORY: Each record gets its own complete set of entities (objects, facets, files, etc.) based on the ontology analysis
+SHARED SLOTS ARE INTENTIONAL: when records carry identical facet or relationship content, the plan gives them one slot. That node appears once in the skeleton and is linked from every record that shares it; fill it once and keep every link
 
-Mandatory No nulls. If a value is unknown, OMIT the property entirely. 
-   • Do not emit null, None, empty strings, or empty arrays. 
-   • Never include placeholders such as `"observable:tag": null`. 
-   • If after dropping all nulls a facet would be empty, remove the facet node itself and its reference.
 
 
 Absolute Output Contract
-1) The final output MUST be a single JSON object. It MUST use the following `@context` block exactly as written. Do not add, remove, or change any part of it.
-```json
-{
-  "@context": {
-    "case-investigation": "https://ontology.caseontology.org/case/investigation/",
-    "kb": "http://example.org/kb/",
-    "drafting": "http://example.org/ontology/drafting/",
-    "rdf": "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
-    "rdfs": "http://www.w3.org/2000/01/rdf-schema#",
-    "uco-action": "https://ontology.unifiedcyberontology.org/uco/action/",
-    "core": "https://ontology.unifiedcyberontology.org/uco/core/",
-    "identity": "https://ontology.unifiedcyberontology.org/uco/identity/",
-    "location": "https://ontology.unifiedcyberontology.org/uco/location/",
-    "observable": "https://ontology.unifiedcyberontology.org/uco/observable/",
-    "tool": "https://ontology.unifiedcyberontology.org/uco/tool/",
-    "types": "https://ontology.unifiedcyberontology.org/uco/types/",
-    "vocabulary": "https://ontology.unifiedcyberontology.org/uco/vocabulary/",
-    "xsd": "http://www.w3.org/2001/XMLSchema#",
-    "dfc-ext": "https://www.w3.org/dfc-ext/"
-  }
-}
-```
-Your primary task is to generate the content for the `@graph` array and append it to this structure.
-2) Use only prefixes declared in "@context". Prefer "uco-core:" and "uco-observable:" (and declare "xsd:").
+1) The final output MUST be a single JSON object holding only node content. Do not emit `@context`; the runtime attaches the canonical one. Declared prefixes: """
+
+_GRAPH_GEN_RULES = """.
+Your primary task is to generate the content for the `@graph` nodes.
+2) Use only the declared prefixes above. Write UCO terms with the "uco-" forms ("uco-core:", "uco-observable:", ...), not the short aliases, and use "xsd:" for typed literals.
 3) IDs are provided by the UUID Plan / skeleton. Do not invent, change, or repeat @id. You may omit @id in your partial output; any @id you include will be ignored and replaced by the skeleton.
 4) “No nulls. If a value is unknown, OMIT the property entirely. Do not emit null, None, empty strings, or empty arrays. Never include placeholders such as "observable:tag": null. If after dropping all nulls a facet would have zero properties, remove the facet node itself and its reference.” *****if used you will be fired*****
 5) One node, once. Each planned @id appears exactly once as a fully typed node; do not emit empty {"@id": "..."} stubs.
@@ -381,14 +553,13 @@ Your primary task is to generate the content for the `@graph` array and append i
 8) Relationships are created only if requested by <ontologyMap/>. When present, include "uco-observable:source" and "uco-observable:target" as {"@id": "..."}, and "uco-core:kindOfRelationship" when applicable. Do not duplicate identical edges.
 
 Ownership & Placement (critical)
-• Place each property on its owner per <ontologyMap/> (class vs facet). Never duplicate the same scalar on both object and facet.
+• Place each property on its owner per <ontologyMap/> (class vs facet). Never duplicate the same scalar on both object and facet. This is the most important rule: double-check every property's location before output.
 • Forbidden on parent File object (unless <ontologyMap/>.classOwnedProps explicitly allows it):
   uco-observable:fileName, filePath, createdTime, modifiedTime, accessedTime, metadataChangeTime, isDirectory, sizeInBytes, extension.
-  These belong on the appropriate facet (typically "uco-observable:FileFacet").
+  These belong on the appropriate facet (typically "uco-observable:FileFacet"); the parent File node carries only "uco-core:hasFacet".
 • Facet creation policy:
   – Use "uco-observable:FileFacet" for generic file attributes.
   – Use "uco-observable:MftRecordFacet" only if at least one MFT‑specific property from <ontologyMap/>.facetOwnedProps is present in inputs (e.g., entry/sequence/parent numbers or other MFT‑specific fields).
-  – Empty facets are forbidden. If a facet would have zero properties after mapping, do not create or reference it.
 • Key normalization:
   – Use "uco-observable:createdTime" (not "observableCreatedTime" or other variants).
   – Use only property IRIs declared in <ontologyMap/>/<customFacets/>. Do not invent substitutes.
@@ -397,13 +568,6 @@ Ownership & Placement (critical)
 • Paths:
   – Escape Windows paths in JSON strings (e.g., "\\\\Windows\\\\Prefetch\\\\...").
 
-CRITICAL REMINDER ON PROPERTY PLACEMENT
-- The MOST IMPORTANT rule is the separation of object and facet properties.
-- A property like `uco-observable:filePath` or `uco-observable:createdTime` MUST NOT appear on a `uco-observable:File` node.
-- These properties MUST be placed on the corresponding facet node (e.g., `uco-observable:FileFacet`).
-- The parent `File` node should ONLY contain the `uco-core:hasFacet` property pointing to its facets.
-- VIOLATING THIS RULE WILL CAUSE IMMEDIATE SYSTEM FAILURE. Double-check every property's location before outputting the graph.
-
 UUID / Identity Rules (CASE/UCO aligned)
 • Every node instance (object, facet, relationship, marking, provenance) has its own unique @id; object and facet IDs are independent.
 • Use the provided <uuidPlan/> for all planned nodes; do not recompute or alter IDs.
@@ -412,28 +576,48 @@ UUID / Identity Rules (CASE/UCO aligned)
 Process (follow in order — skeleton first)
 1) Skeleton — Instantiate one node per planned slot using <slotTypeMap/> + <uuidPlan/>; set only @id and @type.
 2) Facet links — On each parent object, set "uco-core:hasFacet" to reference the planned facet IDs (refs only).
-3) Merge — Map values from <records/> onto the correct nodes per ownership; omit unknowns; never emit nulls; never place owned‑by‑facet properties on the parent object.
+3) Merge — Map values from <records/> onto the correct nodes per Ownership & Placement; omit unknowns (rule 4).
 4) Relationships (if requested) — Create only those specified by <ontologyMap/>; set source/target as {"@id": "..."}; add kindOfRelationship when applicable; avoid duplicates.
 5) Apply feedback — Fix issues from <validatorFeedback/>; drop or adjust fields per <hallucinationFeedback/>.
-6) Finalize — Return only {"@context": {...}, "@graph": [...]}.
+6) Finalize — Return only the node content requested in the user message; @context and the skeleton are attached by the runtime.
 
 Hard Fail Conditions (the runtime will reject your output if any occur)
-• Any parent "uco-observable:File" node contains any of: fileName, filePath, createdTime, modifiedTime, accessedTime, metadataChangeTime, isDirectory, sizeInBytes, extension.
-• Any facet node is referenced from "uco-core:hasFacet" but has zero properties.
-• Any "uco-observable:MftRecordFacet" is emitted without at least one MFT‑specific property from <ontologyMap/>.facetOwnedProps.
-• Any property key not declared in <ontologyMap/>/<customFacets/> is emitted.
-• Any value is null/None/"".
-• Any undeclared prefix is used.
+• A parent File node carries a facet-owned property (Ownership & Placement).
+• A null/empty value, or a referenced facet with zero properties (rule 4).
+• An MftRecordFacet without an MFT‑specific property, or an undeclared property key (Facet creation policy, Key normalization).
+• An undeclared prefix (rule 2).
 
 Notes
 • Be concise; output only what the ontology allows for the given inputs. If a field cannot be mapped, omit it.
-• The examples below are illustrative; always follow <ontologyMap/> and these rules.
+• Worked examples are attached only after a rejected attempt; always follow <ontologyMap/> and these rules.
 
 ----------------------------------------------------------------
+Skeleton Illustration (for understanding only — runtime builds this for you)
+----------------------------------------------------------------
+• For each record, the runtime pre‑allocates one node per planned slot (object/facet/relationship/etc.) using <uuidPlan/> + <slotTypeMap/>. The model must NOT invent or modify @id values.
+• This is how a two‑record skeleton might look (no properties, @type only):
+
+{
+  "@graph": [
+    { "@id": "kb:file-<uuidA>", "@type": "uco-observable:File" },
+    { "@id": "kb:filefacet-<uuidA>", "@type": "uco-observable:FileFacet" },
+
+    { "@id": "kb:file-<uuidB>", "@type": "uco-observable:File" },
+    { "@id": "kb:filefacet-<uuidB>", "@type": "uco-observable:FileFacet" }
+  ]
+}
+
+
+Remember: You map properties onto these pre‑planned nodes ONLY (per ownership in <ontologyMap/>), then link facets via "uco-core:hasFacet" as ID refs.
+"""
+
+_GRAPH_GEN_EXAMPLES_HEADER = """----------------------------------------------------------------
 Few‑shot Examples (illustrative; final output MUST still come from <ontologyMap/>/<customFacets/>)
 ----------------------------------------------------------------
 
-Example A — Two Files with FileFacet (refs‑only hasFacet, no nulls)
+"""
+
+_GRAPH_GEN_EXAMPLE_A = """Example A — Two Files with FileFacet (refs‑only hasFacet, no nulls)
 Input (conceptual): two file records with names, paths, and timestamps.
 
 Expected JSON‑LD:
@@ -480,19 +664,14 @@ Expected JSON‑LD:
     }
   ]
 }
+"""
 
-Example B — File with FileFacet + MftRecordFacet (MFT fields present)
+_GRAPH_GEN_EXAMPLE_B = """Example B — File with FileFacet + MftRecordFacet (MFT fields present)
 Input (conceptual): a record that includes standard file attributes and MFT‑specific fields.
 Note: Replace MFT property IRIs with those provided by <ontologyMap/>. The keys below are illustrative.
 
-Expected JSON‑LD:
+Expected JSON‑LD (same "@context" as Example A; only the "@graph" is shown):
 {
-  "@context": {
-    "kb": "http://example.org/kb/",
-    "uco-core": "https://ontology.unifiedcyberontology.org/uco/core/",
-    "uco-observable": "https://ontology.unifiedcyberontology.org/uco/observable/",
-    "xsd": "http://www.w3.org/2001/XMLSchema#"
-  },
   "@graph": [
     {
       "@id": "kb:file-aaaaaaaa-bbbb-cccc-dddd-eeeeeeeeeeee",
@@ -521,18 +700,13 @@ Expected JSON‑LD:
     }
   ]
 }
+"""
 
-Example C — ObservableRelationship (source/target as @id refs)
+_GRAPH_GEN_EXAMPLE_C = """Example C — ObservableRelationship (source/target as @id refs)
 Input (conceptual): a file communicates with a domain during an interval.
 
-Expected JSON‑LD:
+Expected JSON‑LD (same "@context" as Example A; only the "@graph" is shown):
 {
-  "@context": {
-    "kb": "http://example.org/kb/",
-    "uco-core": "https://ontology.unifiedcyberontology.org/uco/core/",
-    "uco-observable": "https://ontology.unifiedcyberontology.org/uco/observable/",
-    "xsd": "http://www.w3.org/2001/XMLSchema#"
-  },
   "@graph": [
     {
       "@id": "kb:file-h8i9j0k1-l2m3-1234-5678-lm9012345678",
@@ -567,19 +741,13 @@ Expected JSON‑LD:
     }
   ]
 }
+"""
 
-Example D — Registry Key with Custom Extension Facet (project namespace)
+_GRAPH_GEN_EXAMPLE_D = """Example D — Registry Key with Custom Extension Facet (project namespace)
 Input (conceptual): registry key + custom fields. Only include the custom facet if <customFacets/> declares these properties and "@context" declares the prefix.
 
-Expected JSON‑LD:
+Expected JSON‑LD ("@context" as in Example A plus "dfc-ext": "https://www.w3.org/dfc-ext/"; only the "@graph" is shown):
 {
-  "@context": {
-    "kb": "http://example.org/kb/",
-    "uco-core": "https://ontology.unifiedcyberontology.org/uco/core/",
-    "uco-observable": "https://ontology.unifiedcyberontology.org/uco/observable/",
-    "xsd": "http://www.w3.org/2001/XMLSchema#",
-    "dfc-ext": "https://www.w3.org/dfc-ext/"
-  },
   "@graph": [
     {
       "@id": "kb:windowsregistrykey-aaaa1111-bbbb-2222-cccc-333333333333",
@@ -609,28 +777,9 @@ Expected JSON‑LD:
     }
   ]
 }
+"""
 
-----------------------------------------------------------------
-Skeleton Illustration (for understanding only — runtime builds this for you)
-----------------------------------------------------------------
-• For each record, the runtime pre‑allocates one node per planned slot (object/facet/relationship/etc.) using <uuidPlan/> + <slotTypeMap/>. The model must NOT invent or modify @id values.
-• This is how a two‑record skeleton might look (no properties, @type only):
-
-{
-  "@context": { "kb": "...", "uco-core": "...", "uco-observable": "...", "xsd": "..." },
-  "@graph": [
-    { "@id": "kb:file-<uuidA>", "@type": "uco-observable:File" },
-    { "@id": "kb:filefacet-<uuidA>", "@type": "uco-observable:FileFacet" },
-
-    { "@id": "kb:file-<uuidB>", "@type": "uco-observable:File" },
-    { "@id": "kb:filefacet-<uuidB>", "@type": "uco-observable:FileFacet" }
-  ]
-}
-
-
-Remember: You map properties onto these pre‑planned nodes ONLY (per ownership in <ontologyMap/>), then link facets via "uco-core:hasFacet" as ID refs. No property with null should be shown in output Example uco-observable: null (this kind shouldnt be shown)
-
-### Gold Standard Examples
+_GRAPH_GEN_GOLD_EXAMPLES = """### Gold Standard Examples
 
 Use the following 'Gold Standard Examples' as a template for the structure of your output. Pay close attention to the placement of properties on objects and their facets. These examples demonstrate proper CASE/UCO JSON-LD structure from the official CASE Examples repository.
 
@@ -714,5 +863,61 @@ Use the following 'Gold Standard Examples' as a template for the structure of yo
 3. **Facet References**: uco-core:hasFacet contains either @id references to separate facet nodes, or inline facet objects
 4. **Multiple Facets**: Objects can have multiple specialized facets for different aspects of the data
 5. **Proper Typing**: Each facet has its specific @type (e.g., MessageFacet, EmailAccountFacet)
-
 """
+
+# The generator system prompt never varies between calls. It is assembled once at import.
+# The model never writes @context (the runtime attaches CASE_UCO_CONTEXT to the skeleton),
+# so the prompt only lists the declared prefixes, taken from the same constant.
+GRAPH_GENERATOR_AGENT_PROMPT = _tidy_prompt("".join((
+    _GRAPH_GEN_HEADER,
+    ", ".join(CASE_UCO_CONTEXT),
+    _GRAPH_GEN_RULES,
+)))
+
+def _compact_json_blocks(text: str) -> str:
+    """
+    Re-render every JSON value that starts a line in an example compactly: one
+    @graph node per line, no indentation. The wording around it is kept as is.
+    """
+    decoder = json.JSONDecoder()
+    parts, position = [], 0
+    while True:
+        start = text.find("\n{", position)
+        if start == -1:
+            break
+        try:
+            value, end = decoder.raw_decode(text, start + 1)
+        except ValueError:
+            parts.append(text[position:start + 2])
+            position = start + 2
+            continue
+        if isinstance(value, dict) and isinstance(value.get("@graph"), list):
+            head = "".join(
+                f"{json.dumps(key, ensure_ascii=False)}: {json.dumps(item, ensure_ascii=False)},\n"
+                for key, item in value.items() if key != "@graph"
+            )
+            nodes = ",\n".join(json.dumps(node, ensure_ascii=False) for node in value["@graph"])
+            rendered = f'{{{head}"@graph": [\n{nodes}\n]}}'
+        else:
+            rendered = json.dumps(value, ensure_ascii=False)
+        parts.append(text[position:start + 1] + rendered)
+        position = end
+    parts.append(text[position:])
+    return "".join(parts)
+
+
+# Few-shot examples ship only on retries, appended after the stable prompt above.
+# Each is (text, @type prefixes that select it); Example A is always sent because
+# the others reuse its "@context".
+GRAPH_GENERATOR_EXAMPLES_HEADER = _GRAPH_GEN_EXAMPLES_HEADER
+GRAPH_GENERATOR_EXAMPLES = (
+    (_compact_json_blocks(_GRAPH_GEN_EXAMPLE_A), ()),
+    (_compact_json_blocks(_GRAPH_GEN_EXAMPLE_B), ("uco-observable:MftRecordFacet",)),
+    (_compact_json_blocks(_GRAPH_GEN_EXAMPLE_C), ("uco-observable:ObservableRelationship",)),
+    (_compact_json_blocks(_GRAPH_GEN_EXAMPLE_D), ("uco-observable:WindowsRegistryKey", "dfc-ext:")),
+    (_compact_json_blocks(_GRAPH_GEN_GOLD_EXAMPLES), (
+        "uco-observable:ContentData", "uco-observable:RecoveredObject",
+        "uco-observable:Message", "uco-observable:EmailAccount", "uco-observable:DigitalAccount",
+    )),
+)
+
@@ -1,3 +1,6 @@
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
 from langgraph.graph import StateGraph, END, START
 from typing import Literal
 
@@ -11,7 +14,7 @@ from config import llm, SUPERVISOR_AGENT_PROMPT, MAX_GRAPH_GENERATOR_ATTEMPTS
 from agents.supervisor import supervisor_node
 from agents.ontology_researcher import ontology_research_step_node
 from agents.ontology_synthesizer import ontology_synthesis_node
-from agents.custom_facet import custom_facet_node
+from agents.custom_facet import custom_facet_node, unmapped_element_names
 from agents.graph_generator import graph_generator_node
 from agents.validator import validator_node
 from agents.hallucination_checker import hallucination_check_node
@@ -22,26 +25,35 @@ from agents.uuid_planner import uuid_planner_node, invalidate_uuid_plan_node
 
 
 from memory import update_memory_context
+from retry_budget import effective_attempt_cap
 from config import (
+    LOGLEVEL,
     MAX_CUSTOM_FACET_ATTEMPTS,
     MAX_GRAPH_GENERATOR_ATTEMPTS,
     MAX_VALIDATION_ATTEMPTS
 )
 
+# Per-hop routing decisions are logged at DEBUG; run with LOGLEVEL=DEBUG to trace them
+logger = logging.getLogger(__name__)
+if not logger.handlers:
+    _log_handler = logging.StreamHandler()
+    _log_handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_log_handler)
+logger.setLevel(LOGLEVEL)
+
 
 def route_supervisor(state: State) -> str:
     """
     The central supervisor router that directs the workflow and integrates memory.
     This function contains the primary routing logic for the agentic graph.
     """
-    # Update memory context first
-    memory_context = update_memory_context(state)
-    state["memory_context"] = memory_context
+    # Update memory context first; without persisted memory it is always the default text
+    if state.get("memory_persistence"):
+        state["memory_context"] = update_memory_context(state)
 
     # --- NEW GUARDRAIL: Check for critical errors from previous steps ---
     if state.get("graphGeneratorErrors") or "error" in state.get("ontologyMap", {}):
-        print(
-            "❌ [ROUTER] Critical error detected in a previous step. Terminating workflow.")
+        logger.warning("❌ [ROUTER] Critical error detected in a previous step. Terminating workflow.")
         return "__end__"
 
     # Get the latest message to understand the current context
@@ -60,60 +72,67 @@ def route_supervisor(state: State) -> str:
     graph_attempts = state.get("graphGeneratorAttempts", 0)
     validation_attempts = state.get("validationAttempts", 0)
 
+    # Attempt caps shrink for agents whose recent retries rarely succeeded
+    custom_cap = effective_attempt_cap("custom_facet_agent", MAX_CUSTOM_FACET_ATTEMPTS)
+    graph_cap = effective_attempt_cap("graph_generator_agent", MAX_GRAPH_GENERATOR_ATTEMPTS)
+    validation_cap = effective_attempt_cap("validator_agent", MAX_VALIDATION_ATTEMPTS)
+
     # --- Deterministic Routing Logic ---
     if not ontology_markdown_complete:
-        print(
-            "🎯 [ROUTER] State: Ontology markdown not found. -> ontology_research_step_node")
+        logger.debug("🎯 [ROUTER] State: Ontology markdown not found. -> ontology_research_step_node")
         return "ontology_research_step_node"
 
     if not ontology_map_complete:
-        print("🎯 [ROUTER] State: Ontology map not found. -> ontology_synthesis_node")
+        logger.debug("🎯 [ROUTER] State: Ontology map not found. -> ontology_synthesis_node")
         return "ontology_synthesis_node"
 
     if not custom_facets_complete:
-        if custom_attempts < MAX_CUSTOM_FACET_ATTEMPTS:
-            print(
-                "🎯 [ROUTER] State: Custom facets not complete. -> custom_facet_node")
+        if custom_attempts < custom_cap:
+            if state.get("uuidPlan") is None:
+                logger.debug("🎯 [ROUTER] State: Custom facets and UUID plan not complete. -> custom_facet_and_plan_node")
+                return "custom_facet_and_plan_node"
+            logger.debug("🎯 [ROUTER] State: Custom facets not complete. -> custom_facet_node")
             return "custom_facet_node"
         else:
-            print(
-                "⚠️ [ROUTER] State: Max custom facet attempts reached. Proceeding without custom facets.")
+            logger.warning("⚠️ [ROUTER] State: Max custom facet attempts reached. Proceeding without custom facets.")
             # Fall through to the next step even if custom facets fail
 
     # --- Route to UUID Planner if no plan has been created yet ---
     if state.get("uuidPlan") is None:
-        print("🎯 [ROUTER] State: UUID plan is None, running planner. -> uuid_planner_node")
+        logger.debug("🎯 [ROUTER] State: UUID plan is None, running planner. -> uuid_planner_node")
         return "uuid_planner_node"
 
     if not graph_complete:
-        if graph_attempts < MAX_GRAPH_GENERATOR_ATTEMPTS:
-            print("🎯 [ROUTER] State: Graph not complete. -> graph_generator_node")
+        if graph_attempts < graph_cap:
+            logger.debug("🎯 [ROUTER] State: Graph not complete. -> graph_generator_node")
             return "graph_generator_node"
         else:
-            print(
-                "⚠️ [ROUTER] State: Max graph generator attempts reached. -> validator_node")
+            logger.warning("⚠️ [ROUTER] State: Max graph generator attempts reached. -> validator_node")
             return "validator_node"
 
     if not validation_complete:
-        if validation_attempts < MAX_VALIDATION_ATTEMPTS:
+        if validation_attempts < validation_cap:
             # If graph is complete but validation failed, we might need to go back
             validation_feedback = state.get("validation_feedback", "")
             if validation_feedback:
-                print(
-                    "🎯 [ROUTER] State: Validation failed with feedback. -> graph_generator_node")
+                logger.debug("🎯 [ROUTER] State: Validation failed with feedback. -> graph_generator_node")
                 return "graph_generator_node"
             else:
-                print("🎯 [ROUTER] State: Graph not validated. -> validator_node")
+                logger.debug("🎯 [ROUTER] State: Graph not validated. -> validator_node")
                 return "validator_node"
         else:
-            print("⚠️ [ROUTER] State: Max validation attempts reached. -> __end__")
+            logger.warning("⚠️ [ROUTER] State: Max validation attempts reached. -> __end__")
             return "__end__"
 
     # If all steps are complete, finish the workflow
-    print("✅ [ROUTER] State: All steps complete. -> __end__")
+    logger.info("✅ [ROUTER] State: All steps complete. -> __end__")
     return "__end__"
 
 
+# Validator feedback mentioning identifiers means the UUID plan itself is suspect
+_ID_ERROR_RE = re.compile(r"@id|uuid|identifier|reference", re.IGNORECASE)
+
+
 def route_after_validation(state: State) -> Literal["hallucination_check_node", "graph_generator_node", "invalidate_uuid_plan_node", "__end__"]:
     """
     Determines the next step after the structural validation node runs.
@@ -126,20 +145,16 @@ def route_after_validation(state: State) -> Literal["hallucination_check_node",
     if is_clean:
         return "hallucination_check_node"
 
-    if validation_attempts >= MAX_VALIDATION_ATTEMPTS:
-        print("[INFO] [Routing] Max validation attempts reached. Terminating.")
+    if validation_attempts >= effective_attempt_cap("validator_agent", MAX_VALIDATION_ATTEMPTS):
+        logger.info("[Routing] Max validation attempts reached. Terminating.")
         return "__end__"
 
     # Intelligent routing based on feedback content
-    feedback = state.get("validation_feedback", "").lower()
-    id_error_keywords = ["@id", "uuid", "identifier", "reference"]
-    if any(keyword in feedback for keyword in id_error_keywords):
-        print(
-            "🐞 [ROUTER] ID-related error detected. Routing to invalidate and regenerate UUID plan.")
+    if _ID_ERROR_RE.search(state.get("validation_feedback") or ""):
+        logger.debug("🐞 [ROUTER] ID-related error detected. Routing to invalidate and regenerate UUID plan.")
         return "invalidate_uuid_plan_node"
     else:
-        print(
-            "🎯 [ROUTER] Non-ID validation error detected. Routing directly back to generator for correction.")
+        logger.debug("🎯 [ROUTER] Non-ID validation error detected. Routing directly back to generator for correction.")
         return "graph_generator_node"
 
 
@@ -157,11 +172,47 @@ def route_after_hallucination_check(state: State) -> Literal["graph_generator_no
     elif validation_decision == "REGENERATE" and layer2_attempts < 2:
         return "graph_generator_node"
     elif use_fallback:
-        print("[INFO] [Routing] Fallback result is in use. Terminating.")
+        logger.info("[Routing] Fallback result is in use. Terminating.")
         return "__end__"
     else:
         return "supervisor"
 
+# =============================================================================
+# Composite Nodes
+# =============================================================================
+
+
+def custom_facet_and_plan_node(state: State) -> dict:
+    """
+    Runs the UUID planner speculatively while the custom facet agent works.
+    The planner only reads the records and the ontology map, so its plan is
+    kept unless the facet agent changes the ontology map (auto-generated
+    facets need their own slots) or does not complete.
+    """
+    if not unmapped_element_names(state.get("ontologyMap") or {}):
+        # Nothing to extend: the facet agent returns its canned empty result
+        # without an LLM call, so plan directly instead of speculating.
+        print("[INFO] [Speculative Planner] No unmapped elements; planning UUIDs directly.")
+        return {**uuid_planner_node(state), **custom_facet_node(state)}
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        plan_future = pool.submit(uuid_planner_node, state)
+        facet_update = custom_facet_node(state)
+        plan_update = plan_future.result()
+
+    if facet_update.get("customFacets") is None:
+        print("[INFO] [Speculative Planner] Custom facets incomplete; discarding speculative UUID plan.")
+        return facet_update
+
+    if "ontologyMap" in facet_update:
+        print("[INFO] [Speculative Planner] Ontology map changed by custom facets; re-planning UUIDs.")
+        plan_update = uuid_planner_node({**state, **facet_update})
+    else:
+        print("[INFO] [Speculative Planner] Speculative UUID plan committed.")
+
+    return {**plan_update, **facet_update}
+
+
 # =============================================================================
 # Graph Assembly
 # =============================================================================
@@ -171,28 +222,48 @@ print("[INFO] Building the agentic graph...")
 
 builder = StateGraph(State)
 
+# Node name -> node function, registered in one pass
+NODE_FUNCTIONS = {
+    "supervisor": supervisor_node,
+    "ontology_research_step_node": ontology_research_step_node,
+    "ontology_synthesis_node": ontology_synthesis_node,
+    "custom_facet_node": custom_facet_node,
+    "custom_facet_and_plan_node": custom_facet_and_plan_node,
+    "graph_generator_node": graph_generator_node,
+    "validator_node": validator_node,
+    "hallucination_check_node": hallucination_check_node,
+    "uuid_planner_node": uuid_planner_node,
+    "invalidate_uuid_plan_node": invalidate_uuid_plan_node,
+}
+
+# Every destination route_supervisor can return, mapped straight to its node
+SUPERVISOR_ROUTES = {
+    "ontology_research_step_node": "ontology_research_step_node",
+    "ontology_synthesis_node": "ontology_synthesis_node",
+    "custom_facet_node": "custom_facet_node",
+    "custom_facet_and_plan_node": "custom_facet_and_plan_node",
+    "uuid_planner_node": "uuid_planner_node",
+    "graph_generator_node": "graph_generator_node",
+    "validator_node": "validator_node",
+    "__end__": END,
+}
+
 # Add nodes
-builder.add_node("supervisor", supervisor_node)
-builder.add_node("ontology_research_step_node", ontology_research_step_node)
-builder.add_node("ontology_synthesis_node", ontology_synthesis_node)
-builder.add_node("custom_facet_node", custom_facet_node)
-builder.add_node("graph_generator_node", graph_generator_node)
-builder.add_node("validator_node", validator_node)
-builder.add_node("hallucination_check_node", hallucination_check_node)
-builder.add_node("uuid_planner_node", uuid_planner_node)
-builder.add_node("invalidate_uuid_plan_node", invalidate_uuid_plan_node)
+for node_name, node_function in NODE_FUNCTIONS.items():
+    builder.add_node(node_name, node_function)
 
 # Add edges
 builder.set_entry_point("supervisor")
 builder.add_edge("ontology_research_step_node", "supervisor")
 builder.add_edge("ontology_synthesis_node", "supervisor")
 builder.add_edge("custom_facet_node", "supervisor")
+builder.add_edge("custom_facet_and_plan_node", "supervisor")
 builder.add_edge("graph_generator_node", "validator_node")
 builder.add_edge("uuid_planner_node", "graph_generator_node")
 builder.add_edge("invalidate_uuid_plan_node", "uuid_planner_node")
 
 # Add conditional edges
-builder.add_conditional_edges("supervisor", route_supervisor)
+builder.add_conditional_edges("supervisor", route_supervisor, SUPERVISOR_ROUTES)
 builder.add_conditional_edges(
     "validator_node",
     route_after_validation,
@@ -204,7 +275,14 @@ builder.add_conditional_edges(
     },
 )
 builder.add_conditional_edges(
-    "hallucination_check_node", route_after_hallucination_check)
+    "hallucination_check_node",
+    route_after_hallucination_check,
+    {
+        "graph_generator_node": "graph_generator_node",
+        "supervisor": "supervisor",
+        "__end__": END,
+    },
+)
 
 # Compile the graph
 graph = builder.compile()
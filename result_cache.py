@@ -0,0 +1,137 @@
+"""
+Cache of validated workflow results, keyed by the input they were produced from.
+
+A run whose graph passed both validation layers is stored under a hash of its input, the models
+in use and RESULT_CACHE_VERSION. When the same input comes back, the supervisor
+restores the stored results and the workflow ends without any agent or LLM call.
+Entries live in an in-process LRU backed by SQLite so they survive restarts.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import orjson
+
+from config import RESULT_CACHE_PATH, RESULT_CACHE_VERSION, STRONG_LLM_MODEL, llm
+from utils import dumps_json
+
+# State keys restored on a hit; together they satisfy every completion check in route_supervisor
+# and carry both validation layers' verdicts
+RESULT_FIELDS = (
+    "ontologyMarkdown",
+    "ontologyMap",
+    "customFacets",
+    "uuidPlan",
+    "slotTypeMap",
+    "jsonldGraph",
+    "validation_result",
+    "hallucination_result",
+    "l2_valid",
+)
+
+_RESULT_CACHE_SIZE = 128
+_RESULT_TABLE_SQL = (
+    "CREATE TABLE IF NOT EXISTS result_cache (input_key TEXT PRIMARY KEY, result TEXT, created_at REAL)"
+)
+
+_lock = threading.Lock()
+_result_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+
+def _state_input(state: Dict[str, Any]) -> Any:
+    """The input a run was started from: its parsed JSON and its first user message (which carries any metadata)."""
+    first_user_message = None
+    for message in state.get("messages") or ():
+        if isinstance(message, tuple) and message[0] == "user":
+            first_user_message = message[1]
+            break
+        if getattr(message, "type", None) == "human":
+            first_user_message = message.content
+            break
+    raw_input = state.get("rawInputJSON")
+    if raw_input is None and first_user_message is None:
+        return None
+    return [raw_input, first_user_message]
+
+
+def result_cache_key(state: Dict[str, Any]) -> Optional[str]:
+    """Hash of the run's input, models and cache version; None when the state carries no input."""
+    run_input = _state_input(state)
+    if run_input is None:
+        return None
+    payload = {
+        "version": RESULT_CACHE_VERSION,
+        "models": [llm.model_name, STRONG_LLM_MODEL],
+        "input": run_input,
+    }
+    canonical_json = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical_json.encode("utf-8")).hexdigest()
+
+
+def _remember_result(key: str, result: Dict[str, Any]) -> None:
+    """Keep a result in the in-process LRU, evicting beyond the size cap."""
+    with _lock:
+        _result_cache[key] = result
+        _result_cache.move_to_end(key)
+        while len(_result_cache) > _RESULT_CACHE_SIZE:
+            _result_cache.popitem(last=False)
+
+
+def cached_result(state: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Stored result fields for the state's input, from memory first and then from disk."""
+    key = result_cache_key(state)
+    if key is None:
+        return None
+    with _lock:
+        result = _result_cache.get(key)
+        if result is not None:
+            _result_cache.move_to_end(key)
+            return result
+    if not RESULT_CACHE_PATH:
+        return None
+    try:
+        with sqlite3.connect(RESULT_CACHE_PATH) as conn:
+            conn.execute(_RESULT_TABLE_SQL)
+            row = conn.execute("SELECT result FROM result_cache WHERE input_key = ?", (key,)).fetchone()
+    except sqlite3.Error as exc:
+        print(f"[WARNING] [Result Cache] Cache read failed: {exc}")
+        return None
+    if row is None:
+        return None
+    result = orjson.loads(row[0])
+    _remember_result(key, result)
+    return result
+
+
+def store_result(final_state: Dict[str, Any]) -> bool:
+    """Cache a finished run's results if its graph passed both validation layers. Returns True when stored."""
+    if not final_state or not (final_state.get("validation_result") or {}).get("is_clean"):
+        return False
+    if final_state.get("resultFromCache"):
+        return False
+    # A Layer 2 rejection still ends with a clean Layer 1 verdict; never serve that graph again
+    if not final_state.get("l2_valid") or final_state.get("use_fallback_result"):
+        return False
+    if not final_state.get("jsonldGraph") or "error" in final_state["jsonldGraph"]:
+        return False
+    key = result_cache_key(final_state)
+    if key is None:
+        return False
+
+    result = {field: final_state.get(field) for field in RESULT_FIELDS}
+    _remember_result(key, result)
+    if RESULT_CACHE_PATH:
+        try:
+            with sqlite3.connect(RESULT_CACHE_PATH) as conn:
+                conn.execute(_RESULT_TABLE_SQL)
+                conn.execute(
+                    "INSERT OR REPLACE INTO result_cache (input_key, result, created_at) VALUES (?, ?, ?)",
+                    (key, dumps_json(result, indent=False), time.time()),
+                )
+        except sqlite3.Error as exc:
+            print(f"[WARNING] [Result Cache] Cache write failed: {exc}")
+    return True
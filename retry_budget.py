@@ -0,0 +1,79 @@
+"""
+Adaptive attempt caps for the looping agents.
+
+Each agent keeps an exponential moving average of how often its retries end in
+success. When retries stop paying off, the agent's attempt cap shrinks toward a
+single attempt and the workflow proceeds with the data it already has. A shrunk cap
+can no longer produce retries to learn from, so after RETRY_PROBE_INTERVAL runs
+without one the agent gets its full cap back until a retried run is observed.
+"""
+import threading
+from typing import Any, Dict
+
+# Weight of the newest outcome in the moving average
+RETRY_EMA_ALPHA = 0.2
+# Runs without a retry after which a shrunk cap is lifted to probe whether retries pay off again
+RETRY_PROBE_INTERVAL = 10
+
+# agent -> (attempt counter key in State, check that the agent's step completed)
+_RETRYING_AGENTS = {
+    "custom_facet_agent": (
+        "customFacetAttempts",
+        lambda state: state.get("customFacets") is not None,
+    ),
+    "graph_generator_agent": (
+        "graphGeneratorAttempts",
+        lambda state: bool(state.get("jsonldGraph")) and "error" not in state.get("jsonldGraph", {}),
+    ),
+    "validator_agent": (
+        "validationAttempts",
+        lambda state: bool((state.get("validation_result") or {}).get("is_clean")),
+    ),
+}
+
+_lock = threading.Lock()
+# Start optimistic: every agent gets its full configured cap until retries are observed
+_retry_success_ema: Dict[str, float] = {agent: 1.0 for agent in _RETRYING_AGENTS}
+_retried_runs: Dict[str, int] = {agent: 0 for agent in _RETRYING_AGENTS}
+_runs_since_retry: Dict[str, int] = {agent: 0 for agent in _RETRYING_AGENTS}
+
+
+def record_retry_outcome(agent: str, succeeded: bool) -> None:
+    """Fold one retried run's outcome into the agent's moving average."""
+    with _lock:
+        previous = _retry_success_ema.get(agent, 1.0)
+        _retry_success_ema[agent] = (1 - RETRY_EMA_ALPHA) * previous + RETRY_EMA_ALPHA * float(succeeded)
+        _retried_runs[agent] = _retried_runs.get(agent, 0) + 1
+        _runs_since_retry[agent] = 0
+
+
+def record_run(final_state: Dict[str, Any]) -> None:
+    """Record the retry outcome of every agent that needed more than one attempt in a finished run."""
+    # A run served from the result cache ran no agents, so it says nothing about retries
+    if not final_state or final_state.get("resultFromCache"):
+        return
+    for agent, (attempts_key, completed) in _RETRYING_AGENTS.items():
+        if final_state.get(attempts_key, 0) > 1:
+            record_retry_outcome(agent, completed(final_state))
+        else:
+            with _lock:
+                _runs_since_retry[agent] = _runs_since_retry.get(agent, 0) + 1
+
+
+def effective_attempt_cap(agent: str, max_attempts: int) -> int:
+    """Scale the configured cap by the agent's retry success rate, never below one attempt."""
+    with _lock:
+        ema = _retry_success_ema.get(agent, 1.0)
+        probing = _runs_since_retry.get(agent, 0) >= RETRY_PROBE_INTERVAL
+    if probing:
+        return max_attempts
+    return max(1, round(max_attempts * ema))
+
+
+def retry_metrics() -> Dict[str, Dict[str, float]]:
+    """Per-agent retry success average and number of retried runs observed."""
+    with _lock:
+        return {
+            agent: {"retry_success_ema": round(_retry_success_ema[agent], 4), "retried_runs": _retried_runs[agent]}
+            for agent in _retry_success_ema
+        }
@@ -9,7 +9,10 @@ from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
+from config import STREAMING_OUTPUT
+from retry_budget import retry_metrics
 from services import execute_forensic_analysis_session_stream, generate_session_id
+from utils import iter_ndjson
 
 # Create API router
 router = APIRouter()
@@ -47,6 +50,17 @@ async def health_check():
     )
 
 
+@router.get("/metrics")
+async def metrics():
+    """
+    Per-agent retry success averages that drive the adaptive attempt caps.
+
+    Returns:
+        Dict mapping each retrying agent to its retry success EMA and retried run count
+    """
+    return {"retry_budget": retry_metrics()}
+
+
 @router.post("/invoke-streaming")
 async def invoke_streaming_analysis(input_data: AnalysisInput):
     """
@@ -97,6 +111,14 @@ async def invoke_streaming_analysis(input_data: AnalysisInput):
                     # Format as SSE
                     yield f"data: {json.dumps(event_data)}\n\n"
 
+                    # Optionally re-send the final graph one NDJSON line per event
+                    if STREAMING_OUTPUT and event["type"] == "completion":
+                        final_graph = event.get("final_event", {}).get("jsonldGraph") or {}
+                        if isinstance(final_graph.get("@graph"), list):
+                            for line in iter_ndjson(final_graph.get("@context", {}), final_graph["@graph"]):
+                                graph_line = {"type": "graph_line", "session_id": session_id, "line": line.decode("utf-8").rstrip("\n")}
+                                yield f"data: {json.dumps(graph_line)}\n\n"
+
                 # Send completion event
                 yield f"data: {json.dumps({'type': 'stream_complete', 'session_id': session_id})}\n\n"
 
@@ -136,6 +158,7 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "health": "/health",
+            "metrics": "/metrics",
             "streaming_analysis": "/invoke-streaming"
         }
     }
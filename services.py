@@ -5,19 +5,23 @@ Refactored from main.py to separate concerns and enable API integration.
 
 import os
 import uuid
+import asyncio
 import json
 import csv
 import io
 from datetime import datetime
 from pathlib import Path
-from typing import Generator, Dict, Any
+from typing import Generator, Dict, Any, List
 
 # --- LangGraph and LangChain Imports ---
 from langgraph.checkpoint.sqlite import SqliteSaver
 
 # --- Custom Module Imports ---
-from graph import builder
+from graph import graph
 from state import DEFAULT_STATE
+from retry_budget import record_run
+from result_cache import store_result
+from config import BATCH_CONCURRENCY
 
 
 def _normalize_input(input_artifacts: Any) -> Dict[str, Any]:
@@ -38,9 +42,10 @@ def _normalize_input(input_artifacts: Any) -> Dict[str, Any]:
 
     # Check if input is CSV format (string with commas and newlines)
     if isinstance(input_artifacts, str):
-        # Try to detect CSV format by checking for common CSV patterns
-        lines = input_artifacts.strip().split('\n')
-        if len(lines) > 1 and ',' in lines[0]:
+        # Try to detect CSV format by checking for common CSV patterns.
+        # Only the header line is inspected; the body is never split up front.
+        first_line, newline, _ = input_artifacts.strip().partition('\n')
+        if newline and ',' in first_line:
             try:
                 # Attempt to parse as CSV with strict error handling
                 csv_reader = csv.DictReader(io.StringIO(input_artifacts), strict=True)
@@ -79,6 +84,11 @@ def ensure_session_directory() -> Path:
     return session_dir
 
 
+def _session_agent(memory):
+    """Shallow copy of the import-time compiled graph that checkpoints to `memory`; no recompile per session."""
+    return graph.copy(update={"checkpointer": memory})
+
+
 def execute_forensic_analysis_session_stream(
     session_id: str,
     input_artifacts: Any,
@@ -103,8 +113,8 @@ def execute_forensic_analysis_session_stream(
 
     # SqliteSaver provides persistent checkpointing for the session's state.
     with SqliteSaver.from_conn_string(str(db_path)) as memory:
-        # Compile the graph with the session-specific checkpointer.
-        agent = builder.compile(checkpointer=memory)
+        # Bind the graph compiled at import to the session-specific checkpointer.
+        agent = _session_agent(memory)
 
         # Configure the session for LangGraph's stream method.
         config = {"configurable": {"thread_id": session_id},
@@ -228,6 +238,9 @@ def execute_forensic_analysis_session_stream(
                     except (TypeError, ValueError):
                         serializable_final_event[key] = str(value)
 
+            record_run(event)
+            store_result(event)
+
             yield {
                 "type": "completion",
                 "session_id": session_id,
@@ -268,8 +281,8 @@ def execute_forensic_analysis_session(
 
     # SqliteSaver provides persistent checkpointing for the session's state.
     with SqliteSaver.from_conn_string(str(db_path)) as memory:
-        # Compile the graph with the session-specific checkpointer.
-        agent = builder.compile(checkpointer=memory)
+        # Bind the graph compiled at import to the session-specific checkpointer.
+        agent = _session_agent(memory)
 
         # Configure the session for LangGraph's stream method.
         config = {"configurable": {"thread_id": session_id},
@@ -308,6 +321,9 @@ def execute_forensic_analysis_session(
                     print(f"\n--- STEP {step_count} ---")
                     event["messages"][-1].pretty_print()
 
+            record_run(final_event)
+            store_result(final_event)
+
             result = {
                 "session_id": session_id,
                 "final_state": final_event,
@@ -324,6 +340,102 @@ def execute_forensic_analysis_session(
             raise
 
 
+def resume_forensic_analysis_session(session_id: str, show_all_steps: bool = False) -> Dict[str, Any]:
+    """
+    Continues an interrupted session from its last checkpoint.
+
+    Nodes that already completed (ontology research, synthesis, UUID planning) are
+    not re-run; the graph picks up at the step that was pending when the run stopped.
+
+    Args:
+        session_id: ID of a session previously started with execute_forensic_analysis_session
+        show_all_steps: Whether to print detailed step information
+
+    Returns:
+        Dict containing the final analysis result and session information
+    """
+    db_path = ensure_session_directory() / f"{session_id}.db"
+    if not db_path.exists():
+        raise ValueError(f"No checkpoint database found for session '{session_id}'")
+
+    with SqliteSaver.from_conn_string(str(db_path)) as memory:
+        agent = _session_agent(memory)
+        config = {"configurable": {"thread_id": session_id},
+                  "recursion_limit": 300}
+
+        snapshot = agent.get_state(config)
+        if not snapshot.next:
+            print(f"[INFO] Session {session_id} has no pending steps; returning its saved state.")
+            return {
+                "session_id": session_id,
+                "final_state": snapshot.values,
+                "total_steps": 0,
+                "session_db_path": str(db_path)
+            }
+
+        print(f"[INFO] Resuming session {session_id} at {list(snapshot.next)}...")
+        final_event = None
+        step_count = 0
+        # A None input tells LangGraph to continue from the saved checkpoint.
+        for event in agent.stream(None, config=config, stream_mode="values"):
+            step_count += 1
+            final_event = event
+            if show_all_steps and "messages" in event and event["messages"]:
+                print(f"\n--- STEP {step_count} ---")
+                event["messages"][-1].pretty_print()
+
+        record_run(final_event)
+        store_result(final_event)
+        print(f"\n[SUCCESS] Session {session_id} resumed and completed in {step_count} steps.")
+        return {
+            "session_id": session_id,
+            "final_state": final_event,
+            "total_steps": step_count,
+            "session_db_path": str(db_path)
+        }
+
+
+async def execute_forensic_analysis_batch(
+    user_identifier: str,
+    inputs: List[Any],
+    concurrency: int = BATCH_CONCURRENCY
+) -> List[Dict[str, Any]]:
+    """
+    Runs independent inputs (e.g. one record each) through the workflow concurrently.
+
+    Each input gets its own session and checkpoint DB, so no state or UUIDs are shared.
+    A semaphore caps in-flight sessions to stay within the provider's rate limits, and
+    a failing input is reported in place instead of aborting the rest of the batch.
+
+    Args:
+        user_identifier: Prefix used for the generated session IDs
+        inputs: Independent forensic artifacts to analyze
+        concurrency: Maximum number of sessions running at once (BATCH_CONCURRENCY by default)
+
+    Returns:
+        One entry per input, in order: the session result, or a dict with 'error'
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run_one(input_artifacts: Any) -> Dict[str, Any]:
+        async with semaphore:
+            session_id = generate_session_id(user_identifier)
+            # Agent nodes are synchronous; LLM calls are I/O bound, so threads overlap them.
+            return await asyncio.to_thread(execute_forensic_analysis_session, session_id, input_artifacts)
+
+    print(f"[INFO] Executing batch of {len(inputs)} inputs (concurrency={concurrency})...")
+    outcomes = await asyncio.gather(*(run_one(item) for item in inputs), return_exceptions=True)
+
+    results: List[Dict[str, Any]] = []
+    for index, outcome in enumerate(outcomes):
+        if isinstance(outcome, BaseException):
+            print(f"[ERROR] Batch input {index} failed: {outcome}")
+            results.append({"input_index": index, "error": str(outcome)})
+        else:
+            results.append(outcome)
+    return results
+
+
 # Legacy compatibility functions
 def call_forensic_analysis_with_session(
     user_identifier: str,
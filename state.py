@@ -80,6 +80,7 @@ class State(_BaseState, total=False):
     l1_valid: bool
     l2_valid: bool
     uuids_to_invalidate: List[str] | None
+    resultFromCache: bool  # set when the supervisor restored a cached validated result
 
 
 # =============================================================================
@@ -125,4 +126,5 @@ DEFAULT_STATE = {
     "plannerVersion": "v1",
     "sourcePropertyMap": {},
     "uuids_to_invalidate": None,
+    "resultFromCache": False,
 }
@@ -0,0 +1,78 @@
+"""
+Deterministic checks for the shared configuration helpers.
+
+Run with:
+    OPENAI_API_KEY=... PYTHONPATH=. python tests/test_config.py
+"""
+import re
+
+from langchain_core.caches import InMemoryCache
+
+from config import (
+    _TieredLLMCache,
+    CASE_UCO_CONTEXT,
+    CUSTOM_FACET_AGENT_PROMPT,
+    GRAPH_GENERATOR_AGENT_PROMPT,
+    ONTOLOGY_RESEARCH_AGENT_PROMPT,
+    SUPERVISOR_AGENT_PROMPT,
+)
+
+
+def test_llm_cache_tiers_and_whitespace():
+    """Prompts are keyed verbatim, and backend hits are promoted to memory."""
+    print("=" * 60)
+    print("TESTING: Config - LLM Response Cache")
+    print("=" * 60)
+
+    backend = InMemoryCache()
+    cache = _TieredLLMCache(backend, max_entries=1)
+    cache.update('[{"content": "C:\\My  Files\\a.txt"}]', "gpt", ["answer"])
+
+    assert cache.lookup('[{"content": "C:\\My  Files\\a.txt"}]', "gpt") == ["answer"]
+    assert cache.lookup('[{"content": "C:\\My  Files\\a.txt"}]', "other-model") is None
+    # Spacing inside an evidence value is data, not formatting
+    assert cache.lookup('[{"content": "C:\\My Files\\a.txt"}]', "gpt") is None
+
+    # Evicted from the one-entry hot layer, still served by the backend
+    cache.update("second prompt", "gpt", ["second"])
+    assert cache.lookup('[{"content": "C:\\My  Files\\a.txt"}]', "gpt") == ["answer"]
+
+    cache.clear()
+    assert cache.lookup("second prompt", "gpt") is None
+
+    print("✅ LLM cache test passed!")
+
+
+def test_prompts_carry_no_padding():
+    """Agent prompts have no indentation padding, trailing spaces or restated rules."""
+    prompts = (SUPERVISOR_AGENT_PROMPT, ONTOLOGY_RESEARCH_AGENT_PROMPT, CUSTOM_FACET_AGENT_PROMPT, GRAPH_GENERATOR_AGENT_PROMPT)
+    for prompt in prompts:
+        assert prompt == prompt.strip()
+        assert " \n" not in prompt and "\n\n\n" not in prompt
+    assert not any(line.startswith(" ") for line in SUPERVISOR_AGENT_PROMPT.splitlines())
+    # Each generator rule is stated once; later sections refer back to it
+    assert GRAPH_GENERATOR_AGENT_PROMPT.count("No nulls") == 1
+    assert GRAPH_GENERATOR_AGENT_PROMPT.count("fileName, filePath, createdTime") == 1
+    assert "CRITICAL REMINDER" not in GRAPH_GENERATOR_AGENT_PROMPT
+    # The planner shares identical facet slots across records; the prompt must allow it
+    assert "SHARED SLOTS ARE INTENTIONAL" in GRAPH_GENERATOR_AGENT_PROMPT
+    assert "Do NOT reuse entities across different records" not in GRAPH_GENERATOR_AGENT_PROMPT
+
+    print("✅ Prompt padding test passed!")
+
+
+def test_generator_prefixes_are_declared():
+    """Every prefix the generator prompt tells the model to use is in the declared list it is given."""
+    declared = GRAPH_GENERATOR_AGENT_PROMPT.split("Declared prefixes: ", 1)[1].split(".\n", 1)[0].split(", ")
+    assert declared == list(CASE_UCO_CONTEXT)
+    assert {"uco-core", "uco-observable", "xsd"} <= set(declared)
+    used = set(re.findall(r'"([a-z][a-z0-9-]*):[A-Za-z<]', GRAPH_GENERATOR_AGENT_PROMPT))
+    assert used and used <= set(declared)
+
+    print("✅ Declared prefix test passed!")
+
+
+if __name__ == "__main__":
+    test_llm_cache_tiers_and_whitespace()
+    test_prompts_carry_no_padding()
+    test_generator_prefixes_are_declared()
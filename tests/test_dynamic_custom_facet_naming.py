@@ -8,7 +8,7 @@ Run with:
     OPENAI_API_KEY=... PYTHONPATH=. python tests/test_dynamic_custom_facet_naming.py
 """
 import json
-from agents.custom_facet import _generate_extension_facet_name, _auto_generate_custom_facets
+from agents.custom_facet import _generate_extension_facet_name, _auto_generate_custom_facets, render_ttl
 
 
 def test_naming_function_basic_cases():
@@ -244,6 +244,29 @@ def test_domain_agnostic_functionality():
 
     print("✅ Domain-agnostic functionality test passed!")
 
+def test_render_ttl_from_llm_facet_definitions():
+    """LLM facetDefinitions render to the same TTL stubs as the deterministic path."""
+    facet_definitions = {
+        "AntivirusScanExtensionFacet": {
+            "namespace": "dfc-ext",
+            "properties": {
+                "dfc-ext:engineVersion": {"dataType": "xsd:string"},
+                "dfc-ext:threatCount": {"dataType": "xsd:integer"},
+                "scanLabel": {},
+            },
+        }
+    }
+    ttl = render_ttl(facet_definitions, "Antivirus Scan")
+
+    assert ttl.startswith("@prefix dfc-ext:")
+    assert "dfc-ext:AntivirusScanExtensionFacet\n  a owl:Class ;" in ttl
+    assert "Extension facet for Antivirus Scan" in ttl
+    assert "dfc-ext:threatCount\n  a owl:DatatypeProperty ;" in ttl
+    assert "rdfs:range xsd:integer" in ttl
+    assert "dfc-ext:scanLabel\n  a owl:DatatypeProperty ;\n  rdfs:domain dfc-ext:AntivirusScanExtensionFacet ;\n  rdfs:range xsd:string" in ttl
+
+    print("✅ TTL rendering test passed!")
+
 
 if __name__ == "__main__":
     try:
@@ -253,6 +276,7 @@ if __name__ == "__main__":
         test_auto_generation_windows_prefetch()
         test_auto_generation_unknown_artifact()
         test_domain_agnostic_functionality()
+        test_render_ttl_from_llm_facet_definitions()
 
         print("\n" + "="*60)
         print("🎉 ALL DYNAMIC NAMING TESTS PASSED!")
@@ -11,6 +11,7 @@ from pathlib import Path
 
 from langchain_core.messages import HumanMessage
 
+import agents.ontology_researcher as researcher
 from agents.ontology_researcher import ontology_research_step_node
 from state import State
 
@@ -43,5 +44,54 @@ def run() -> None:
         print(json.dumps(result_state, indent=2))
 
 
+def test_research_cache_survives_restart(tmp_path=None):
+    """Reports persist on disk, are promoted back to memory, and expire after the TTL."""
+    import tempfile
+
+    directory = tmp_path or Path(tempfile.mkdtemp())
+    saved = (researcher.RESEARCH_CACHE_PATH, researcher.RESEARCH_CACHE_TTL_SECONDS)
+    researcher.RESEARCH_CACHE_PATH = str(Path(directory) / "research.db")
+    try:
+        researcher._store_research("shape-a", "# report A")
+        researcher._research_cache.clear()  # simulate a new process
+
+        assert researcher._cached_research("shape-a") == "# report A"
+        assert "shape-a" in researcher._research_cache
+        assert researcher._cached_research("shape-b") is None
+
+        researcher._research_cache.clear()
+        researcher.RESEARCH_CACHE_TTL_SECONDS = -1
+        assert researcher._cached_research("shape-a") is None
+    finally:
+        researcher.RESEARCH_CACHE_PATH, researcher.RESEARCH_CACHE_TTL_SECONDS = saved
+        researcher._research_cache.clear()
+
+    print("✅ Research cache persistence test passed!")
+
+
+def test_research_cache_key_includes_metadata():
+    """Identically shaped inputs of different artifact types never share a research report."""
+    prefetch = {"artifact_type": "Windows Prefetch", "source": "Endpoint export", "record": {"name": "a.exe", "count": 3}}
+    amcache = {**prefetch, "artifact_type": "Amcache"}
+    assert researcher.research_cache_key(prefetch) != researcher.research_cache_key(amcache)
+    assert researcher.research_cache_key(prefetch) == researcher.research_cache_key({**prefetch, "record": {"name": "b.exe", "count": 9}})
+
+    # Non-CSV input carries its metadata as the header lines of the user message
+    records = [{"name": "a.exe", "count": 3}]
+    header = "Artifact Type: {}\nSource: Endpoint export\n\n[{{\"name\": \"a.exe\", \"count\": 3}}]"
+    assert researcher.research_cache_key(records, header.format("Windows Prefetch")) != researcher.research_cache_key(records, header.format("Amcache"))
+
+    saved = researcher.RESEARCH_CACHE_PATH
+    researcher.RESEARCH_CACHE_PATH = ""
+    try:
+        researcher._store_research(researcher.research_cache_key(prefetch), "# prefetch report")
+        assert researcher._cached_research(researcher.research_cache_key(amcache)) is None
+    finally:
+        researcher.RESEARCH_CACHE_PATH = saved
+        researcher._research_cache.clear()
+
+    print("✅ Research cache key test passed!")
+
+
 if __name__ == "__main__":
     run()
@@ -0,0 +1,89 @@
+"""
+Deterministic checks for the validated result cache.
+
+Run with:
+    OPENAI_API_KEY=... PYTHONPATH=. python tests/test_result_cache.py
+"""
+import os
+import tempfile
+
+import result_cache
+import retry_budget
+from agents.supervisor import supervisor_node
+
+
+def _finished_state(records):
+    return {
+        "messages": [("user", "records")],
+        "rawInputJSON": {"records": records},
+        "ontologyMarkdown": "# report",
+        "ontologyMap": {"classes": ["File"]},
+        "customFacets": {},
+        "uuidPlan": [{"file": "kb:file-1"}],
+        "slotTypeMap": {"kb:file-1": "uco-observable:File"},
+        "jsonldGraph": {"@graph": [{"@id": "kb:file-1", "@type": "uco-observable:File"}]},
+        "validation_result": {"is_clean": True},
+        "hallucination_result": {"validation_decision": "PASS"},
+        "l2_valid": True,
+    }
+
+
+def test_validated_result_reused_from_disk():
+    """A validated run is restored for the same input after the in-process cache is gone."""
+    print("=" * 60)
+    print("TESTING: Result Cache - Disk Round Trip")
+    print("=" * 60)
+
+    original_path = result_cache.RESULT_CACHE_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        result_cache.RESULT_CACHE_PATH = os.path.join(tmp, "results.db")
+        try:
+            finished = _finished_state([{"fileName": "a.txt"}])
+            assert result_cache.store_result(finished)
+            result_cache._result_cache.clear()
+
+            fresh = {"messages": [("user", "records")], "rawInputJSON": {"records": [{"fileName": "a.txt"}]}}
+            restored = supervisor_node(fresh)
+            assert restored == {**{field: finished[field] for field in result_cache.RESULT_FIELDS}, "resultFromCache": True}
+            assert restored["l2_valid"] is True and restored["hallucination_result"]["validation_decision"] == "PASS"
+
+            # A run served from the cache is neither re-stored nor counted as a retry-free run
+            served = {**fresh, **restored}
+            before = retry_budget.retry_metrics()
+            probe_counts = dict(retry_budget._runs_since_retry)
+            retry_budget.record_run(served)
+            assert retry_budget.retry_metrics() == before and retry_budget._runs_since_retry == probe_counts
+            assert not result_cache.store_result(served)
+
+            # A different input, or a run that never validated, is not served from the cache
+            assert result_cache.cached_result({**fresh, "rawInputJSON": {"records": [{"fileName": "b.txt"}]}}) is None
+            failed = {**_finished_state([{"fileName": "c.txt"}]), "validation_result": {"is_clean": False}}
+            assert not result_cache.store_result(failed)
+            rejected = {
+                **_finished_state([{"fileName": "d.txt"}]),
+                "l2_valid": False,
+                "use_fallback_result": True,
+                "layer2_final_status": "FAILED_WITH_LEARNING",
+            }
+            assert not result_cache.store_result(rejected)
+            assert result_cache.cached_result(rejected) is None
+        finally:
+            result_cache.RESULT_CACHE_PATH = original_path
+            result_cache._result_cache.clear()
+
+    print("✅ Result cache test passed!")
+
+
+def test_cache_key_ignores_key_order():
+    """Inputs that differ only in key order share a cache key."""
+    one = {"rawInputJSON": {"a": 1, "b": [1, 2]}}
+    two = {"rawInputJSON": {"b": [1, 2], "a": 1}}
+    assert result_cache.result_cache_key(one) == result_cache.result_cache_key(two)
+    assert result_cache.result_cache_key({"messages": []}) is None
+
+    print("✅ Result cache key test passed!")
+
+
+if __name__ == "__main__":
+    test_validated_result_reused_from_disk()
+    test_cache_key_ignores_key_order()
@@ -0,0 +1,86 @@
+"""
+Deterministic checks for the adaptive attempt caps.
+
+Run with:
+    PYTHONPATH=. python tests/test_retry_budget.py
+"""
+import retry_budget
+from retry_budget import effective_attempt_cap, record_run, retry_metrics
+
+
+def test_caps_shrink_when_retries_fail():
+    """Failed retries pull the cap toward one attempt; successes restore it."""
+    print("=" * 60)
+    print("TESTING: Retry Budget - Adaptive Caps")
+    print("=" * 60)
+
+    retry_budget._retry_success_ema["graph_generator_agent"] = 1.0
+    assert effective_attempt_cap("graph_generator_agent", 3) == 3
+
+    failed_run = {"graphGeneratorAttempts": 3, "jsonldGraph": {}, "customFacetAttempts": 1}
+    for _ in range(10):
+        record_run(failed_run)
+    assert effective_attempt_cap("graph_generator_agent", 3) == 1
+    assert retry_metrics()["graph_generator_agent"]["retried_runs"] >= 10
+
+    recovered_run = {"graphGeneratorAttempts": 2, "jsonldGraph": {"@graph": [{"@id": "kb:x"}]}}
+    for _ in range(20):
+        record_run(recovered_run)
+    assert effective_attempt_cap("graph_generator_agent", 3) == 3
+
+    # Runs that never retried leave the averages untouched.
+    before = retry_metrics()["custom_facet_agent"]
+    record_run({"customFacetAttempts": 1, "customFacets": None})
+    assert retry_metrics()["custom_facet_agent"] == before
+    retry_budget._retry_success_ema["graph_generator_agent"] = 1.0
+    retry_budget._runs_since_retry.update(dict.fromkeys(retry_budget._runs_since_retry, 0))
+
+    print("✅ Adaptive cap test passed!")
+
+
+def _run_validation_loop(retry_succeeds):
+    """Drive route_after_validation as the graph would; return the finished run's state."""
+    from graph import route_after_validation
+
+    state = {"validationAttempts": 1, "validation_result": {"is_clean": False}, "validation_feedback": "Empty value"}
+    while route_after_validation(state) != "__end__":
+        state["validationAttempts"] += 1
+        if retry_succeeds:
+            state["validation_result"] = {"is_clean": True}
+            break
+    return state
+
+
+def test_shrunk_cap_recovers_through_probe():
+    """A cap shrunk to one attempt is lifted periodically, so successful retries can restore it."""
+    retry_budget._retry_success_ema["validator_agent"] = 1.0
+    retry_budget._runs_since_retry["validator_agent"] = 0
+
+    for _ in range(4):
+        record_run(_run_validation_loop(retry_succeeds=False))
+    assert effective_attempt_cap("validator_agent", 3) == 1
+
+    # With the cap at one the router ends after the first attempt, which teaches the average nothing
+    ema_before = retry_metrics()["validator_agent"]["retry_success_ema"]
+    for _ in range(retry_budget.RETRY_PROBE_INTERVAL - 1):
+        finished = _run_validation_loop(retry_succeeds=True)
+        assert finished["validationAttempts"] == 1
+        record_run(finished)
+    assert retry_metrics()["validator_agent"]["retry_success_ema"] == ema_before
+
+    # The probe run may retry again; its success feeds the average and the probe window restarts
+    for _ in range(10):
+        finished = _run_validation_loop(retry_succeeds=True)
+        record_run(finished)
+    assert finished["validationAttempts"] == 2
+    assert effective_attempt_cap("validator_agent", 3) == 3
+
+    retry_budget._retry_success_ema["validator_agent"] = 1.0
+    retry_budget._runs_since_retry.update(dict.fromkeys(retry_budget._runs_since_retry, 0))
+
+    print("✅ Probe recovery test passed!")
+
+
+if __name__ == "__main__":
+    test_caps_shrink_when_retries_fail()
+    test_shrunk_cap_recovers_through_probe()
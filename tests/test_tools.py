@@ -0,0 +1,82 @@
+"""
+Deterministic checks for the UUID allocation helpers and ontology tools in tools.py.
+
+Run with:
+    PYTHONPATH=. python tests/test_tools.py
+"""
+import uuid
+
+from tools import (
+    analyze_case_uco_classes_batch,
+    generate_uuid,
+    list_case_uco_classes_batch,
+    make_paired_ids,
+    make_uuid,
+    make_uuids,
+    plan_record_uuids,
+)
+
+
+def test_bulk_uuids_are_valid_v4():
+    """Batched identifiers are unique RFC 4122 version 4 UUIDs."""
+    print("=" * 60)
+    print("TESTING: Tools - Bulk UUID Allocation")
+    print("=" * 60)
+
+    ids = make_uuids("file", 500)
+    assert len(set(ids)) == 500
+    for identifier in ids:
+        assert identifier.startswith("kb:file-")
+        parsed = uuid.UUID(identifier[len("kb:file-"):])
+        assert parsed.version == 4 and parsed.variant == uuid.RFC_4122
+    assert make_uuids("file", 0) == []
+
+    print("✅ Bulk UUID test passed!")
+
+
+def test_single_uuid_helpers_are_valid_v4():
+    """Single-id helpers format v4 UUIDs directly and keep their id shapes."""
+    tool_id = generate_uuid.invoke({"entity_type": "filefacet"})
+    assert tool_id.startswith("kb:filefacet-")
+    assert uuid.UUID(tool_id[len("kb:filefacet-"):]).version == 4
+
+    assert uuid.UUID(make_uuid("process", "case-investigation:")[len("case-investigation:process-"):]).version == 4
+    obj_id, facet_id = make_paired_ids("file")
+    assert facet_id == obj_id.replace("kb:file-", "kb:filefacet-")
+
+    print("✅ Single UUID helper test passed!")
+
+
+def test_plan_record_uuids_pairs_facets():
+    """A class and its facet share one suffix; each record gets fresh ones."""
+    plan = plan_record_uuids(3, ["File", "Relationship"], ["FileFacet"])
+
+    assert len(plan) == 3
+    for rec in plan:
+        assert list(rec.keys()) == ["File", "FileFacet", "Relationship"]
+        assert rec["FileFacet"] == rec["File"].replace("kb:File-", "kb:Filefacet-")
+    assert len({rec["File"] for rec in plan}) == 3
+
+    print("✅ Record UUID plan test passed!")
+
+
+def test_batched_class_search_dedupes():
+    """One batch call lists each class once and reports keywords without matches."""
+    result = list_case_uco_classes_batch.invoke({"filter_terms": ["prefetch", "File", "file", "zzzq"]})
+
+    assert result.count(". WindowsPrefetch ") == 1
+    assert "WindowsPrefetchFacet  [prefetch]" in result
+    assert " File  [File]" in result
+    assert "No matches for: zzzq." in result
+
+    analysis = analyze_case_uco_classes_batch.invoke({"class_names": ["File", "File", "FileFacet"], "output_format": "summary"})
+    assert analysis.count("### File\n") == 1 and "### FileFacet\n" in analysis
+
+    print("✅ Batched class search test passed!")
+
+
+if __name__ == "__main__":
+    test_bulk_uuids_are_valid_v4()
+    test_single_uuid_helpers_are_valid_v4()
+    test_plan_record_uuids_pairs_facets()
+    test_batched_class_search_dedupes()
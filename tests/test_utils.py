@@ -0,0 +1,106 @@
+"""
+Deterministic checks for the shared helpers in utils.py.
+
+Run with:
+    PYTHONPATH=. python tests/test_utils.py
+"""
+from utils import extract_first_json, build_facet_placement, facet_for_property, dumps_json, iter_ndjson, input_shape_key
+
+
+def test_extract_first_json_from_llm_reply():
+    """The first balanced JSON value is returned, ignoring braces inside strings."""
+    print("=" * 60)
+    print("TESTING: Utils - JSON Extraction")
+    print("=" * 60)
+
+    reply = 'Here you go:\n```json\n{"@graph": [{"note": "a } brace", "path": "C:\\\\x"}]}\n```\nDone.'
+    assert extract_first_json(reply) == {"@graph": [{"note": "a } brace", "path": "C:\\x"}]}
+
+    # Arrays are found too, and prose before it with a stray brace is skipped.
+    assert extract_first_json('see {not json} then [1, 2, {"a": "]"}]') == [1, 2, {"a": "]"}]
+    assert extract_first_json('[1] and {"a": 1}', "{") == {"a": 1}
+
+    print("✅ JSON extraction test passed!")
+
+
+def test_extract_first_json_without_json():
+    """A ValueError is raised when no JSON value is present."""
+    for text in ("", "no json here", "{ unterminated"):
+        try:
+            extract_first_json(text)
+        except ValueError:
+            continue
+        raise AssertionError(f"Expected ValueError for {text!r}")
+
+    print("✅ Missing JSON test passed!")
+
+
+def test_dumps_json_matches_stdlib_layout():
+    """orjson output keeps the 2-space layout and falls back for oversized ints."""
+    import json
+
+    payload = {"@graph": [{"@id": "kb:file-1", "sizeInBytes": 42, "tags": []}], "ok": True}
+    assert dumps_json(payload) == json.dumps(payload, indent=2)
+    assert dumps_json(payload, indent=False) == '{"@graph":[{"@id":"kb:file-1","sizeInBytes":42,"tags":[]}],"ok":true}'
+    assert dumps_json({"big": 2 ** 70}) == json.dumps({"big": 2 ** 70}, indent=2)
+
+    print("✅ JSON dump test passed!")
+
+
+def test_iter_ndjson_lines():
+    """NDJSON output is a context header followed by one line per node."""
+    import json
+
+    nodes = [{"@id": "kb:file-1", "@type": "uco-observable:File"}, {"@id": "kb:filefacet-1"}]
+    lines = list(iter_ndjson({"kb": "http://example.org/kb/"}, iter(nodes)))
+
+    assert len(lines) == 3 and all(line.endswith(b"\n") for line in lines)
+    assert json.loads(lines[0]) == {"@context": {"kb": "http://example.org/kb/"}}
+    assert [json.loads(line) for line in lines[1:]] == nodes
+
+    print("✅ NDJSON test passed!")
+
+
+def test_input_shape_key_ignores_values():
+    """Payloads with the same keys and value types share a key; schema changes do not."""
+    one = {"records": [{"fileName": "a.txt", "size": 1}]}
+    many = {"records": [{"size": 99, "fileName": "b.txt"}, {"fileName": "c.txt", "size": 7}]}
+    assert input_shape_key(one) == input_shape_key(many)
+    assert input_shape_key(one) != input_shape_key({"records": [{"fileName": "a.txt", "size": "1"}]})
+    assert input_shape_key(one) != input_shape_key({"records": [{"fileName": "a.txt"}]})
+
+    print("✅ Input shape key test passed!")
+
+
+def test_facet_placement_table():
+    """Facet-owned properties resolve to their facet unless the class lists them."""
+    print("=" * 60)
+    print("TESTING: Utils - Facet Placement Table")
+    print("=" * 60)
+
+    ontology_map = {
+        "properties": {
+            "File": ["fileName"],
+            "FileFacet": ["fileName", "filePath"],
+            "ContentDataFacet": ["hash"],
+        }
+    }
+    placement = build_facet_placement(ontology_map)
+
+    assert facet_for_property(placement, "uco-observable:File", "uco-observable:filePath") == "FileFacet"
+    assert facet_for_property(placement, "uco-observable:File", "uco-observable:fileName") is None
+    # Types not in the map fall back to the facet-first default.
+    assert facet_for_property(placement, "uco-observable:Message", "fileName") == "FileFacet"
+    assert facet_for_property(placement, "uco-observable:File", "uco-core:name") is None
+    assert build_facet_placement({}) == {}
+
+    print("✅ Facet placement test passed!")
+
+
+if __name__ == "__main__":
+    test_extract_first_json_from_llm_reply()
+    test_extract_first_json_without_json()
+    test_dumps_json_matches_stdlib_layout()
+    test_iter_ndjson_lines()
+    test_input_shape_key_ignores_values()
+    test_facet_placement_table()
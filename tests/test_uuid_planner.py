@@ -0,0 +1,159 @@
+"""
+Deterministic checks for the UUID planner helpers.
+
+Run with:
+    PYTHONPATH=. python tests/test_uuid_planner.py
+"""
+from agents.uuid_planner import (
+    _match_property,
+    _prepare_property_index,
+    _prepare_property_lookup,
+    invalidate_uuid_plan_node,
+    uuid_planner_node,
+)
+
+
+ONTOLOGY_PROPERTIES = {
+    "File": [],
+    "FileFacet": ["fileName", "filePath", "sizeInBytes", "createdTime"],
+    "MftRecordFacet": ["mftFileID", "mftParentID", "mftFileNameCreatedTime"],
+}
+
+
+def test_alias_lookup_matches_linear_scan_order():
+    """Aliases resolve to the first indexed property, regardless of alias order."""
+    print("=" * 60)
+    print("TESTING: UUID Planner - Alias Lookup")
+    print("=" * 60)
+
+    index = _prepare_property_index(ONTOLOGY_PROPERTIES)
+    lookup = _prepare_property_lookup(index)
+
+    # "si_created" lists mftFileNameCreatedTime before createdTime, but
+    # createdTime is indexed first (FileFacet precedes MftRecordFacet).
+    assert _match_property("si_created", index, lookup) == ("filefacet", "createdTime")
+    assert _match_property("entrynumber", index, lookup) == ("mftrecordfacet", "mftFileID")
+    assert _match_property("filename", index, lookup) == ("filefacet", "fileName")
+    # Lookup is optional and rebuilt on demand.
+    assert _match_property("fullpath", index) == ("filefacet", "filePath")
+
+    print("✅ Alias lookup test passed!")
+
+
+def test_token_fallback_when_no_alias():
+    """Keys without aliases fall back to token overlap scoring."""
+    index = _prepare_property_index(ONTOLOGY_PROPERTIES)
+    lookup = _prepare_property_lookup(index)
+
+    assert _match_property("file_path", index, lookup) == ("filefacet", "filePath")
+    assert _match_property("zzz", index, lookup) == (None, None)
+
+    print("✅ Token fallback test passed!")
+
+
+def test_planner_shares_slot_type_strings():
+    """Slot types for repeated records point at one shared string object."""
+    state = {
+        "rawInputJSON": {"records": [{"fileName": "a.txt"}, {"fileName": "b.txt"}]},
+        "ontologyMap": {"classes": ["File"], "facets": ["FileFacet"], "properties": ONTOLOGY_PROPERTIES},
+    }
+    result = uuid_planner_node(state)
+
+    plan = result["uuidPlan"]
+    slot_types = result["slotTypeMap"]
+    assert len(plan) == 2
+    assert list(plan[0].keys()) == ["file", "filefacet"]
+    first_types = [slot_types[uuid] for uuid in plan[0].values()]
+    second_types = [slot_types[uuid] for uuid in plan[1].values()]
+    assert first_types == ["uco-observable:File", "uco-observable:FileFacet"]
+    assert all(a is b for a, b in zip(first_types, second_types))
+
+    print("✅ Planner slot type sharing test passed!")
+
+
+def test_planner_collapses_identical_records():
+    """Identical records share one plan row instead of duplicating @ids."""
+    record = {"fileName": "a.txt", "filePath": "C:\\a.txt"}
+    state = {
+        "rawInputJSON": {"records": [record, {"fileName": "b.txt"}, dict(record)]},
+        "ontologyMap": {"classes": ["File"], "facets": ["FileFacet"], "properties": ONTOLOGY_PROPERTIES},
+    }
+    result = uuid_planner_node(state)
+
+    assert len(result["uuidPlan"]) == 2
+    assert len(result["recordFingerprints"]) == len(set(result["recordFingerprints"])) == 2
+    all_ids = [uuid for row in result["uuidPlan"] for uuid in row.values()]
+    assert len(all_ids) == len(set(all_ids))
+
+    print("✅ Duplicate record collapse test passed!")
+
+
+def test_identical_facets_shared_across_records():
+    """Facets with identical content get one node, linked from every record that has it."""
+    from agents.graph_generator import build_skeleton
+
+    state = {
+        "rawInputJSON": {"records": [{"fileName": "a.txt", "entrynumber": 5}, {"fileName": "b.txt", "entrynumber": 5}]},
+        "ontologyMap": {"classes": ["File"], "facets": ["FileFacet", "MftRecordFacet"], "properties": ONTOLOGY_PROPERTIES},
+    }
+    result = uuid_planner_node(state)
+    first, second = result["uuidPlan"]
+
+    assert first["mftrecordfacet"] == second["mftrecordfacet"]
+    assert first["filefacet"] != second["filefacet"]
+    assert len(result["slotTypeMap"]) == len(result["sourcePropertyMap"]) == 5
+
+    nodes = build_skeleton(result["uuidPlan"], result["slotTypeMap"], result["sourcePropertyMap"])["@graph"]
+    assert len(nodes) == len({node["@id"] for node in nodes}) == 5
+    links = [node["uco-core:hasFacet"] for node in nodes if "uco-core:hasFacet" in node]
+    assert all({"@id": first["mftrecordfacet"]} in refs for refs in links) and len(links) == 2
+
+    print("✅ Shared facet test passed!")
+
+
+def test_speculative_plan_committed_with_custom_facets():
+    """The plan built alongside the facet agent matches a sequential planner run."""
+    from graph import custom_facet_and_plan_node
+
+    state = {
+        "messages": [],
+        "rawInputJSON": {"records": [{"fileName": "a.txt"}, {"fileName": "b.txt"}]},
+        "ontologyMap": {"classes": ["File"], "facets": ["FileFacet"], "properties": ONTOLOGY_PROPERTIES},
+    }
+    result = custom_facet_and_plan_node(state)
+
+    assert result["customFacets"] == {}
+    assert result["customState"]["customFacetsNeeded"] is False
+    assert result["uuidPlan"] == uuid_planner_node(state)["uuidPlan"]
+
+    print("✅ Speculative planner test passed!")
+
+
+def test_partial_invalidation_keeps_ids_unique():
+    """Re-planning after a partial invalidation pairs each kept row with its own record."""
+    state = {
+        "rawInputJSON": {"records": [{"fileName": "a.txt"}, {"fileName": "b.txt"}, {"fileName": "c.txt"}]},
+        "ontologyMap": {"classes": ["File"], "facets": ["FileFacet"], "properties": ONTOLOGY_PROPERTIES},
+    }
+    planned = uuid_planner_node(state)
+    state.update(planned)
+
+    state.update(invalidate_uuid_plan_node({**state, "uuids_to_invalidate": [planned["uuidPlan"][1]["file"]]}))
+    assert len(state["uuidPlan"]) == len(state["recordFingerprints"]) == 2
+
+    replanned = uuid_planner_node(state)
+    primary_ids = [row["file"] for row in replanned["uuidPlan"]]
+    assert len(primary_ids) == len(set(primary_ids)) == 3
+    assert replanned["uuidPlan"] == planned["uuidPlan"]
+
+    print("✅ Partial invalidation test passed!")
+
+
+if __name__ == "__main__":
+    test_alias_lookup_matches_linear_scan_order()
+    test_token_fallback_when_no_alias()
+    test_planner_shares_slot_type_strings()
+    test_planner_collapses_identical_records()
+    test_identical_facets_shared_across_records()
+    test_speculative_plan_committed_with_custom_facets()
+    test_partial_invalidation_keeps_ids_unique()
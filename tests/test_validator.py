@@ -0,0 +1,170 @@
+"""
+Deterministic checks for the programmatic Layer 1 validation helpers.
+
+Run with:
+    OPENAI_API_KEY=... PYTHONPATH=. python tests/test_validator.py
+"""
+from agents.validator import (
+    _cached_layer1_checks,
+    _extract_node_ids,
+    _find_duplicate_ids,
+    _hard_fail_violations,
+    _schema_violations,
+    _verdict_cache,
+)
+
+
+def test_duplicate_ids_detected_once():
+    """Each repeated @id is reported once, in first-seen order."""
+    print("=" * 60)
+    print("TESTING: Validator - Duplicate @id Detection")
+    print("=" * 60)
+
+    nodes = [
+        {"@id": "kb:file-1"},
+        {"@id": "kb:filefacet-1"},
+        {"@id": "kb:file-1"},
+        {"@type": "uco-observable:File"},
+        {"@id": "kb:filefacet-1"},
+        {"@id": "kb:file-1"},
+    ]
+    assert _find_duplicate_ids(nodes) == ["kb:file-1", "kb:filefacet-1"]
+    assert _find_duplicate_ids([{"@id": "kb:a"}, {"@id": "kb:b"}]) == []
+
+    print("✅ Duplicate @id test passed!")
+
+
+def test_schema_violations_reported():
+    """Structural problems are reported with their location; a valid graph has none."""
+    good = {
+        "@context": {"kb": "http://example.org/kb/"},
+        "@graph": [
+            {"@id": "kb:file-1", "@type": "uco-observable:File", "uco-core:hasFacet": [{"@id": "kb:filefacet-1"}]},
+            {"@id": "kb:filefacet-1", "@type": "uco-observable:FileFacet"},
+        ],
+    }
+    assert _schema_violations(good) == []
+
+    bad = {"@graph": [{"@type": "uco-observable:File"}, {"@id": "kb:x", "@type": "uco-observable:File", "uco-core:hasFacet": [{}]}]}
+    violations = _schema_violations(bad)
+    assert any("'<root>'" in v and "@context" in v for v in violations)
+    assert any("'@graph/0'" in v and "@id" in v for v in violations)
+    assert any("'@graph/1/uco-core:hasFacet/0'" in v for v in violations)
+
+    print("✅ Schema violation test passed!")
+
+
+def test_node_ids_extracted_from_feedback():
+    """Planner UUIDs and kb:-prefixed ids are both picked up, once each."""
+    bare = "d4e7866c-ea41-57de-855f-6bc177bbe8ce"
+    prefixed = "kb:file-f47ac10b-58cc-4372-a567-0e02b2c3d479"
+    feedback = (
+        f"Duplicate @id '{bare}' appears on more than one node in @graph.\n"
+        f"Invalid property placement on node '{prefixed}'.\n"
+        f"Duplicate @id '{bare}' again."
+    )
+    assert _extract_node_ids(feedback) == [bare, prefixed]
+    assert _extract_node_ids("Layer 1 validation passed.") == []
+
+    print("✅ Node id extraction test passed!")
+
+
+def test_hard_fail_conditions_detected():
+    """Empty values and property-less referenced facets are caught without case-utils."""
+    nodes = [
+        {"@id": "kb:file-1", "@type": "uco-observable:File", "uco-core:hasFacet": [{"@id": "kb:filefacet-1"}]},
+        {"@id": "kb:filefacet-1", "@type": "uco-observable:FileFacet"},
+        {"@id": "kb:file-2", "@type": "uco-observable:File", "uco-core:hasFacet": [{"@id": "kb:filefacet-2"}]},
+        {
+            "@id": "kb:filefacet-2",
+            "@type": "uco-observable:FileFacet",
+            "uco-observable:fileName": "",
+            "uco-observable:tag": None,
+            "uco-observable:isDirectory": False,
+            "uco-observable:createdTime": {"@type": "xsd:dateTime", "@value": None},
+        },
+    ]
+    violations = _hard_fail_violations(nodes)
+
+    assert any("'kb:filefacet-2/uco-observable:fileName'" in v for v in violations)
+    assert any("'kb:filefacet-2/uco-observable:tag'" in v for v in violations)
+    assert any("'kb:filefacet-2/uco-observable:createdTime/@value'" in v for v in violations)
+    assert any("Facet 'kb:filefacet-1'" in v for v in violations)
+    assert not any("isDirectory" in v for v in violations)
+    assert len(violations) == 4
+    assert _hard_fail_violations(nodes[2:3] + [{"@id": "kb:filefacet-2", "uco-observable:fileName": "a"}]) == []
+
+    dangling = _hard_fail_violations(nodes[2:3])
+    assert len(dangling) == 1 and "'kb:filefacet-2'" in dangling[0] and "missing from @graph" in dangling[0]
+    inline = [{"@id": "kb:file-3", "uco-core:hasFacet": [{"@id": "kb:inline-1", "uco-observable:fileName": "a"}]}]
+    assert _hard_fail_violations(inline) == []
+    # Messages must not trip the router's plan-invalidation keywords
+    assert not any(word in dangling[0].lower() for word in ("@id", "uuid", "identifier", "reference"))
+
+    print("✅ Hard fail condition test passed!")
+
+
+def test_file_keys_and_undeclared_prefixes_detected():
+    """Facet-only attributes on a File node and undeclared prefixes fail without an ontology map."""
+    from config import CASE_UCO_CONTEXT
+
+    nodes = [
+        {
+            "@id": "kb:file-1",
+            "@type": ["uco-observable:File"],
+            "uco-observable:fileName": "a.txt",
+            "uco-core:hasFacet": [{"@id": "kb:filefacet-1"}],
+        },
+        {
+            "@id": "kb:filefacet-1",
+            "@type": "uco-observable:FileFacet",
+            "uco-observable:fileName": "a.txt",
+            "uco-observable:createdTime": {"@type": "xsd:dateTime", "@value": "2024-01-01T00:00:00Z"},
+            "obs:sizeInBytes": 42,
+            "http://example.org/custom#flag": True,
+        },
+        {"@id": "kb:facet-2", "@type": "acme:Facet", "acme:note": "x"},
+    ]
+    violations = _hard_fail_violations(nodes, CASE_UCO_CONTEXT)
+
+    assert violations == [
+        "File node 'kb:file-1' carries 'uco-observable:fileName'; move it to the File's FileFacet.",
+        "Undeclared prefix 'obs' in 'obs:sizeInBytes' on node 'kb:filefacet-1'; use only the declared prefixes.",
+        "Undeclared prefix 'acme' in 'acme:Facet' on node 'kb:facet-2'; use only the declared prefixes.",
+    ]
+    # Without a context only the File check applies; feedback must not trigger plan invalidation
+    assert len(_hard_fail_violations(nodes)) == 1
+    assert not any(word in v.lower() for v in violations for word in ("@id", "uuid", "identifier", "reference"))
+
+    print("✅ File key and prefix test passed!")
+
+
+def test_unchanged_graph_reuses_verdict():
+    """An identical graph is checked once; the cached verdict is returned as a fresh list."""
+    graph = {"@context": {}, "@graph": [{"@id": "kb:file-1", "@type": "uco-observable:File", "uco-observable:tag": ""}]}
+    _verdict_cache.clear()
+
+    first, case_result, conforms = _cached_layer1_checks(graph, {})
+    assert first and not conforms and case_result.startswith("Skipped")
+    assert len(_verdict_cache) == 1
+
+    first.append("mutated by caller")
+    again, _, _ = _cached_layer1_checks({"@context": {}, "@graph": list(graph["@graph"])}, {})
+    assert "mutated by caller" not in again and len(again) == len(first) - 1
+    assert len(_verdict_cache) == 1
+
+    # A different ontology map is a different verdict
+    _cached_layer1_checks(graph, {"properties": {"FileFacet": ["tag"]}})
+    assert len(_verdict_cache) == 2
+    _verdict_cache.clear()
+
+    print("✅ Verdict cache test passed!")
+
+
+if __name__ == "__main__":
+    test_duplicate_ids_detected_once()
+    test_schema_violations_reported()
+    test_node_ids_extracted_from_feedback()
+    test_hard_fail_conditions_detected()
+    test_file_keys_and_undeclared_prefixes_detected()
+    test_unchanged_graph_reuses_verdict()
@@ -4,11 +4,14 @@ import uuid
 import tempfile
 import os
 import hashlib
+import threading
+from functools import lru_cache
 from typing import Literal, Any, Dict, Optional, List
 
 from langchain_core.tools import tool
 from pydantic.v1 import BaseModel, Field
 from schemas import OntologyAnalysis
+from utils import dumps_json
 
 # Import CASE validation utility, which is used by a tool
 try:
@@ -31,14 +34,36 @@ def _uuid5(namespace: uuid.UUID, name: str) -> str:
     """Generates a UUIDv5 from a namespace and a name."""
     return str(uuid.uuid5(namespace, name))
 
+def _bulk_uuid4(count: int) -> List[str]:
+    """Draws `count` RFC 4122 v4 UUID strings from a single os.urandom call."""
+    raw = bytearray(os.urandom(16 * count))
+    uuids: List[str] = []
+    for offset in range(0, 16 * count, 16):
+        raw[offset + 6] = (raw[offset + 6] & 0x0F) | 0x40  # version 4
+        raw[offset + 8] = (raw[offset + 8] & 0x3F) | 0x80  # RFC 4122 variant
+        h = raw[offset:offset + 16].hex()
+        uuids.append(f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}")
+    return uuids
+
+
+def _uuid4_hex() -> str:
+    """Formats one random v4 UUID straight from bytes, skipping uuid.UUID construction."""
+    return _bulk_uuid4(1)[0]
+
+
+def make_uuids(entity_type: str, count: int, prefix: str = "kb:") -> List[str]:
+    """Generate `count` unique identifiers for an entity type in one batch."""
+    return [f"{prefix}{entity_type}-{u}" for u in _bulk_uuid4(count)]
+
+
 def make_uuid(entity_type: str, prefix: str = "kb:") -> str:
     """Generate a single UUID for an entity type."""
-    return f"{prefix}{entity_type}-{uuid.uuid4()}"
+    return f"{prefix}{entity_type}-{_uuid4_hex()}"
 
 
 def make_paired_ids(base_slug: str, prefix: str = "kb:") -> tuple[str, str]:
     """Generate paired UUIDs for an object and its facet."""
-    u = str(uuid.uuid4())
+    u = _uuid4_hex()
     return f"{prefix}{base_slug}-{u}", f"{prefix}{base_slug}facet-{u}"
 
 
@@ -51,16 +76,16 @@ def plan_record_uuids(
     """Plan UUID allocation for multiple records with classes and facets."""
     plan: List[Dict[str, str]] = []
     facet_set = set(facet_slugs)
+    # One v4 suffix per class per record, drawn up front; a class and its facet share one.
+    pool = iter(_bulk_uuid4(record_count * len(class_slugs)))
     for _ in range(record_count):
         rec: Dict[str, str] = {}
         for cls in class_slugs:
+            u = next(pool)
             facet_name = f"{cls}Facet"
+            rec[cls] = f"{prefix}{cls}-{u}"
             if facet_name in facet_set:
-                obj_id, facet_id = make_paired_ids(cls, prefix)
-                rec[cls] = obj_id
-                rec[facet_name] = facet_id
-            else:
-                rec[cls] = make_uuid(cls, prefix)
+                rec[facet_name] = f"{prefix}{cls}facet-{u}"
         plan.append(rec)
     return plan
 
@@ -86,6 +111,106 @@ class AnalyzeCaseUcoInput(BaseModel):
     output_format: Literal["markdown", "summary", "properties", "json"] = "markdown"
 
 
+_case_uco_analyzer_lock = threading.Lock()
+
+
+def _get_case_uco_analyzer():
+    """Return the process-wide CASE/UCO analyzer, loading it on first use."""
+    analyzer = globals().get("_case_uco_analyzer")
+    if analyzer is None:
+        # Tool calls may arrive concurrently; only one of them loads the ontologies
+        with _case_uco_analyzer_lock:
+            analyzer = globals().get("_case_uco_analyzer")
+            if analyzer is None:
+                print("[INFO] [Tools] Initializing CASE/UCO analyzer (first time only)...")
+                # Use full analyzer for complete SHACL property analysis
+                from case_uco import CaseUcoAnalyzer
+                analyzer = CaseUcoAnalyzer()
+                globals()["_case_uco_analyzer"] = analyzer
+                print("[SUCCESS] [Tools] CASE/UCO analyzer ready")
+    return analyzer
+
+
+# The loaded ontology never changes within a process, so the same class is
+# only analyzed once no matter how many records or agents ask for it.
+@lru_cache(maxsize=None)
+def _analyze_class(cls: str, fmt: str) -> str:
+    analyzer = _get_case_uco_analyzer()
+
+    # Early guard for unknown class
+    probe = analyzer.get_class_summary(cls)
+    if isinstance(probe, dict) and probe.get("error"):
+        return f"Error: {probe['error']}"
+
+    if fmt == "markdown":
+        return analyzer.export_to_markdown(cls)
+    elif fmt == "summary":
+        s = probe
+        usage = ("Use 'hasFacet' property to link to {0}Facet".format(cls)
+                 if s.get('has_facet_pattern') else "Direct property usage")
+        superclasses = ", ".join(s.get('superclasses', [])) or "None"
+        pc = s.get('property_counts', {})
+        return (
+            "CASE/UCO Class Analysis Summary for {cls}:\n\n"
+            "Class: {name}\n"
+            "URI: {uri}\n"
+            "Description: {desc}\n\n"
+            "Hierarchy Information:\n"
+            "- Superclasses: {scount} ({sclasses})\n\n"
+            "Property Summary:\n"
+            "- Total Properties: {pt}\n"
+            "- Facet Properties: {pf}\n"
+            "- Inherited Properties: {pi}\n"
+            "- Semantic Properties: {ps}\n\n"
+            "Usage Pattern: {usage}"
+        ).format(
+            cls=cls, name=s.get('name', cls), uri=s.get('uri', ''),
+            desc=(s.get('description') or '').strip(),
+            scount=s.get('superclass_count', 0), sclasses=superclasses,
+            pt=pc.get('total', 0), pf=pc.get('facet', 0),
+            pi=pc.get('inherited', 0), ps=pc.get('semantic', 0),
+            usage=usage
+        )
+    elif fmt == "properties":
+        props = analyzer.get_shacl_property_shapes(cls) or {}
+        if not props:
+            return (f"SHACL Property Shapes Analysis for {cls}:\n"
+                    f"Total Properties: 0\n\n"
+                    f"(No SHACL shapes found in the loaded graphs for this class.)")
+        by_class = {}
+        for pname, pdata in props.items():
+            by_class.setdefault(
+                pdata.get('sourceClass', 'Unknown'), []).append((pname, pdata))
+        lines = [
+            f"SHACL Property Shapes Analysis for {cls}:", f"Total Properties: {len(props)}", ""]
+        for source_class, pairs in sorted(by_class.items()):
+            lines.append(
+                f"\n{source_class} Properties ({len(pairs)} total):")
+            lines.append("-" * 50)
+            for pname, pdata in sorted(pairs):
+                ptype = pdata.get('propertyType') or 'owl:Property'
+                row = f"• {pname}: {ptype}"
+                if pdata.get('minCount') or pdata.get('maxCount'):
+                    row += f" [{pdata.get('minCount') or '0'}..{pdata.get('maxCount') or '*'}]"
+                if pdata.get('localRange'):
+                    row += f" → {pdata['localRange']}"
+                elif pdata.get('globalRange'):
+                    row += f" → {pdata['globalRange']}"
+                lines.append(row)
+                desc = (pdata.get('description') or '').strip()
+                if desc:
+                    lines.append(
+                        f"     Description: {desc[:80] + '...' if len(desc) > 80 else desc}")
+        return "\n".join(lines)
+    elif fmt == "json":
+        structured = analyzer.get_structured_property_profile(cls)
+        if isinstance(structured, dict) and structured.get('error'):
+            return f"Error: {structured['error']}"
+        return dumps_json(structured)
+    else:
+        return "Invalid output_format: 'markdown', 'summary', 'properties', or 'json' are supported."
+
+
 @tool("analyze_case_uco_class", args_schema=AnalyzeCaseUcoInput)
 def analyze_case_uco_class(class_name: str, output_format: str = "markdown") -> str:
     """
@@ -98,88 +223,7 @@ def analyze_case_uco_class(class_name: str, output_format: str = "markdown") ->
         if not cls:
             return "Error: class_name is required."
 
-        # Cached analyzer instance with lazy loading
-        analyzer = globals().get("_case_uco_analyzer")
-        if analyzer is None:
-            print("[INFO] [Tools] Initializing CASE/UCO analyzer (first time only)...")
-            # Use full analyzer for complete SHACL property analysis
-            from case_uco import CaseUcoAnalyzer
-            analyzer = CaseUcoAnalyzer()
-            globals()["_case_uco_analyzer"] = analyzer
-            print("[SUCCESS] [Tools] CASE/UCO analyzer ready")
-
-        # Early guard for unknown class
-        probe = analyzer.get_class_summary(cls)
-        if isinstance(probe, dict) and probe.get("error"):
-            return f"Error: {probe['error']}"
-
-        if fmt == "markdown":
-            return analyzer.export_to_markdown(cls)
-        elif fmt == "summary":
-            s = probe
-            usage = ("Use 'hasFacet' property to link to {0}Facet".format(cls)
-                     if s.get('has_facet_pattern') else "Direct property usage")
-            superclasses = ", ".join(s.get('superclasses', [])) or "None"
-            pc = s.get('property_counts', {})
-            return (
-                "CASE/UCO Class Analysis Summary for {cls}:\n\n"
-                "Class: {name}\n"
-                "URI: {uri}\n"
-                "Description: {desc}\n\n"
-                "Hierarchy Information:\n"
-                "- Superclasses: {scount} ({sclasses})\n\n"
-                "Property Summary:\n"
-                "- Total Properties: {pt}\n"
-                "- Facet Properties: {pf}\n"
-                "- Inherited Properties: {pi}\n"
-                "- Semantic Properties: {ps}\n\n"
-                "Usage Pattern: {usage}"
-            ).format(
-                cls=cls, name=s.get('name', cls), uri=s.get('uri', ''),
-                desc=(s.get('description') or '').strip(),
-                scount=s.get('superclass_count', 0), sclasses=superclasses,
-                pt=pc.get('total', 0), pf=pc.get('facet', 0),
-                pi=pc.get('inherited', 0), ps=pc.get('semantic', 0),
-                usage=usage
-            )
-        elif fmt == "properties":
-            props = analyzer.get_shacl_property_shapes(cls) or {}
-            if not props:
-                return (f"SHACL Property Shapes Analysis for {cls}:\n"
-                        f"Total Properties: 0\n\n"
-                        f"(No SHACL shapes found in the loaded graphs for this class.)")
-            by_class = {}
-            for pname, pdata in props.items():
-                by_class.setdefault(
-                    pdata.get('sourceClass', 'Unknown'), []).append((pname, pdata))
-            lines = [
-                f"SHACL Property Shapes Analysis for {cls}:", f"Total Properties: {len(props)}", ""]
-            for source_class, pairs in sorted(by_class.items()):
-                lines.append(
-                    f"\n{source_class} Properties ({len(pairs)} total):")
-                lines.append("-" * 50)
-                for pname, pdata in sorted(pairs):
-                    ptype = pdata.get('propertyType') or 'owl:Property'
-                    row = f"• {pname}: {ptype}"
-                    if pdata.get('minCount') or pdata.get('maxCount'):
-                        row += f" [{pdata.get('minCount') or '0'}..{pdata.get('maxCount') or '*'}]"
-                    if pdata.get('localRange'):
-                        row += f" → {pdata['localRange']}"
-                    elif pdata.get('globalRange'):
-                        row += f" → {pdata['globalRange']}"
-                    lines.append(row)
-                    desc = (pdata.get('description') or '').strip()
-                    if desc:
-                        lines.append(
-                            f"     Description: {desc[:80] + '...' if len(desc) > 80 else desc}")
-            return "\n".join(lines)
-        elif fmt == "json":
-            structured = analyzer.get_structured_property_profile(cls)
-            if isinstance(structured, dict) and structured.get('error'):
-                return f"Error: {structured['error']}"
-            return json.dumps(structured, indent=2, sort_keys=False)
-        else:
-            return "Invalid output_format: 'markdown', 'summary', 'properties', or 'json' are supported."
+        return _analyze_class(cls, fmt)
     except Exception as e:
         return f"Error analyzing CASE/UCO class '{class_name}': {e}"
 
@@ -188,11 +232,7 @@ def analyze_case_uco_class(class_name: str, output_format: str = "markdown") ->
 def list_case_uco_classes(filter_term: str = "") -> str:
     """List available CASE/UCO classes with optional filtering."""
     try:
-        analyzer = globals().get("_case_uco_analyzer")
-        if analyzer is None:
-            from case_uco import CaseUcoAnalyzer
-            analyzer = CaseUcoAnalyzer()
-            globals()["_case_uco_analyzer"] = analyzer
+        analyzer = _get_case_uco_analyzer()
         classes = analyzer.list_all_classes()
         if filter_term:
             filtered_classes = [
@@ -212,15 +252,81 @@ def list_case_uco_classes(filter_term: str = "") -> str:
         return f"Error listing CASE/UCO classes: {str(e)}"
 
 
+class ListCaseUcoClassesBatchInput(BaseModel):
+    """Input schema for the list_case_uco_classes_batch tool."""
+    filter_terms: List[str] = Field(...,
+                                    description="Keyword bank to search class names for (e.g., ['file', 'prefetch', 'ntfs'])")
+
+
+@tool("list_case_uco_classes_batch", args_schema=ListCaseUcoClassesBatchInput)
+def list_case_uco_classes_batch(filter_terms: List[str]) -> str:
+    """
+    Search CASE/UCO class names for every keyword in one call.
+    Returns each matching class once, with the keywords that matched it.
+    """
+    try:
+        # Keywords differing only in case would match the same classes; keep the first spelling
+        lowered_to_term = {}
+        for term in filter_terms:
+            if term and term.strip():
+                lowered_to_term.setdefault(term.strip().lower(), term.strip())
+        if not lowered_to_term:
+            return "Error: filter_terms must contain at least one keyword."
+
+        terms = list(lowered_to_term.values())
+        lowered_terms = [(term, lowered) for lowered, term in lowered_to_term.items()]
+        classes = _get_case_uco_analyzer().list_all_classes()
+        matches = {}
+        for cls in classes:
+            name = cls['name']
+            lowered_name = name.lower()
+            hits = [term for term, lowered in lowered_terms if lowered in lowered_name]
+            if hits:
+                matches[name] = hits
+
+        missed = [term for term in terms if not any(term in hits for hits in matches.values())]
+        result = f"CASE/UCO Classes matching {len(terms)} keywords ({len(matches)} found):\n\n"
+        for i, (name, hits) in enumerate(matches.items(), 1):
+            result += f"{i:3d}. {name}  [{', '.join(hits)}]\n"
+        if missed:
+            result += f"\nNo matches for: {', '.join(missed)}. Try synonyms or broader terms for these.\n"
+        return result
+    except Exception as e:
+        return f"Error listing CASE/UCO classes: {str(e)}"
+
+
+class AnalyzeCaseUcoBatchInput(BaseModel):
+    """Input schema for the analyze_case_uco_classes_batch tool."""
+    class_names: List[str] = Field(...,
+                                   description="CASE/UCO classes and facets to analyze (e.g., ['File', 'FileFacet'])")
+    output_format: Literal["markdown", "summary", "properties", "json"] = "json"
+
+
+@tool("analyze_case_uco_classes_batch", args_schema=AnalyzeCaseUcoBatchInput)
+def analyze_case_uco_classes_batch(class_names: List[str], output_format: str = "json") -> str:
+    """
+    Analyze several CASE/UCO classes or facets in one call.
+    Each analysis is returned under a '### <ClassName>' heading.
+    """
+    fmt = (output_format or "json").strip().lower()
+    names = list(dict.fromkeys(n.strip() for n in class_names if n and n.strip()))
+    if not names:
+        return "Error: class_names must contain at least one class."
+
+    sections = []
+    for cls in names:
+        try:
+            sections.append(f"### {cls}\n{_analyze_class(cls, fmt)}")
+        except Exception as e:
+            sections.append(f"### {cls}\nError analyzing CASE/UCO class '{cls}': {e}")
+    return "\n\n".join(sections)
+
+
 @tool
 def analyze_case_uco_facets() -> str:
     """Analyze all available Facet classes in the CASE/UCO ontology."""
     try:
-        analyzer = globals().get("_case_uco_analyzer")
-        if analyzer is None:
-            from case_uco import CaseUcoAnalyzer
-            analyzer = CaseUcoAnalyzer()
-            globals()["_case_uco_analyzer"] = analyzer
+        analyzer = _get_case_uco_analyzer()
         facet_analysis = analyzer.analyze_facets()
         result = f"CASE/UCO Facet Analysis:\n"
         result += f"=" * 50 + "\n\n"
@@ -245,11 +351,7 @@ def analyze_case_uco_facets() -> str:
 def analyze_case_uco_relationships() -> str:
     """Analyze relationship patterns and connection types in CASE/UCO ontology."""
     try:
-        analyzer = globals().get("_case_uco_analyzer")
-        if analyzer is None:
-            from case_uco import CaseUcoAnalyzer
-            analyzer = CaseUcoAnalyzer()
-            globals()["_case_uco_analyzer"] = analyzer
+        analyzer = _get_case_uco_analyzer()
         relationship_analysis = analyzer.analyze_relationships()
         result = f"CASE/UCO Relationship Analysis:\n"
         result += f"=" * 50 + "\n\n"
@@ -343,8 +445,7 @@ def generate_uuid(entity_type: str, prefix: str = "kb:") -> str:
         - generate_uuid("filefacet", "kb:") → "kb:filefacet-9b2c1cbe-6b7a-4b2e-8a9b-5a9d8fe2a1c2"
     """
     try:
-        uuid_v4 = str(uuid.uuid4())
-        result = f"{prefix}{entity_type}-{uuid_v4}"
+        result = f"{prefix}{entity_type}-{_uuid4_hex()}"
         print(f"[UUID TOOL] Generated unique UUID: {result}")
         return result
     except Exception as e:
@@ -1,7 +1,10 @@
 
 import re
 import json
-from typing import Dict, Any
+import hashlib
+from typing import Dict, Any, Iterable, Iterator, Optional, Tuple
+
+import orjson
 # =============================================================================
 # Essential Helper Functions
 # =============================================================================
@@ -40,7 +43,7 @@ def _get_input_artifacts(state):
     if raw is not None:
         # Convert to string if it's a dict/list
         if isinstance(raw, (dict, list)):
-            return json.dumps(raw, indent=2)
+            return dumps_json(raw)
         return str(raw)
 
     # Fallback to messages if available
@@ -49,6 +52,107 @@ def _get_input_artifacts(state):
         return _msg_text(first_msg)
     return ""
 
+# =============================================================================
+# Property Placement
+# =============================================================================
+
+
+def _local_name(term: str) -> str:
+    return term.split(":")[-1]
+
+
+def build_facet_placement(ontology_map: Dict[str, Any]) -> Dict[Tuple[str, str], Optional[str]]:
+    """
+    Precompute facet ownership once per ontology map, keyed by (class, property) local names.
+    Facet-first placement: a facet-owned property maps to its facet unless the class lists it
+    explicitly (stored as None). The ("*", property) key covers node types the map doesn't list.
+    """
+    properties = ontology_map.get("properties") if isinstance(ontology_map, dict) else None
+    if not isinstance(properties, dict):
+        return {}
+
+    facet_owner: Dict[str, str] = {}
+    class_props: Dict[str, set] = {}
+    for owner, props in properties.items():
+        if owner.endswith("Facet"):
+            for prop in props or []:
+                facet_owner[_local_name(prop)] = owner
+        else:
+            class_props[_local_name(owner)] = {_local_name(prop) for prop in props or []}
+
+    placement: Dict[Tuple[str, str], Optional[str]] = {}
+    for prop, facet in facet_owner.items():
+        placement[("*", prop)] = facet
+        for cls, owned in class_props.items():
+            placement[(cls, prop)] = None if prop in owned else facet
+    return placement
+
+
+def facet_for_property(placement: Dict[Tuple[str, str], Optional[str]], node_type: Any, prop: str) -> Optional[str]:
+    """Return the facet that should hold `prop` on a node of `node_type`, or None if it stays put."""
+    prop_name = _local_name(prop)
+    cls = _local_name(node_type) if isinstance(node_type, str) else "*"
+    return placement.get((cls, prop_name), placement.get(("*", prop_name)))
+
+# =============================================================================
+# Serialization Helpers
+# =============================================================================
+
+
+def dumps_json(obj: Any, indent: bool = True) -> str:
+    """
+    Serialize a prompt or output payload with orjson (2-space indent by default).
+    Falls back to the stdlib for values orjson rejects, such as integers wider than 64 bits.
+    """
+    option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+    try:
+        return orjson.dumps(obj, option=option).decode("utf-8")
+    except TypeError:
+        return json.dumps(obj, indent=2 if indent else None, default=str)
+
+
+def stream_jsonld(context: Dict[str, Any], nodes: Iterable[Dict[str, Any]]) -> bytes:
+    """
+    Serialize a JSON-LD document node-by-node instead of dumping one large dict.
+    Each @graph entry is encoded on its own, so no intermediate document dict is built.
+    """
+    parts = [b'{"@context":', orjson.dumps(context), b',"@graph":[']
+    for idx, node in enumerate(nodes):
+        if idx:
+            parts.append(b",")
+        parts.append(orjson.dumps(node))
+    parts.append(b"]}")
+    return b"".join(parts)
+
+
+def iter_ndjson(context: Dict[str, Any], nodes: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    """
+    Yield a JSON-LD graph as newline-delimited JSON: a {"@context": ...} header line,
+    then one line per @graph node, so consumers can parse it incrementally.
+    """
+    yield b'{"@context":' + orjson.dumps(context) + b"}\n"
+    for node in nodes:
+        yield orjson.dumps(node, option=orjson.OPT_APPEND_NEWLINE)
+
+
+def _value_shape(value: Any) -> Any:
+    """Replace scalars with their type name; lists collapse to their distinct element shapes."""
+    if isinstance(value, dict):
+        return {str(key): _value_shape(item) for key, item in value.items()}
+    if isinstance(value, list):
+        shapes = {orjson.dumps(_value_shape(item), option=orjson.OPT_SORT_KEYS) for item in value}
+        return [orjson.loads(shape) for shape in sorted(shapes)]
+    return type(value).__name__
+
+
+def input_shape_key(payload: Any) -> str:
+    """
+    Hash the schema of an input payload (keys and value types, values stripped).
+    Inputs with the same fields map to the same key regardless of values or record count.
+    """
+    canonical = orjson.dumps(_value_shape(payload), option=orjson.OPT_SORT_KEYS)
+    return hashlib.blake2b(canonical, digest_size=16).hexdigest()
+
 # =============================================================================
 # Parser Functions
 # =============================================================================
@@ -57,6 +161,53 @@ def _get_input_artifacts(state):
 RE_FENCED_JSON = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL)
 
 
+def _balanced_json_end(text: str, start: int) -> int:
+    """Return the index of the bracket that closes text[start], or -1 if it never closes."""
+    depth = 0
+    in_string = False
+    escaped = False
+    for idx in range(start, len(text)):
+        ch = text[idx]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            depth += 1
+        elif ch in "}]":
+            depth -= 1
+            if depth == 0:
+                return idx
+    return -1
+
+
+def extract_first_json(text: str, openers: str = "{[") -> Any:
+    """
+    Extract the first valid JSON object/array embedded in free text (e.g. an LLM reply).
+    Walks forward tracking string/escape state and bracket depth instead of using a
+    backtracking regex, so each candidate span is found in a single linear pass.
+    """
+    pos = 0
+    while True:
+        starts = [idx for idx in (text.find(ch, pos) for ch in openers) if idx != -1]
+        if not starts:
+            raise ValueError("No JSON value found in text")
+        start = min(starts)
+        end = _balanced_json_end(text, start)
+        if end != -1:
+            try:
+                return orjson.loads(text[start:end + 1])
+            except orjson.JSONDecodeError:
+                pass
+        pos = start + 1
+
+
 def parse_ontology_response(content: str) -> Dict[str, Any]:
     """
     Parse the LLM response to extract the final JSON block for ontology mapping.
@@ -68,7 +219,7 @@ def parse_ontology_response(content: str) -> Dict[str, Any]:
     if matches:
         last_json_block = matches[-1]
         try:
-            data = json.loads(last_json_block)
+            data = orjson.loads(last_json_block)
             return data
         except json.JSONDecodeError as e:
             print(f"[WARNING] [Parser] Initial JSON parsing failed: {e}. Attempting to repair...")
@@ -77,7 +228,7 @@ def parse_ontology_response(content: str) -> Dict[str, Any]:
                 last_brace_index = last_json_block.rfind('}')
                 if last_brace_index != -1:
                     repaired_json = last_json_block[:last_brace_index + 1]
-                    data = json.loads(repaired_json)
+                    data = orjson.loads(repaired_json)
                     print("[INFO] [Parser] Successfully parsed repaired JSON.")
                     return data
                 else: